@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import or_
+from sqlmodel import Session, select
+
+from .models import Asset, Deal, Entry, FollowUp, MonthlySnapshot, Routine, WeeklySnapshot
+from .reporting import (
+    PROOF_KEYWORDS,
+    _day_bounds,
+    _deal_line,
+    _metrics,
+    _summarize_entries,
+    render_monthly,
+    render_weekly,
+    week_start_for,
+)
+from .rules import TEXT_FLAGS
+
+SCAN_CHUNK = 5000
+# Share of build_snapshots progress reported once the scan finishes; rendering covers the rest.
+SCAN_SHARE = 0.2
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _period_start(kind: str, day: date) -> date:
+    return week_start_for(day) if kind == "weekly" else _month_start(day)
+
+
+def _period_end(kind: str, start: date) -> date:
+    if kind == "weekly":
+        return start + timedelta(days=6)
+    return (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def periods_between(kind: str, start: date, end: date) -> list[tuple[date, date]]:
+    if kind not in {"weekly", "monthly"}:
+        raise ValueError(f"Unknown report kind: {kind}")
+    if end < start:
+        raise ValueError("end must not be before start")
+    periods = []
+    current = _period_start(kind, start)
+    while current <= end:
+        periods.append((current, _period_end(kind, current)))
+        current = periods[-1][1] + timedelta(days=1)
+    return periods
+
+
+def _new_bucket() -> dict:
+    return {
+        "rows": defaultdict(lambda: [0, 0]),
+        "accounts": set(),
+        "deals": set(),
+        "blockers": 0,
+        "talk_tracks": 0,
+        "note_hits": set(),
+        "followups_created": 0,
+        "followups_closed": 0,
+        "assets_created": 0,
+        "influenced_value": 0,
+        "influenced_fm": 0,
+        "deal_lines": [],
+    }
+
+
+def _scan(session: Session, kind: str, periods: list[tuple[date, date]]) -> dict[date, dict]:
+    # One time-ordered pass per table over the whole range, bucketed by period start.
+    lo, hi = periods[0][0], periods[-1][1]
+    lo_ts, hi_ts = _day_bounds(lo, hi)
+    buckets = {start: _new_bucket() for start, _ in periods}
+
+    def bucket(day: date) -> dict:
+        return buckets[_period_start(kind, day)]
+
+    entries = select(Entry.timestamp, Entry.play, Entry.type, Entry.duration_min, Entry.account_id, Entry.deal_id, Entry.text_flags)
+    entries = entries.where(Entry.timestamp >= lo_ts, Entry.timestamp <= hi_ts).order_by(Entry.timestamp)
+    for timestamp, play, entry_type, minutes, account_id, deal_id, flags in session.exec(entries.execution_options(yield_per=SCAN_CHUNK)):
+        b = bucket(timestamp.date())
+        row = b["rows"][(play, entry_type)]
+        row[0] += 1
+        row[1] += minutes or 0
+        if account_id:
+            b["accounts"].add(account_id)
+        if deal_id:
+            b["deals"].add(deal_id)
+        flags = flags or 0
+        b["blockers"] += bool(flags & TEXT_FLAGS["blocker"])
+        b["talk_tracks"] += bool(flags & TEXT_FLAGS["talk track"])
+        b["note_hits"].update(key for key in (*PROOF_KEYWORDS, "win story") if flags & TEXT_FLAGS[key])
+
+    followups = select(FollowUp.due_date, FollowUp.status).where(FollowUp.due_date >= lo, FollowUp.due_date <= hi).order_by(FollowUp.due_date)
+    for due_date, status in session.exec(followups.execution_options(yield_per=SCAN_CHUNK)):
+        b = bucket(due_date)
+        b["followups_created"] += 1
+        b["followups_closed"] += status == "done"
+
+    assets = select(Asset.date).where(Asset.date >= lo, Asset.date <= hi).order_by(Asset.date)
+    for asset_date in session.exec(assets.execution_options(yield_per=SCAN_CHUNK)):
+        bucket(asset_date)["assets_created"] += 1
+
+    deals = select(Deal.id, Deal.name, Deal.stage, Deal.next_step, Deal.next_step_date, Deal.est_value, Deal.est_fm, Deal.updated_at)
+    deals = deals.where(or_(Deal.updated_at.between(lo_ts, hi_ts), Deal.next_step_date.between(lo, hi))).order_by(Deal.next_step_date, Deal.id)
+    for _, name, stage, next_step, next_step_date, est_value, est_fm, updated_at in session.exec(deals.execution_options(yield_per=SCAN_CHUNK)):
+        if lo_ts <= updated_at <= hi_ts:
+            b = bucket(updated_at.date())
+            b["influenced_value"] += est_value or 0
+            b["influenced_fm"] += est_fm or 0
+        if next_step_date and lo <= next_step_date <= hi:
+            lines = bucket(next_step_date)["deal_lines"]
+            if len(lines) < 5:
+                lines.append(_deal_line(name, stage, next_step, next_step_date))
+    return buckets
+
+
+def _render(payload: tuple) -> dict:
+    kind, start, stats, metrics, extra = payload
+    if kind == "weekly":
+        return render_weekly(start, stats, metrics, extra)
+    return render_monthly(start, stats, metrics, extra)
+
+
+def build_snapshots(session: Session, kind: str, start: date, end: date, workers: int = 0, progress=None) -> list[dict]:
+    # progress(fraction) is called after the scan and after each period is rendered.
+    progress = progress or (lambda fraction: None)
+    periods = periods_between(kind, start, end)
+    buckets = _scan(session, kind, periods)
+    progress(SCAN_SHARE)
+    routines = session.exec(select(Routine.last_completed_date).where(Routine.is_active == True)).all()  # noqa: E712
+
+    payloads = []
+    for period_start, period_end in periods:
+        b = buckets[period_start]
+        rows = sorted(((play, entry_type, count, minutes) for (play, entry_type), (count, minutes) in b["rows"].items()), key=lambda r: (r[0].name, r[1]))
+        stats = _summarize_entries(
+            {"rows": rows, "accounts": len(b["accounts"]), "deals": len(b["deals"]), "blockers": b["blockers"], "talk_tracks": b["talk_tracks"]}
+        )
+        totals = {key: b[key] for key in ("followups_created", "followups_closed", "assets_created", "influenced_value", "influenced_fm")}
+        totals["routines"] = len(routines)
+        totals["routines_completed"] = sum(1 for done in routines if done and period_start <= done <= period_end)
+        extra = b["deal_lines"] if kind == "weekly" else b["note_hits"]
+        payloads.append((kind, period_start, stats, _metrics(stats, totals), extra))
+
+    def rendered(reports) -> list[dict]:
+        done = []
+        for report in reports:
+            done.append(report)
+            progress(SCAN_SHARE + (1 - SCAN_SHARE) * len(done) / len(payloads))
+        return done
+
+    if workers > 1 and len(payloads) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return rendered(pool.map(_render, payloads, chunksize=max(1, len(payloads) // (workers * 4))))
+    return rendered(map(_render, payloads))
+
+
+def upsert_snapshots(session: Session, kind: str, reports: list[dict]) -> dict:
+    # Snapshots have no unique key (each generate call records a new one), so the
+    # backfill overwrites the most recent snapshot for a period and inserts the rest.
+    model, period_field, report_key = (WeeklySnapshot, "week_start", "start") if kind == "weekly" else (MonthlySnapshot, "month_yyyy_mm", "month")
+    column = getattr(model, period_field)
+    keys = [report[report_key] for report in reports]
+    existing = {}
+    for snap in session.exec(select(model).where(column.in_(keys)).order_by(model.generated_at, model.id)).all():
+        existing[getattr(snap, period_field)] = snap
+
+    inserted = updated = 0
+    now = datetime.utcnow()
+    for report in reports:
+        values = {
+            "teams_text": report["teams"],
+            "email_subject": report["subject"],
+            "email_body": report["email"],
+            "slide_bullets": report["slide"],
+            "metrics_json": report["metrics"],
+            "generated_at": now,
+        }
+        snap = existing.get(report[report_key])
+        if snap is None:
+            session.add(model(**{period_field: report[report_key]}, **values))
+            inserted += 1
+        else:
+            for field, value in values.items():
+                setattr(snap, field, value)
+            session.add(snap)
+            updated += 1
+    session.commit()
+    return {"periods": len(reports), "inserted": inserted, "updated": updated}
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+def _size_of(value: Any) -> int:
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return 256 + sum(_size_of(v) for v in value.values())
+    return 256
+
+
+class ReportCache:
+    # Size-bounded LRU; concurrent misses on the same key wait for a single computation. The first caller
+    # computes on its own thread, so a waiter only ever blocks on work that is already running.
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_items: int = 512):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._inflight: dict[Hashable, Future] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key][0]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        self._items[key] = (value, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes or len(self._items) > self.max_items:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
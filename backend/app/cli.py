@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import date
+
+from sqlmodel import Session
+
+from .backfill import build_snapshots, upsert_snapshots
+from .database import engine, init_db, read_engine
+from .reclassify import reclassify_entries
+from .rollups import rebuild_rollups
+from .sync import RETENTION_DAYS, compact_changes
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reclassify = commands.add_parser("reclassify", help="re-run the rules over entries from an older rules version")
+    reclassify.add_argument("--chunk-size", type=int, default=1000)
+    reclassify.add_argument("--max-rows", type=int, default=None)
+
+    commands.add_parser("rebuild-rollups", help="recompute daily_rollups from the entries table")
+
+    backfill = commands.add_parser("backfill", help="build or refresh weekly/monthly snapshots for every period in a date range")
+    backfill.add_argument("kind", choices=["weekly", "monthly"])
+    backfill.add_argument("--from", dest="start", type=date.fromisoformat, required=True)
+    backfill.add_argument("--to", dest="end", type=date.fromisoformat, required=True)
+    backfill.add_argument("--workers", type=int, default=0, help="render periods across this many processes")
+
+    compact = commands.add_parser("compact-changes", help="drop sync tombstones older than the retention window")
+    compact.add_argument("--retention-days", type=int, default=RETENTION_DAYS)
+
+    args = parser.parse_args(argv)
+    init_db()
+    with Session(engine) as session:
+        if args.command == "reclassify":
+            result = reclassify_entries(session, chunk_size=args.chunk_size, max_rows=args.max_rows)
+        elif args.command == "rebuild-rollups":
+            result = {"rollup_rows": rebuild_rollups(session.connection())}
+            session.commit()
+        elif args.command == "backfill":
+            with Session(read_engine) as read:
+                reports = build_snapshots(read, args.kind, args.start, args.end, workers=args.workers)
+            result = upsert_snapshots(session, args.kind, reports)
+        elif args.command == "compact-changes":
+            result = compact_changes(session.connection(), retention_days=args.retention_days)
+            session.commit()
+    print(json.dumps(result, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import Response
+from starlette.routing import Match
+
+from .versions import data_version, latest_version
+
+# Versions restart from zero with the process, so tags carry a per-process token to keep a tag
+# issued before a restart from matching different data after it.
+_BOOT = uuid.uuid4().hex[:8]
+
+
+def route_path(scope) -> str | None:
+    # The path template of the app route a request matches, e.g. "/api/reports/weekly/{snapshot_id}".
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+class ConditionalGetMiddleware:
+    # Strong ETags for GET requests under `prefix`, derived from the data versions of the tables the
+    # matched route reads (`tables`, keyed by route path; unlisted routes depend on every table) and
+    # today's date. A matching If-None-Match is answered with 304 before the endpoint runs. Paths
+    # under `exclude` change without any table changing, so they never get a tag.
+
+    def __init__(self, app, tables: dict[str, tuple[str, ...]], prefix: str = "/api/", exclude: tuple[str, ...] = ()):
+        self.app = app
+        self.tables = tables
+        self.prefix = prefix
+        self.exclude = exclude
+
+    def etag(self, scope) -> str:
+        tables = self.tables.get(route_path(scope))
+        version = data_version(*tables) if tables is not None else latest_version()
+        return f'"{_BOOT}-{version}-{date.today().isoformat()}"'
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or not scope["path"].startswith(self.prefix) or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+
+        etag = self.etag(scope)
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))):
+            await Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})(scope, receive, send)
+            return
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = etag
+                headers["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -1,15 +1,99 @@
+import hashlib
+import os
 from pathlib import Path
 
+from sqlalchemy import event, inspect
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlmodel import Session, SQLModel, create_engine
 
-DB_PATH = Path(__file__).resolve().parents[1] / "worklog.db"
-engine = create_engine(f"sqlite:///{DB_PATH}", echo=False, connect_args={"check_same_thread": False})
+from . import models, versions  # noqa: F401  (registers tables and write tracking)
+from .migrations import MIGRATIONS, run_migrations
+from .sync import compact_changes
 
+DB_PATH = Path(os.environ.get("WORKLOG_DB") or Path(__file__).resolve().parents[1] / "worklog.db")
+READ_POOL_SIZE = 8
 
-def get_session():
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "busy_timeout": 5000,
+    "temp_store": "MEMORY",
+}
+
+
+def _configure(engine, *, read_only: bool):
+    # Take over transaction control from pysqlite so BEGIN is emitted explicitly: the writer
+    # takes the write lock up front, readers get one consistent WAL snapshot per session.
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_conn, _record):
+        dbapi_conn.isolation_level = None
+        for name, value in PRAGMAS.items():
+            dbapi_conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            dbapi_conn.execute("PRAGMA query_only = ON")
+
+    @event.listens_for(engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN" if read_only else "BEGIN IMMEDIATE")
+
+    return engine
+
+
+def create_engines(path: Path = DB_PATH):
+    url = f"sqlite:///{path}"
+    args = {"check_same_thread": False}
+    # One pooled connection serializes every writer in the process; readers never wait on it in WAL mode.
+    writer = create_engine(url, connect_args=args, pool_size=1, max_overflow=0, pool_timeout=60)
+    reader = create_engine(url, connect_args=args, pool_size=READ_POOL_SIZE, max_overflow=0, pool_timeout=60)
+    return _configure(writer, read_only=False), _configure(reader, read_only=True)
+
+
+engine, read_engine = create_engines()
+
+
+def get_read_session():
+    with Session(read_engine) as session:
+        yield session
+
+
+def get_write_session():
     with Session(engine) as session:
         yield session
 
 
-def init_db():
-    SQLModel.metadata.create_all(engine)
+def _add_missing_columns(conn) -> None:
+    # create_all never alters existing tables; add nullable columns introduced since the DB was created.
+    inspector = inspect(conn)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                ddl_type = column.type.compile(dialect=conn.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {ddl_type}')
+
+
+def schema_fingerprint(dialect) -> str:
+    # The DDL the models compile to plus the migration count: if neither changed since the last
+    # startup, create_all, the column check and migrations have nothing to do.
+    parts = [f"migrations={len(MIGRATIONS)}"]
+    for table in SQLModel.metadata.sorted_tables:
+        parts.append(str(CreateTable(table).compile(dialect=dialect)))
+        parts += sorted(str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def init_db(bind=None) -> bool:
+    bind = engine if bind is None else bind
+    fingerprint = schema_fingerprint(bind.dialect)
+    with bind.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS schema_state (id INTEGER PRIMARY KEY CHECK (id = 1), fingerprint TEXT NOT NULL)")
+        changed = conn.exec_driver_sql("SELECT fingerprint FROM schema_state").scalar() != fingerprint
+        if changed:
+            SQLModel.metadata.create_all(conn)
+            _add_missing_columns(conn)
+            run_migrations(conn)
+            conn.exec_driver_sql("INSERT OR REPLACE INTO schema_state (id, fingerprint) VALUES (1, ?)", (fingerprint,))
+        compact_changes(conn)
+    return changed
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import io
+import os
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# ReportLab and the process pool machinery are imported on first use so they stay out of app startup.
+MARGIN = 72
+BODY_FONT, BODY_SIZE, LEADING = "Helvetica", 10, 14
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def wrap_line(line: str, font: str, size: float, width: float) -> list[str]:
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    if stringWidth(line, font, size) <= width:
+        return [line]
+    lines, current = [], ""
+    for word in line.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if stringWidth(candidate, font, size) <= width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        # Words wider than the page are broken wherever they overflow.
+        while stringWidth(word, font, size) > width:
+            cut = max(1, next(i for i in range(1, len(word) + 1) if stringWidth(word[:i], font, size) > width) - 1)
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+    lines.append(current)
+    return lines
+
+
+def render_pdf(title: str, content: str) -> bytes:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    packet = io.BytesIO()
+    width, height = letter
+    p = canvas.Canvas(packet, pagesize=letter)
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(MARGIN, height - 32, title)
+    p.setFont(BODY_FONT, BODY_SIZE)
+    y = height - 57
+    for line in content.split("\n"):
+        for part in wrap_line(line, BODY_FONT, BODY_SIZE, width - 2 * MARGIN):
+            p.drawString(MARGIN, y, part)
+            y -= LEADING
+            if y < MARGIN:
+                p.showPage()
+                p.setFont(BODY_FONT, BODY_SIZE)
+                y = height - 32
+    p.save()
+    return packet.getvalue()
+
+
+def _render(doc: tuple[str, str, str]) -> tuple[str, bytes]:
+    name, title, content = doc
+    return name, render_pdf(title, content)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the server process has job queue and executor threads whose
+            # held locks a forked child would inherit.
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def render_pdfs(docs: Iterable[tuple[str, str, str]], workers: int | None = None) -> Iterator[tuple[str, bytes]]:
+    # Renders (name, title, content) documents across a process pool, yielding (name, pdf) in input
+    # order as each finishes, with a bounded number in flight.
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers <= 1:
+        yield from map(_render, docs)
+        return
+    pool, pending = _get_pool(), deque()
+    for doc in docs:
+        pending.append(pool.submit(_render, doc))
+        if len(pending) >= workers * 2:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import csv
+import io
+import zipfile
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator
+
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from .models import Asset, Deal, Entry, MonthlySnapshot, WeeklySnapshot
+
+# kind -> (column used by the from/to filter, [(header, column), ...])
+CSV_EXPORTS = {
+    "entries": (
+        Entry.timestamp,
+        [("id", Entry.id), ("timestamp", Entry.timestamp), ("type", Entry.type), ("title", Entry.title), ("play", Entry.play), ("duration_min", Entry.duration_min), ("intention_bucket", Entry.intention_bucket)],
+    ),
+    "deals": (
+        Deal.updated_at,
+        [("id", Deal.id), ("name", Deal.name), ("stage", Deal.stage), ("next_step", Deal.next_step), ("next_step_date", Deal.next_step_date), ("est_value", Deal.est_value)],
+    ),
+    "assets": (
+        Asset.date,
+        [("id", Asset.id), ("date", Asset.date), ("asset_type", Asset.asset_type), ("title", Asset.title), ("effort_min", Asset.effort_min)],
+    ),
+}
+
+
+def _range_filter(column, start: date | None, end: date | None) -> list:
+    is_datetime = column.type.python_type is datetime
+    clauses = []
+    if start:
+        clauses.append(column >= (datetime.combine(start, datetime.min.time()) if is_datetime else start))
+    if end:
+        clauses.append(column <= (datetime.combine(end, datetime.max.time()) if is_datetime else end))
+    return clauses
+
+
+def iter_csv(engine: Engine, kind: str, start: date | None = None, end: date | None = None, chunk_rows: int = 1000) -> Iterator[bytes]:
+    # Owns its session: the response body is produced after request dependencies have closed theirs.
+    date_column, columns = CSV_EXPORTS[kind]
+    primary_key = columns[0][1]
+    stmt = select(*(c for _, c in columns)).where(*_range_filter(date_column, start, end)).order_by(primary_key)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in columns])
+    with Session(engine) as session:
+        for rows in session.exec(stmt.execution_options(yield_per=chunk_rows)).partitions():
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def snapshot_documents(engine: Engine, start: date | None = None, end: date | None = None, chunk_rows: int = 100) -> Iterator[tuple[str, str, str]]:
+    # Like iter_csv: owns its session and fetches in chunks, so the first PDF goes out before every
+    # snapshot's text has been read.
+    weekly = select(WeeklySnapshot.id, WeeklySnapshot.week_start, WeeklySnapshot.email_subject, WeeklySnapshot.teams_text, WeeklySnapshot.email_body, WeeklySnapshot.slide_bullets)
+    monthly = select(MonthlySnapshot.id, MonthlySnapshot.month_yyyy_mm, MonthlySnapshot.email_subject, MonthlySnapshot.teams_text, MonthlySnapshot.email_body, MonthlySnapshot.slide_bullets)
+    # Periods overlapping the range are included.
+    if start:
+        weekly = weekly.where(WeeklySnapshot.week_start >= start - timedelta(days=6))
+        monthly = monthly.where(MonthlySnapshot.month_yyyy_mm >= start.strftime("%Y-%m"))
+    if end:
+        weekly = weekly.where(WeeklySnapshot.week_start <= end)
+        monthly = monthly.where(MonthlySnapshot.month_yyyy_mm <= end.strftime("%Y-%m"))
+    with Session(engine) as session:
+        for folder, stmt in [("weekly", weekly.order_by(WeeklySnapshot.week_start, WeeklySnapshot.id)), ("monthly", monthly.order_by(MonthlySnapshot.month_yyyy_mm, MonthlySnapshot.id))]:
+            for snap_id, period, subject, teams, email, slide in session.exec(stmt.execution_options(yield_per=chunk_rows)):
+                yield (f"{folder}/{period}-{snap_id}.pdf", subject, f"{teams}\n\n{email}\n\n{slide}")
+
+
+class _Sink:
+    # Write-only target for ZipFile; without seek/tell it writes data descriptors and never rewinds.
+    def __init__(self):
+        self.parts: list[bytes] = []
+
+    def write(self, data) -> int:
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def stream_zip(files: Iterable[tuple[str, bytes]]) -> Iterator[bytes]:
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for name, data in files:
+            archive.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
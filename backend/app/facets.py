@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from .models import Entry, EntryOutcome, EntryTag, PlayEnum
+
+# entry_tags / entry_outcomes mirror the JSON arrays on entries, one row per (entry, value).
+_LINKS = {"entry_tags": ("tag", "tags"), "entry_outcomes": ("outcome", "outcomes")}
+FACET_LIMIT = 20
+
+
+def _statements() -> list[str]:
+    statements = []
+    for table, (column, source) in _LINKS.items():
+        insert = f"INSERT OR IGNORE INTO {table} (entry_id, {column}) SELECT DISTINCT new.id, value FROM json_each(CASE WHEN json_valid(new.{source}) THEN new.{source} END);"
+        delete = f"DELETE FROM {table} WHERE entry_id = old.id;"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON entries BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON entries BEGIN {delete} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF id, {source} ON entries BEGIN {delete} {insert} END",
+        ]
+    return statements
+
+
+def rebuild_entry_links(conn) -> None:
+    for table, (column, source) in _LINKS.items():
+        conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql(
+            f"INSERT OR IGNORE INTO {table} (entry_id, {column}) SELECT DISTINCT e.id, j.value FROM entries e, json_each(e.{source}) j WHERE json_valid(e.{source})"
+        )
+
+
+def ensure_entry_links(conn) -> None:
+    for statement in _statements():
+        conn.exec_driver_sql(statement)
+    rebuild_entry_links(conn)
+
+
+def entry_filters(filters: dict, exclude: str | None = None) -> list:
+    # `filters` keys: play, tag, outcome, bucket, account_id, deal_id, start, end (None = no filter).
+    clauses = []
+    if filters.get("play") is not None and exclude != "play":
+        clauses.append(Entry.play == PlayEnum(filters["play"]))
+    if filters.get("tag") is not None and exclude != "tag":
+        clauses.append(Entry.id.in_(select(EntryTag.entry_id).where(EntryTag.tag == filters["tag"])))
+    if filters.get("outcome") is not None and exclude != "outcome":
+        clauses.append(Entry.id.in_(select(EntryOutcome.entry_id).where(EntryOutcome.outcome == filters["outcome"])))
+    if filters.get("bucket") is not None and exclude != "bucket":
+        clauses.append(Entry.intention_bucket == filters["bucket"])
+    if filters.get("account_id") is not None and exclude != "account_id":
+        clauses.append(Entry.account_id == filters["account_id"])
+    if filters.get("deal_id") is not None and exclude != "deal_id":
+        clauses.append(Entry.deal_id == filters["deal_id"])
+    if filters.get("start"):
+        clauses.append(Entry.timestamp >= datetime.combine(filters["start"], datetime.min.time()))
+    if filters.get("end"):
+        clauses.append(Entry.timestamp <= datetime.combine(filters["end"], datetime.max.time()))
+    return clauses
+
+
+def facet_counts(session: Session, filters: dict, limit: int = FACET_LIMIT) -> dict:
+    # Each dimension is counted under every filter except its own, so the counts show what
+    # selecting another value would return.
+    dimensions = {
+        "play": (Entry.play, None),
+        "tag": (EntryTag.tag, EntryTag),
+        "outcome": (EntryOutcome.outcome, EntryOutcome),
+        "bucket": (Entry.intention_bucket, None),
+        "account_id": (Entry.account_id, None),
+        "deal_id": (Entry.deal_id, None),
+    }
+    facets = {}
+    for name, (column, link) in dimensions.items():
+        count = func.count()
+        stmt = select(column, count)
+        stmt = stmt.select_from(link).join(Entry, Entry.id == link.entry_id) if link is not None else stmt.select_from(Entry)
+        stmt = stmt.where(column.is_not(None), *entry_filters(filters, exclude=name)).group_by(column).order_by(count.desc(), column).limit(limit)
+        facets[name] = [{"value": value.value if isinstance(value, PlayEnum) else value, "count": n} for value, n in session.exec(stmt)]
+    return facets
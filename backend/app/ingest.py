@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from functools import lru_cache
+
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from .models import Entry, FollowUp, PlayEnum
+from .rules import RULES_VERSION, classify, text_flags
+
+_PLAYS = {e.value: e for e in PlayEnum}
+_ENTRIES = Entry.__table__
+_COLUMNS = ("timestamp", "type", "title", "raw_note", "play", "tags", "account_id", "deal_id", "duration_min", "stakeholders", "outcomes", "followups", "intention_bucket", "rules_version", "text_flags", "created_at")
+_ROW = f"({', '.join('?' for _ in _COLUMNS)})"
+# Rows per INSERT statement (16 parameters each, well under SQLite's 32766 limit). The FTS, rollup,
+# tag and change-log triggers cost far less per row in multi-row statements than in executemany.
+PAGE_SIZE = 1000
+
+
+_encode_json = json.JSONEncoder().encode  # json.dumps with its defaults, as SQLAlchemy's JSON type stores
+
+
+@lru_cache(maxsize=4096)
+def _json_strings(values: tuple[str, ...]) -> str:
+    # Tags and outcomes come from a small vocabulary, so most rows repeat an earlier list.
+    return _encode_json(list(values))
+
+
+def _json_list(values: list) -> str:
+    return _encode_json(values) if values else "[]"
+
+
+def _sqlite_datetime(value: datetime) -> str:
+    # The text SQLAlchemy's SQLite DATETIME stores: naive wall time, always with microseconds.
+    return (value if value.tzinfo is None else value.replace(tzinfo=None)).isoformat(" ", "microseconds")
+
+
+def _insert_rows(conn, rows: list[tuple]) -> range:
+    # One connection inserts the whole chunk with nothing in between, so rowids are consecutive
+    # and last_insert_rowid() (which the triggers do not change) gives the range.
+    for start in range(0, len(rows), PAGE_SIZE):
+        page = rows[start:start + PAGE_SIZE]
+        conn.exec_driver_sql(f"INSERT INTO entries ({', '.join(_COLUMNS)}) VALUES {', '.join([_ROW] * len(page))}", tuple(v for row in page for v in row))
+    last_id = conn.exec_driver_sql("SELECT last_insert_rowid()").scalar()
+    return range(last_id - len(rows) + 1, last_id + 1)
+
+
+def ingest_entries(session: Session, rows: list[tuple[int, dict]], chunk_size: int = 5000) -> tuple[dict[int, int], list[dict]]:
+    # rows are (row number, validated EntryImport dict). Each chunk is one transaction with
+    # one executemany for entries and one for their follow-ups.
+    ids: dict[int, int] = {}
+    errors: list[dict] = []
+    conn = session.connection()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        now = datetime.utcnow()
+        created_at = _sqlite_datetime(now)
+        entry_rows, followups = [], []
+        for _, data in chunk:
+            timestamp = data.get("timestamp") or now
+            derived = classify(data["raw_note"], data["type"], timestamp.date())
+            # Encoded here and bound straight through the driver: SQLAlchemy's per-row parameter
+            # processing for a Core insert cost more than classifying the rows.
+            entry_rows.append(
+                (
+                    _sqlite_datetime(timestamp),
+                    data["type"],
+                    data["title"],
+                    data["raw_note"],
+                    _PLAYS.get(derived["play"], PlayEnum.OTHER).name,
+                    _json_strings(tuple(derived["tags"])),
+                    data["account_id"],
+                    data["deal_id"],
+                    data["duration_min"],
+                    _json_list(data["stakeholders"]),
+                    _json_strings(tuple(derived["outcomes"])),
+                    _json_list(derived["followups"]),
+                    derived["intention_bucket"],
+                    RULES_VERSION,
+                    text_flags(data["raw_note"]),
+                    created_at,
+                )
+            )
+            followups.append((data["deal_id"], derived["followups"]))
+        try:
+            new_ids = _insert_rows(conn, entry_rows)
+            followup_rows = [
+                {
+                    "title": fu["title"],
+                    "due_date": date.fromisoformat(fu["due_date"]),
+                    "status": "open",
+                    "linked_entry_id": entry_id,
+                    "linked_deal_id": deal_id,
+                }
+                for entry_id, (deal_id, found) in zip(new_ids, followups)
+                for fu in found
+            ]
+            if followup_rows:
+                session.execute(insert(FollowUp.__table__), followup_rows)
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            errors.extend({"row": n, "error": str(exc.orig or exc)} for n, _ in chunk)
+            conn = session.connection()
+            continue
+        conn = session.connection()
+        ids.update((n, entry_id) for (n, _), entry_id in zip(chunk, new_ids))
+    return ids, errors
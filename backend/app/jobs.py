@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import defer
+from sqlmodel import Session, select
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job records live in SQLite, so a restart loses nothing: jobs that were running are put back in
+# the queue and everything queued is resubmitted. Cancellation is cooperative: queued jobs are
+# cancelled at once, running ones stop at their next progress() checkpoint. A job that has already
+# been started MAX_ATTEMPTS times is marked failed instead, so one that takes the process down with
+# it does not do so again on every restart.
+TERMINAL = {"done", "failed", "cancelled"}
+MAX_ATTEMPTS = 3
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    def __init__(self, queue: JobQueue, job_id: int):
+        self.queue = queue
+        self.job_id = job_id
+
+    def read_session(self) -> Session:
+        return Session(self.queue.read_engine)
+
+    def write_session(self) -> Session:
+        return Session(self.queue.engine)
+
+    def progress(self, fraction: float) -> None:
+        with Session(self.queue.engine) as session:
+            session.execute(update(Job).where(Job.id == self.job_id).values(progress=round(min(max(fraction, 0.0), 1.0), 3)))
+            session.commit()
+            cancelled = session.exec(select(Job.cancel_requested).where(Job.id == self.job_id)).one()
+        if cancelled:
+            raise JobCancelled()
+
+
+class JobQueue:
+    def __init__(self, engine: Engine, read_engine: Engine, workers: int = 2, max_attempts: int = MAX_ATTEMPTS):
+        self.engine = engine
+        self.read_engine = read_engine
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.handlers: dict[str, Callable[[JobContext, dict], dict]] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._schedules: list[tuple[float, str, dict]] = []
+        self._stopping = threading.Event()
+
+    def register(self, kind: str):
+        def decorator(handler: Callable[[JobContext, dict], dict]):
+            self.handlers[kind] = handler
+            return handler
+
+        return decorator
+
+    def every(self, seconds: float, kind: str, params: dict | None = None) -> None:
+        # Periodic maintenance: while the queue is started, enqueue `kind` every `seconds`, skipping
+        # a tick when the previous run of that kind is still queued or running.
+        self._schedules.append((seconds, kind, params or {}))
+
+    def _tick(self, seconds: float, kind: str, params: dict, stopping: threading.Event) -> None:
+        while not stopping.wait(seconds):
+            with Session(self.read_engine) as session:
+                pending = session.exec(select(Job.id).where(Job.kind == kind, Job.status.in_(["queued", "running"]))).first()
+            if pending is None:
+                self.enqueue(kind, params)
+
+    def _submit(self, job_id: int) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+            self._executor.submit(self._run, job_id)
+
+    def start(self) -> int:
+        with Session(self.engine) as session:
+            interrupted = Job.status == "running"
+            session.execute(
+                update(Job)
+                .where(interrupted, Job.attempts >= self.max_attempts)
+                .values(status="failed", error=f"Interrupted after {self.max_attempts} attempts", finished_at=datetime.utcnow())
+            )
+            session.execute(update(Job).where(interrupted).values(status="queued", progress=0.0, started_at=None))
+            session.commit()
+            queued = session.exec(select(Job.id).where(Job.status == "queued").order_by(Job.id)).all()
+        for job_id in queued:
+            self._submit(job_id)
+        self._stopping = threading.Event()
+        for seconds, kind, params in self._schedules:
+            threading.Thread(target=self._tick, args=(seconds, kind, params, self._stopping), name=f"every-{kind}", daemon=True).start()
+        return len(queued)
+
+    def stop(self, wait: bool = False) -> None:
+        self._stopping.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def enqueue(self, kind: str, params: dict) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with Session(self.engine) as session:
+            job = Job(kind=kind, params=params)
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            session.expunge(job)
+        self._submit(job.id)
+        return job
+
+    def get(self, job_id: int, with_result: bool = False) -> Job | None:
+        stmt = select(Job).where(Job.id == job_id)
+        if not with_result:
+            stmt = stmt.options(defer(Job.result))
+        with Session(self.read_engine) as session:
+            job = session.exec(stmt).first()
+            if job is not None:
+                session.expunge(job)
+        return job
+
+    def cancel(self, job_id: int) -> Job | None:
+        with Session(self.engine) as session:
+            session.execute(update(Job).where(Job.id == job_id, Job.status == "queued").values(status="cancelled", cancel_requested=True, finished_at=datetime.utcnow()))
+            session.execute(update(Job).where(Job.id == job_id, Job.status == "running").values(cancel_requested=True))
+            session.commit()
+        return self.get(job_id)
+
+    def _finish(self, job_id: int, **values) -> None:
+        with Session(self.engine) as session:
+            session.execute(update(Job).where(Job.id == job_id).values(finished_at=datetime.utcnow(), **values))
+            session.commit()
+
+    def _run(self, job_id: int) -> None:
+        with Session(self.engine) as session:
+            claimed = session.execute(
+                update(Job).where(Job.id == job_id, Job.status == "queued").values(status="running", started_at=datetime.utcnow(), attempts=Job.attempts + 1)
+            ).rowcount
+            session.commit()
+            if not claimed:
+                return
+            kind, params = session.exec(select(Job.kind, Job.params).where(Job.id == job_id)).one()
+
+        try:
+            outcome = self.handlers[kind](JobContext(self, job_id), params)
+        except JobCancelled:
+            self._finish(job_id, status="cancelled")
+        except Exception as exc:
+            logger.exception("job %s (%s) failed", job_id, kind)
+            self._finish(job_id, status="failed", error=str(exc) or type(exc).__name__)
+        else:
+            content = outcome.get("content")
+            self._finish(
+                job_id,
+                status="done",
+                progress=1.0,
+                summary=outcome.get("summary"),
+                result=content.encode() if isinstance(content, str) else content,
+                result_type=outcome.get("media_type"),
+                result_name=outcome.get("filename"),
+            )
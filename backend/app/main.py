@@ -1,36 +1,87 @@
 from __future__ import annotations
 
-import csv
-import io
+import json
 from datetime import date, datetime, timedelta
 from pathlib import Path
+from typing import Literal
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import PlainTextResponse, Response
-from pydantic import BaseModel
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import distinct, func
 from sqlmodel import Session, select
 
-from .database import get_session, init_db
+from .backfill import build_snapshots, upsert_snapshots
+from .cache import ReportCache
+from .conditional import ConditionalGetMiddleware
+from .database import engine, get_read_session, get_write_session, init_db, read_engine
+from .documents import render_pdf, render_pdfs, shutdown_pool
+from .exports import CSV_EXPORTS, gzip_chunks, iter_csv, snapshot_documents, stream_zip
+from .facets import entry_filters, facet_counts
+from .ingest import ingest_entries
+from .jobs import JobQueue
 from .models import (
     Account,
-    Asset,
     Deal,
     Entry,
     FollowUp,
+    Job,
     MonthlySnapshot,
     PlayEnum,
     Routine,
     Template,
     WeeklySnapshot,
 )
-from .reporting import generate_monthly, generate_weekly, week_start_for
-from .rules import extract_followups, infer_intention_bucket, infer_outcomes, infer_play, infer_tags
+from .pagination import paginate
+from .profiling import PROMETHEUS_CONTENT_TYPE, ProfilingMiddleware, RequestProfiler
+from .reclassify import reclassify_entries
+from .reporting import generate_monthly, generate_weekly, month_key_for, week_start_for
+from .rules import RULES_VERSION, classify, classify_many
+from .search import search_deals, search_entries
+from .sync import SYNC_TABLES, ResyncRequired, changes_since, compact_changes
+from .versions import data_version, watch
 
 app = FastAPI(title="Local First Worklog")
 
+# Tables the weekly/monthly generators read; a write to any of them invalidates cached reports.
+REPORT_TABLES = ("entries", "followups", "assets", "deals", "routines")
+report_cache = ReportCache()
+job_queue = JobQueue(engine, read_engine)
+# Requests slower than this are logged with the query plans of their slowest statements.
+SLOW_REQUEST_SECONDS = 0.5
+profiler = RequestProfiler(read_engine, slow_seconds=SLOW_REQUEST_SECONDS)
+HOME_TABLES = ("entries", "followups", "deals")
+# The home due lists are capped; deals whose next step slipped further back than this are left off.
+HOME_LIST_LIMIT = 20
+HOME_OVERDUE_DAYS = 30
+# init_db compacts the change log at startup; a long-running server also does it on this interval.
+COMPACT_CHANGES_SECONDS = 6 * 3600
+RECLASSIFY_MAX_ROWS = 10000
+# Tables each GET route reads, for its ETag; routes not listed here are tagged with every table.
+ETAG_TABLES = {
+    "/api/home": HOME_TABLES,
+    "/api/accounts": ("accounts",),
+    "/api/entries": ("entries",),
+    "/api/deals": ("deals",),
+    "/api/search": ("entries", "deals"),
+    "/api/reports/weekly": ("snapshots_weekly",),
+    "/api/reports/weekly/{snapshot_id}": ("snapshots_weekly",),
+    "/api/reports/monthly": ("snapshots_monthly",),
+    "/api/reports/monthly/{snapshot_id}": ("snapshots_monthly",),
+    "/api/sync": SYNC_TABLES,
+    "/api/metrics/timeseries": ("entries", "followups", "routines"),
+    "/api/export/snapshots/pdf.zip": ("snapshots_weekly", "snapshots_monthly"),
+    "/api/jobs/{job_id}": ("jobs",),
+    "/api/jobs/{job_id}/result": ("jobs",),
+}
+
+# Added before CORS so CORS stays the outermost layer and also decorates 304 responses; profiling
+# sits between the two so 304s are timed too.
+app.add_middleware(ConditionalGetMiddleware, tables=ETAG_TABLES, exclude=("/api/debug/",))
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -50,17 +101,51 @@ class EntryCreate(BaseModel):
     stakeholders: list[str] = []
 
 
+class EntryImport(EntryCreate):
+    timestamp: datetime | None = None
+
+
 class DealStageUpdate(BaseModel):
     stage: str
 
 
+class JobCreate(BaseModel):
+    kind: str
+    params: dict = {}
+
+
+class ReportJob(BaseModel):
+    kind: Literal["weekly", "monthly"]
+
+
+class ExportJob(ReportJob):
+    fmt: Literal["md", "pdf"]
+
+
+class BackfillJob(ReportJob):
+    start: date = Field(alias="from")
+    end: date = Field(alias="to")
+
+
+JOB_PARAMS = {"report": ReportJob, "export": ExportJob, "backfill": BackfillJob}
+
+
 @app.on_event("startup")
 def startup():
     init_db()
+    watch(engine)  # so CLI writes to the same database invalidate ETags and caches
+    job_queue.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    job_queue.stop()
+    shutdown_pool()
+    watch(None)
 
 
 @app.post("/api/init")
-def seed(session: Session = Depends(get_session)):
+def seed(session: Session = Depends(get_write_session)):
     if session.exec(select(Account)).first():
         return {"status": "already seeded"}
 
@@ -69,9 +154,7 @@ def seed(session: Session = Depends(get_session)):
         Account(name="Northwind Health", industry="Healthcare", segment="Mid"),
     ]
     session.add_all(accounts)
-    session.commit()
-    session.refresh(accounts[0])
-    session.refresh(accounts[1])
+    session.flush()  # assigns ids; the whole seed commits once at the end
 
     deals = [
         Deal(account_id=accounts[0].id, name="Acme GCVE Migration", play_type="GCVE", stage="Discovery", next_step="Workshop", next_step_date=date.today()+timedelta(days=3), owners=["AE", "SE"], est_value=250000, est_fm=50000),
@@ -93,9 +176,7 @@ def seed(session: Session = Depends(get_session)):
         Template(template_type="monthly", content_md="Monthly summary template", is_default=True),
     ]
     session.add_all(templates)
-    session.commit()
-    session.refresh(deals[0])
-    session.refresh(deals[1])
+    session.flush()
 
     sample_notes = [
         "Ran pipeline pod for 7 deals, blocker flagged, follow up by Friday",
@@ -103,19 +184,20 @@ def seed(session: Session = Depends(get_session)):
         "Learning block: AI readiness checklist lab",
         "Co-sell touchpoint shared datasheet and one-pager",
     ]
-    for note in sample_notes:
+    for note, derived in zip(sample_notes, classify_many((note, "meeting") for note in sample_notes)):
         e = Entry(
             type="meeting",
             title=note.split(":")[0][:50],
             raw_note=note,
-            play=PlayEnum(infer_play(note)) if infer_play(note) in [e.value for e in PlayEnum] else PlayEnum.OTHER,
-            tags=infer_tags(note),
+            play=PlayEnum(derived["play"]) if derived["play"] in [e.value for e in PlayEnum] else PlayEnum.OTHER,
+            tags=derived["tags"],
             account_id=accounts[0].id,
             deal_id=deals[0].id,
             duration_min=30,
-            outcomes=infer_outcomes(note),
-            followups=extract_followups(note),
-            intention_bucket=infer_intention_bucket(note, "meeting"),
+            outcomes=derived["outcomes"],
+            followups=derived["followups"],
+            intention_bucket=derived["intention_bucket"],
+            rules_version=RULES_VERSION,
         )
         session.add(e)
     session.commit()
@@ -123,21 +205,34 @@ def seed(session: Session = Depends(get_session)):
 
 
 @app.get("/api/home")
-def home(session: Session = Depends(get_session)):
+def home(session: Session = Depends(get_read_session)):
     today = date.today()
+    key = ("home", today, data_version(*HOME_TABLES))
+    return Response(report_cache.get_or_compute(key, lambda: json.dumps(jsonable_encoder(_home_summary(session, today)))), media_type="application/json")
+
+
+def _home_summary(session: Session, today: date) -> dict:
     start = datetime.combine(today, datetime.min.time())
     end = datetime.combine(today, datetime.max.time())
-    entries = session.exec(select(Entry).where(Entry.timestamp >= start, Entry.timestamp <= end)).all()
+    minutes, entries, accounts, deals = session.exec(
+        select(func.coalesce(func.sum(Entry.duration_min), 0), func.count(), func.count(distinct(Entry.account_id)), func.count(distinct(Entry.deal_id))).where(
+            Entry.timestamp >= start, Entry.timestamp <= end
+        )
+    ).one()
     due_end = week_start_for(today) + timedelta(days=6)
-    followups = session.exec(select(FollowUp).where(FollowUp.status == "open", FollowUp.due_date <= due_end)).all()
-    deals_due = session.exec(select(Deal).where(Deal.next_step_date <= due_end)).all()
+    open_due = (FollowUp.status == "open", FollowUp.due_date <= due_end)
+    followups_due = session.exec(select(func.count()).select_from(FollowUp).where(*open_due)).one()
+    followups = session.exec(select(FollowUp).where(*open_due).order_by(FollowUp.due_date, FollowUp.id).limit(HOME_LIST_LIMIT)).all()
+    deals_due = session.exec(
+        select(Deal).where(Deal.next_step_date >= today - timedelta(days=HOME_OVERDUE_DAYS), Deal.next_step_date <= due_end).order_by(Deal.next_step_date, Deal.id).limit(HOME_LIST_LIMIT)
+    ).all()
     return {
         "today": {
-            "time_logged": sum(e.duration_min for e in entries),
-            "entries": len(entries),
-            "accounts_touched": len({e.account_id for e in entries if e.account_id}),
-            "deals_touched": len({e.deal_id for e in entries if e.deal_id}),
-            "followups_due": len(followups),
+            "time_logged": minutes,
+            "entries": entries,
+            "accounts_touched": accounts,
+            "deals_touched": deals,
+            "followups_due": followups_due,
         },
         "due_this_week": {
             "followups": [f.model_dump() for f in followups],
@@ -146,21 +241,50 @@ def home(session: Session = Depends(get_session)):
     }
 
 
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _json(content) -> Response:
+    # List and search payloads are dicts of JSON scalars, dates and str enums, which the C json encoder
+    # handles directly. Returning a Response from a sync handler also keeps the encoding on the
+    # threadpool; a returned dict goes through FastAPI's recursive jsonable_encoder on the event loop.
+    return Response(json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")), media_type="application/json")
+
+
+def _page(session: Session, model, order: list, **kwargs) -> dict:
+    try:
+        return paginate(session, model, order, **kwargs)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
 @app.get("/api/accounts")
-def list_accounts(session: Session = Depends(get_session)):
-    return session.exec(select(Account)).all()
+def list_accounts(
+    limit: int = Query(100, ge=1, le=1000),
+    after: str | None = None,
+    fields: str | None = None,
+    session: Session = Depends(get_read_session),
+):
+    return _json(_page(session, Account, [Account.id], fields=fields, limit=limit, after=after))
 
 
 @app.get("/api/deals")
-def list_deals(account_id: int | None = None, session: Session = Depends(get_session)):
-    stmt = select(Deal)
-    if account_id:
-        stmt = stmt.where(Deal.account_id == account_id)
-    return session.exec(stmt).all()
+def list_deals(
+    account_id: int | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    after: str | None = None,
+    fields: str | None = None,
+    session: Session = Depends(get_read_session),
+):
+    where = (Deal.account_id == account_id,) if account_id else ()
+    return _json(_page(session, Deal, [Deal.id], fields=fields, limit=limit, after=after, where=where))
 
 
 @app.patch("/api/deals/{deal_id}/stage")
-def update_deal_stage(deal_id: int, payload: DealStageUpdate, session: Session = Depends(get_session)):
+def update_deal_stage(deal_id: int, payload: DealStageUpdate, session: Session = Depends(get_write_session)):
     deal = session.get(Deal, deal_id)
     if not deal:
         raise HTTPException(404, "Deal not found")
@@ -184,45 +308,158 @@ def update_deal_stage(deal_id: int, payload: DealStageUpdate, session: Session =
     return {"status": "ok"}
 
 
+@app.get("/api/entries")
+def list_entries(
+    play: str | None = None,
+    tag: str | None = None,
+    outcome: str | None = None,
+    bucket: str | None = None,
+    account_id: int | None = None,
+    deal_id: int | None = None,
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    limit: int = Query(50, ge=1, le=500),
+    after: str | None = None,
+    fields: str | None = None,
+    facets: bool = True,
+    session: Session = Depends(get_read_session),
+):
+    if play is not None and play not in {p.value for p in PlayEnum}:
+        raise HTTPException(400, f"Unknown play: {play}")
+    filters = {"play": play, "tag": tag, "outcome": outcome, "bucket": bucket, "account_id": account_id, "deal_id": deal_id, "start": start, "end": end}
+
+    page = _page(session, Entry, [Entry.timestamp, Entry.id], fields=fields, limit=limit, after=after, where=tuple(entry_filters(filters)), descending=True)
+    if facets:
+        page["facets"] = facet_counts(session, filters)
+    return _json(page)
+
+
 @app.post("/api/entries")
-def create_entry(payload: EntryCreate, session: Session = Depends(get_session)):
-    play = infer_play(payload.raw_note)
+def create_entry(payload: EntryCreate, session: Session = Depends(get_write_session)):
+    derived = classify(payload.raw_note, payload.type)
+    play = derived["play"]
     entry = Entry(
         type=payload.type,
         title=payload.title,
         raw_note=payload.raw_note,
         play=PlayEnum(play) if play in [e.value for e in PlayEnum] else PlayEnum.OTHER,
-        tags=infer_tags(payload.raw_note),
+        tags=derived["tags"],
         account_id=payload.account_id,
         deal_id=payload.deal_id,
         duration_min=payload.duration_min,
         stakeholders=payload.stakeholders,
-        outcomes=infer_outcomes(payload.raw_note),
-        followups=extract_followups(payload.raw_note),
-        intention_bucket=infer_intention_bucket(payload.raw_note, payload.type),
+        outcomes=derived["outcomes"],
+        followups=derived["followups"],
+        intention_bucket=derived["intention_bucket"],
+        rules_version=RULES_VERSION,
     )
     session.add(entry)
-    session.commit()
-    session.refresh(entry)
+    session.flush()
     for fu in entry.followups:
         session.add(FollowUp(title=fu["title"], due_date=date.fromisoformat(fu["due_date"]), status="open", linked_entry_id=entry.id, linked_deal_id=entry.deal_id))
     session.commit()
+    session.refresh(entry)
     return entry
 
 
+def _parse_bulk(body: bytes) -> tuple[list[tuple[int, dict]], list[dict]]:
+    rows, errors = [], []
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise HTTPException(400, f"Body is not valid UTF-8: {exc}")
+    if text.lstrip().startswith("["):
+        try:
+            items = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise HTTPException(400, f"Invalid JSON array: {exc}")
+        validate = EntryImport.model_validate
+    else:
+        items = [line for line in text.splitlines() if line.strip()]
+        validate = EntryImport.model_validate_json
+    for n, item in enumerate(items):
+        try:
+            rows.append((n, validate(item).model_dump()))
+        except ValidationError as exc:
+            errors.append({"row": n, "error": exc.errors(include_url=False, include_context=False)})
+    return rows, errors
+
+
+def _bulk_import(session: Session, body: bytes) -> Response:
+    rows, errors = _parse_bulk(body)
+    ids, insert_errors = ingest_entries(session, rows)
+    total = len(rows) + len(errors)
+    return _json(
+        {
+            "inserted": len(ids),
+            "ids": [ids.get(n) for n in range(total)],
+            "errors": sorted(errors + insert_errors, key=lambda e: e["row"]),
+        }
+    )
+
+
+@app.post("/api/entries/bulk")
+async def create_entries_bulk(request: Request, session: Session = Depends(get_write_session)):
+    # Only reading the body happens on the event loop; parsing, validation, classification and the
+    # inserts run together on the threadpool.
+    return await run_in_threadpool(_bulk_import, session, await request.body())
+
+
+@app.post("/api/rules/reclassify")
+def reclassify(
+    chunk_size: int = Query(1000, ge=1, le=10000),
+    max_rows: int = Query(RECLASSIFY_MAX_ROWS, ge=1, le=RECLASSIFY_MAX_ROWS),
+    after: int = Query(0, ge=0),
+    session: Session = Depends(get_write_session),
+):
+    # Bounded per request so the writer is not held for a whole-table pass; callers repeat with
+    # after=<next_after> until it comes back null.
+    return reclassify_entries(session, chunk_size=chunk_size, max_rows=max_rows, after=after)
+
+
 @app.get("/api/search")
-def search(q: str = Query(""), session: Session = Depends(get_session)):
-    ql = f"%{q.lower()}%"
-    entries = session.exec(select(Entry).where(Entry.raw_note.ilike(ql))).all()
-    deals = session.exec(select(Deal).where(Deal.name.ilike(ql))).all()
-    return {"entries": entries, "deals": deals}
+def search(q: str = Query(""), limit: int = Query(20, ge=1, le=100), cursor: str | None = None, session: Session = Depends(get_read_session)):
+    try:
+        entries, next_cursor = search_entries(session, q, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    deals = [] if cursor else search_deals(session, q)
+    return _json({"entries": entries, "deals": deals, "next_cursor": next_cursor})
 
 
-@app.post("/api/generate/weekly")
-def generate_weekly_all(session: Session = Depends(get_session)):
-    data = generate_weekly(session)
-    snap = WeeklySnapshot(
-        week_start=data["start"],
+def _report_key(kind: str, today: date) -> tuple:
+    period = week_start_for(today).isoformat() if kind == "weekly" else month_key_for(today)
+    return (kind, period, data_version(*REPORT_TABLES))
+
+
+def _report(kind: str, session: Session, today: date | None = None) -> dict:
+    today = today or date.today()
+    generate = generate_weekly if kind == "weekly" else generate_monthly
+    return report_cache.get_or_compute(_report_key(kind, today), lambda: generate(session, today))
+
+
+def _report_text(data: dict) -> tuple[str, str]:
+    return data["subject"], f"{data['teams']}\n\n{data['email']}\n\n{data['slide']}"
+
+
+def _report_document(kind: str, fmt: str, session: Session) -> str | bytes:
+    today = date.today()
+
+    def render():
+        title, content = _report_text(_report(kind, session, today))
+        return f"# {title}\n\n{content}" if fmt == "md" else render_pdf(title, content)
+
+    return report_cache.get_or_compute(_report_key(kind, today) + (fmt,), render)
+
+
+def _generate_snapshot(kind: str, read: Session, session: Session, progress=None) -> dict:
+    data = _report(kind, read)
+    if progress:
+        progress(0.5)
+    period = {"week_start": data["start"]} if kind == "weekly" else {"month_yyyy_mm": data["month"]}
+    model = WeeklySnapshot if kind == "weekly" else MonthlySnapshot
+    snap = model(
+        **period,
         teams_text=data["teams"],
         email_subject=data["subject"],
         email_body=data["email"],
@@ -240,93 +477,255 @@ def generate_weekly_all(session: Session = Depends(get_session)):
     }
 
 
+@app.post("/api/generate/weekly")
+def generate_weekly_all(read: Session = Depends(get_read_session), session: Session = Depends(get_write_session)):
+    return _generate_snapshot("weekly", read, session)
+
+
 @app.post("/api/generate/monthly")
-def generate_monthly_all(session: Session = Depends(get_session)):
-    data = generate_monthly(session)
-    snap = MonthlySnapshot(
-        month_yyyy_mm=data["month"],
-        teams_text=data["teams"],
-        email_subject=data["subject"],
-        email_body=data["email"],
-        slide_bullets=data["slide"],
-        metrics_json=data["metrics"],
-    )
-    session.add(snap)
-    session.commit()
-    return {
-        "teams": data["teams"],
-        "email_subject": data["subject"],
-        "email_body": data["email"],
-        "slide_bullets": data["slide"],
-        "snapshot_id": snap.id,
-    }
+def generate_monthly_all(read: Session = Depends(get_read_session), session: Session = Depends(get_write_session)):
+    return _generate_snapshot("monthly", read, session)
 
 
 @app.post("/api/generate/slides")
-def generate_slides(session: Session = Depends(get_session)):
-    weekly = generate_weekly(session)
+def generate_slides(session: Session = Depends(get_read_session)):
+    weekly = _report("weekly", session)
     return {"slide_bullets": weekly["slide"]}
 
 
+SNAPSHOT_HEADERS = ["email_subject", "generated_at"]
+
+
+@app.get("/api/sync")
+def sync(since: int = Query(0, ge=0), limit: int = Query(500, ge=1, le=5000), session: Session = Depends(get_read_session)):
+    try:
+        return changes_since(session, since, limit)
+    except ResyncRequired as exc:
+        raise HTTPException(410, str(exc))
+
+
 @app.get("/api/reports/weekly")
-def list_weekly(session: Session = Depends(get_session)):
-    return session.exec(select(WeeklySnapshot).order_by(WeeklySnapshot.generated_at.desc())).all()
+def list_weekly(
+    limit: int = Query(50, ge=1, le=500),
+    after: str | None = None,
+    fields: str | None = None,
+    session: Session = Depends(get_read_session),
+):
+    order = [WeeklySnapshot.generated_at, WeeklySnapshot.id]
+    return _json(_page(session, WeeklySnapshot, order, fields=fields, default=["week_start", *SNAPSHOT_HEADERS], limit=limit, after=after, descending=True))
+
+
+@app.get("/api/reports/weekly/{snapshot_id}")
+def get_weekly(snapshot_id: int, session: Session = Depends(get_read_session)):
+    snap = session.get(WeeklySnapshot, snapshot_id)
+    if not snap:
+        raise HTTPException(404, "Snapshot not found")
+    return snap
 
 
 @app.get("/api/reports/monthly")
-def list_monthly(session: Session = Depends(get_session)):
-    return session.exec(select(MonthlySnapshot).order_by(MonthlySnapshot.generated_at.desc())).all()
-
-
-def _to_pdf(title: str, content: str) -> bytes:
-    packet = io.BytesIO()
-    p = canvas.Canvas(packet, pagesize=letter)
-    p.setFont("Helvetica-Bold", 14)
-    p.drawString(72, 760, title)
-    p.setFont("Helvetica", 10)
-    y = 735
-    for line in content.split("\n"):
-        p.drawString(72, y, line[:110])
-        y -= 14
-        if y < 72:
-            p.showPage()
-            y = 760
-    p.save()
-    return packet.getvalue()
+def list_monthly(
+    limit: int = Query(50, ge=1, le=500),
+    after: str | None = None,
+    fields: str | None = None,
+    session: Session = Depends(get_read_session),
+):
+    order = [MonthlySnapshot.generated_at, MonthlySnapshot.id]
+    return _json(_page(session, MonthlySnapshot, order, fields=fields, default=["month_yyyy_mm", *SNAPSHOT_HEADERS], limit=limit, after=after, descending=True))
+
+
+@app.get("/api/reports/monthly/{snapshot_id}")
+def get_monthly(snapshot_id: int, session: Session = Depends(get_read_session)):
+    snap = session.get(MonthlySnapshot, snapshot_id)
+    if not snap:
+        raise HTTPException(404, "Snapshot not found")
+    return snap
+
+
+@app.post("/api/reports/{kind}/backfill")
+def backfill_reports(
+    kind: str,
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    read: Session = Depends(get_read_session),
+    session: Session = Depends(get_write_session),
+):
+    try:
+        reports = build_snapshots(read, kind, start, end)
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+    return upsert_snapshots(session, kind, reports)
+
+
+@app.get("/api/metrics/timeseries")
+def metrics_timeseries(
+    granularity: Literal["day", "week", "month"] = "week",
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    dims: str = "play",
+    session: Session = Depends(get_read_session),
+):
+    from .timeseries import metric_timeseries  # loads NumPy on first use, not at startup
+
+    end = end or date.today()
+    start = start or end - timedelta(days=364)
+    try:
+        return _json(metric_timeseries(session, granularity, start, end, [d.strip() for d in dims.split(",") if d.strip()]))
+    except ValueError as exc:
+        raise HTTPException(400, str(exc))
+
+
+@app.get("/api/debug/metrics")
+def debug_metrics():
+    return PlainTextResponse(profiler.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/api/debug/slow")
+def debug_slow():
+    return list(reversed(profiler.slow))
+
+
+def get_job_queue() -> JobQueue:
+    return job_queue
+
+
+@job_queue.register("report")
+def _report_job(ctx, params: dict) -> dict:
+    with ctx.read_session() as read, ctx.write_session() as session:
+        return {"summary": _generate_snapshot(params["kind"], read, session, ctx.progress)}
+
+
+@job_queue.register("export")
+def _export_job(ctx, params: dict) -> dict:
+    kind, fmt = params["kind"], params["fmt"]
+    with ctx.read_session() as read:
+        # Generate (or reuse) the report first so a cancel lands between generation and rendering,
+        # outside the cache computation that concurrent requests may be waiting on.
+        _report(kind, read)
+        ctx.progress(0.5)
+        content = _report_document(kind, fmt, read)
+    return {"content": content, "media_type": "text/markdown" if fmt == "md" else "application/pdf", "filename": f"{kind}.{fmt}"}
+
+
+@job_queue.register("compact")
+def _compact_job(ctx, params: dict) -> dict:
+    with ctx.write_session() as session:
+        result = compact_changes(session.connection())
+        session.commit()
+    return {"summary": result}
+
+
+job_queue.every(COMPACT_CHANGES_SECONDS, "compact")
+
+
+@job_queue.register("backfill")
+def _backfill_job(ctx, params: dict) -> dict:
+    kind, start, end = params["kind"], date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+    with ctx.read_session() as read:
+        reports = build_snapshots(read, kind, start, end, progress=lambda fraction: ctx.progress(0.8 * fraction))
+    with ctx.write_session() as session:
+        return {"summary": upsert_snapshots(session, kind, reports)}
 
 
-@app.get("/api/export/{kind}/{fmt}")
-def export(kind: str, fmt: str, session: Session = Depends(get_session)):
-    if kind == "weekly":
-        data = generate_weekly(session)
-        title, content = data["subject"], f"{data['teams']}\n\n{data['email']}\n\n{data['slide']}"
-    elif kind == "monthly":
-        data = generate_monthly(session)
-        title, content = data["subject"], f"{data['teams']}\n\n{data['email']}\n\n{data['slide']}"
-    elif kind in {"entries", "deals", "assets"} and fmt == "csv":
-        output = io.StringIO()
-        writer = csv.writer(output)
-        if kind == "entries":
-            rows = session.exec(select(Entry)).all()
-            writer.writerow(["id", "timestamp", "type", "title", "play", "duration_min", "intention_bucket"])
-            for r in rows:
-                writer.writerow([r.id, r.timestamp, r.type, r.title, r.play, r.duration_min, r.intention_bucket])
-        elif kind == "deals":
-            rows = session.exec(select(Deal)).all()
-            writer.writerow(["id", "name", "stage", "next_step", "next_step_date", "est_value"])
-            for r in rows:
-                writer.writerow([r.id, r.name, r.stage, r.next_step, r.next_step_date, r.est_value])
-        else:
-            rows = session.exec(select(Asset)).all()
-            writer.writerow(["id", "date", "asset_type", "title", "effort_min"])
-            for r in rows:
-                writer.writerow([r.id, r.date, r.asset_type, r.title, r.effort_min])
-        return PlainTextResponse(output.getvalue(), media_type="text/csv")
-    else:
-        raise HTTPException(400, "Unsupported export")
+def _job_status(job: Job) -> dict:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "progress": job.progress,
+        "attempts": job.attempts,
+        "error": job.error,
+        "summary": job.summary,
+        "result_url": f"/api/jobs/{job.id}/result" if job.status == "done" and job.result_type else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
 
+@app.post("/api/jobs", status_code=202)
+def create_job(payload: JobCreate, queue: JobQueue = Depends(get_job_queue)):
+    model = JOB_PARAMS.get(payload.kind)
+    if not model:
+        raise HTTPException(400, f"Unknown job kind: {payload.kind}")
+    try:
+        params = model.model_validate(payload.params).model_dump(mode="json")
+    except ValidationError as exc:
+        raise HTTPException(422, exc.errors(include_url=False, include_context=False))
+    if payload.kind == "backfill" and params["end"] < params["start"]:
+        raise HTTPException(400, "end must not be before start")
+    return _job_status(queue.enqueue(payload.kind, params))
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = queue.get(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return _job_status(job)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = queue.cancel(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return _job_status(job)
+
+
+@app.get("/api/jobs/{job_id}/result")
+def job_result(job_id: int, queue: JobQueue = Depends(get_job_queue)):
+    job = queue.get(job_id, with_result=True)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    if job.status != "done" or not job.result_type:
+        raise HTTPException(409, "Job has no result yet")
+    return Response(job.result, media_type=job.result_type, headers={"Content-Disposition": f'attachment; filename="{job.result_name}"'})
+
+
+@app.get("/api/export/snapshots/pdf.zip")
+def export_snapshot_pdfs(
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    session: Session = Depends(get_read_session),
+):
+    docs = snapshot_documents(session.get_bind(), start, end)
+    headers = {"Content-Disposition": 'attachment; filename="snapshots.zip"'}
+    return StreamingResponse(stream_zip(render_pdfs(docs)), media_type="application/zip", headers=headers)
+
+
+def _export_report(kind: str, fmt: str, session: Session):
     if fmt == "md":
-        return PlainTextResponse(f"# {title}\n\n{content}")
+        return PlainTextResponse(_report_document(kind, fmt, session))
     if fmt == "pdf":
-        return Response(_to_pdf(title, content), media_type="application/pdf")
+        return Response(_report_document(kind, fmt, session), media_type="application/pdf")
     raise HTTPException(400, "Unsupported format")
+
+
+@app.get("/api/export/weekly/{fmt}")
+def export_weekly(fmt: str, session: Session = Depends(get_read_session)):
+    return _export_report("weekly", fmt, session)
+
+
+@app.get("/api/export/monthly/{fmt}")
+def export_monthly(fmt: str, session: Session = Depends(get_read_session)):
+    return _export_report("monthly", fmt, session)
+
+
+@app.get("/api/export/{kind}/{fmt}")
+def export(
+    kind: str,
+    fmt: str,
+    start: date | None = Query(None, alias="from"),
+    end: date | None = Query(None, alias="to"),
+    gzip: bool = False,
+    session: Session = Depends(get_read_session),
+):
+    if kind in CSV_EXPORTS and fmt == "csv":
+        chunks = iter_csv(session.get_bind(), kind, start, end)
+        if gzip:
+            headers = {"Content-Disposition": f'attachment; filename="{kind}.csv.gz"'}
+            return StreamingResponse(gzip_chunks(chunks), media_type="application/gzip", headers=headers)
+        return StreamingResponse(chunks, media_type="text/csv")
+    raise HTTPException(400, "Unsupported export")
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from .facets import ensure_entry_links
+from .reclassify import ensure_reclassify_state
+from .rollups import ensure_rollups
+from .rules import text_flags
+from .search import ensure_search_index
+from .sync import ensure_change_log
+
+# Indexes are declared on the models, so create_all builds them for new databases;
+# these migrations bring databases created by older versions up to the same schema.
+
+
+def _date_range_indexes(conn) -> None:
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS ix_entries_timestamp ON entries (timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_followups_due_date ON followups (due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_followups_status_due_date ON followups (status, due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_assets_date ON assets (date)",
+        "CREATE INDEX IF NOT EXISTS ix_deals_updated_at ON deals (updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_deals_next_step_date ON deals (next_step_date)",
+    ]:
+        conn.exec_driver_sql(statement)
+
+
+def _period_metrics_index(conn) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_entries_period_metrics ON entries (timestamp, play, type, duration_min, account_id, deal_id)"
+    )
+
+
+def _snapshot_listing_indexes(conn) -> None:
+    for table in ["snapshots_weekly", "snapshots_monthly"]:
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{table}_generated_at ON {table} (generated_at)")
+
+
+def _entry_filter_indexes(conn) -> None:
+    for statement in [
+        "CREATE INDEX IF NOT EXISTS ix_entries_account_timestamp ON entries (account_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_entries_deal_timestamp ON entries (deal_id, timestamp)",
+    ]:
+        conn.exec_driver_sql(statement)
+
+
+def _text_flags(conn) -> None:
+    conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS ix_entries_timestamp_flags ON entries (timestamp, text_flags)")
+    # Computed in Python rather than with SQLite's lower(), which only folds ASCII, so stored flags
+    # always equal what text_flags() gives new rows.
+    last_id = 0
+    while True:
+        rows = conn.exec_driver_sql("SELECT id, raw_note FROM entries WHERE id > ? ORDER BY id LIMIT 5000", (last_id,)).fetchall()
+        if not rows:
+            break
+        conn.exec_driver_sql("UPDATE entries SET text_flags = ? WHERE id = ?", [(text_flags(raw), row_id) for row_id, raw in rows])
+        last_id = rows[-1][0]
+
+
+def _rollup_totals_index(conn) -> None:
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_daily_rollups_day_totals ON daily_rollups (day, play, type, account_id, deal_id, entries, minutes)"
+    )
+
+
+# Append only: the position in this list is the schema version stored in PRAGMA user_version.
+MIGRATIONS = [
+    ensure_search_index,
+    _date_range_indexes,
+    _period_metrics_index,
+    ensure_rollups,
+    _snapshot_listing_indexes,
+    ensure_change_log,
+    _entry_filter_indexes,
+    ensure_entry_links,
+    _text_flags,
+    ensure_rollups,  # again, to switch the triggers to text_flags
+    _rollup_totals_index,
+    ensure_change_log,  # again, to leave rules_version stamps out of the change log
+    ensure_reclassify_state,
+]
+
+
+def schema_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def run_migrations(conn) -> int:
+    current = schema_version(conn)
+    for version, migration in enumerate(MIGRATIONS[current:], start=current + 1):
+        migration(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {version}")
+    return len(MIGRATIONS) - current
@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import datetime as dt
 from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import Column, DateTime, JSON, Text
+from sqlalchemy import Column, DateTime, Index, JSON, LargeBinary, Text, UniqueConstraint, event
 from sqlmodel import Field, SQLModel
 
+from .rules import text_flags
+
 
 class PlayEnum(str, Enum):
     GCVE = "GCVE"
@@ -20,9 +23,17 @@ class PlayEnum(str, Enum):
 
 class Entry(SQLModel, table=True):
     __tablename__ = "entries"
+    # The period index covers the reporting aggregates so they never touch the table rows; the
+    # account/deal indexes serve the filters on GET /api/entries.
+    __table_args__ = (
+        Index("ix_entries_period_metrics", "timestamp", "play", "type", "duration_min", "account_id", "deal_id"),
+        Index("ix_entries_account_timestamp", "account_id", "timestamp"),
+        Index("ix_entries_deal_timestamp", "deal_id", "timestamp"),
+        Index("ix_entries_timestamp_flags", "timestamp", "text_flags"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
     type: str
     title: str
     raw_note: str
@@ -35,9 +46,57 @@ class Entry(SQLModel, table=True):
     outcomes: list[str] = Field(default_factory=list, sa_column=Column(JSON))
     followups: list[dict] = Field(default_factory=list, sa_column=Column(JSON))
     intention_bucket: str = "D"
+    rules_version: Optional[str] = None
+    # Bitmask of rules.TEXT_FLAGS found in raw_note; set on every ORM insert/update (see below).
+    text_flags: Optional[int] = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
+@event.listens_for(Entry, "before_insert")
+@event.listens_for(Entry, "before_update")
+def _set_text_flags(mapper, connection, target: Entry) -> None:
+    target.text_flags = text_flags(target.raw_note)
+
+
+class DailyRollup(SQLModel, table=True):
+    __tablename__ = "daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("day", "play", "type", "account_id", "deal_id", name="uq_daily_rollups_key"),
+        # Covers the per-day GROUP BYs in app/timeseries.py so they stream in index order.
+        Index("ix_daily_rollups_day_totals", "day", "play", "type", "account_id", "deal_id", "entries", "minutes"),
+    )
+
+    # Maintained by triggers on entries (see app/rollups.py); 0 stands for "no account/deal".
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: date
+    play: PlayEnum
+    type: str
+    account_id: int = 0
+    deal_id: int = 0
+    entries: int = 0
+    minutes: int = 0
+    blockers: int = 0
+    talk_tracks: int = 0
+
+
+class EntryTag(SQLModel, table=True):
+    __tablename__ = "entry_tags"
+    __table_args__ = (Index("ix_entry_tags_tag_entry", "tag", "entry_id"),)
+
+    # Maintained by triggers on entries.tags (see app/facets.py).
+    entry_id: int = Field(primary_key=True)
+    tag: str = Field(primary_key=True)
+
+
+class EntryOutcome(SQLModel, table=True):
+    __tablename__ = "entry_outcomes"
+    __table_args__ = (Index("ix_entry_outcomes_outcome_entry", "outcome", "entry_id"),)
+
+    # Maintained by triggers on entries.outcomes (see app/facets.py).
+    entry_id: int = Field(primary_key=True)
+    outcome: str = Field(primary_key=True)
+
+
 class Account(SQLModel, table=True):
     __tablename__ = "accounts"
 
@@ -60,17 +119,17 @@ class Deal(SQLModel, table=True):
     est_fm: Optional[float] = None
     probability: Optional[float] = None
     next_step: str = ""
-    next_step_date: Optional[date] = None
+    next_step_date: Optional[date] = Field(default=None, index=True)
     owners: list[str] = Field(default_factory=list, sa_column=Column(JSON))
     notes: str = ""
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, index=True)
 
 
 class Asset(SQLModel, table=True):
     __tablename__ = "assets"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    date: date = Field(default_factory=date.today)
+    date: dt.date = Field(default_factory=dt.date.today, index=True)
     asset_type: str
     title: str
     linked_account_id: Optional[int] = Field(default=None, foreign_key="accounts.id")
@@ -82,10 +141,11 @@ class Asset(SQLModel, table=True):
 
 class FollowUp(SQLModel, table=True):
     __tablename__ = "followups"
+    __table_args__ = (Index("ix_followups_status_due_date", "status", "due_date"),)
 
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
-    due_date: date
+    due_date: date = Field(index=True)
     status: str = "open"
     linked_entry_id: Optional[int] = Field(default=None, foreign_key="entries.id")
     linked_deal_id: Optional[int] = Field(default=None, foreign_key="deals.id")
@@ -112,7 +172,7 @@ class WeeklySnapshot(SQLModel, table=True):
     email_body: str = Field(sa_column=Column(Text))
     slide_bullets: str = Field(sa_column=Column(Text))
     metrics_json: dict = Field(default_factory=dict, sa_column=Column(JSON))
-    generated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=False)))
+    generated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=False), index=True))
 
 
 class MonthlySnapshot(SQLModel, table=True):
@@ -125,7 +185,7 @@ class MonthlySnapshot(SQLModel, table=True):
     email_body: str = Field(sa_column=Column(Text))
     slide_bullets: str = Field(sa_column=Column(Text))
     metrics_json: dict = Field(default_factory=dict, sa_column=Column(JSON))
-    generated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=False)))
+    generated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(DateTime(timezone=False), index=True))
 
 
 class Template(SQLModel, table=True):
@@ -135,3 +195,23 @@ class Template(SQLModel, table=True):
     template_type: str
     content_md: str = Field(sa_column=Column(Text))
     is_default: bool = True
+
+
+class Job(SQLModel, table=True):
+    __tablename__ = "jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    params: dict = Field(default_factory=dict, sa_column=Column(JSON))
+    status: str = Field(default="queued", index=True)
+    progress: float = 0.0
+    attempts: int = 0
+    cancel_requested: bool = False
+    error: Optional[str] = None
+    summary: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    result: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    result_type: Optional[str] = None
+    result_name: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
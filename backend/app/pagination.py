@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import literal, tuple_
+from sqlmodel import Session, select
+
+
+def encode_cursor(values: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]).encode()).decode()
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(columns):
+            raise ValueError
+        return [_coerce(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def _coerce(column, value):
+    python_type = column.type.python_type
+    if python_type in (date, datetime):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def project(model, fields: str | None, default: list[str] | None = None) -> list:
+    columns = model.__table__.c
+    names = [f.strip() for f in fields.split(",") if f.strip()] if fields else default or list(columns.keys())
+    unknown = [name for name in names if name not in columns]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The primary key is always returned so the caller can build the next cursor.
+    return [columns.id, *(columns[name] for name in names if name != "id")]
+
+
+def paginate(session: Session, model, order: list, *, fields: str | None = None, default: list[str] | None = None, limit: int = 100, after: str | None = None, where: tuple = (), descending: bool = False) -> dict:
+    # Keyset pagination: `order` must end in a unique column so (order values) identify a row.
+    columns = project(model, fields, default)
+    hidden = [c for c in order if c.key not in {col.key for col in columns}]
+    stmt = select(*columns, *hidden).where(*where)
+    if after:
+        key, bound = tuple_(*order), tuple_(*(literal(v, c.type) for c, v in zip(order, decode_cursor(after, order))))
+        stmt = stmt.where(key < bound if descending else key > bound)
+    stmt = stmt.order_by(*(c.desc() if descending else c for c in order)).limit(limit + 1)
+    rows = session.exec(stmt).all()
+    page = rows[:limit]
+    next_after = encode_cursor([page[-1]._mapping[c.key] for c in order]) if len(rows) > limit else None
+    return {"items": [{c.key: row._mapping[c.key] for c in columns} for row in page], "next_after": next_after}
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import anyio
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.responses import PlainTextResponse
+
+from .conditional import route_path
+
+logger = logging.getLogger(__name__)
+
+# Per-request profiling. Cursor events on every Engine add to the RequestStats of the request being
+# served (found through a context variable, which follows the request into threadpool workers and
+# SQLAlchemy's async greenlets), and the middleware folds each finished request into per-route
+# histograms exposed in Prometheus text format. Slow requests are logged with the query plans of
+# their slowest statements; ?profile=1 swaps the response for a collapsed-stack sampling profile.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+SLOWEST_KEPT = 3
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+_sequence = itertools.count()
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Counter[str] = Counter()
+        self.slowest: list[tuple[float, int, str, object]] = []
+
+    def record(self, statement: str, parameters, elapsed: float) -> None:
+        self.queries += 1
+        self.db_seconds += elapsed
+        self.statements[statement] += 1
+        entry = (elapsed, next(_sequence), statement, parameters)
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, entry)
+        elif elapsed > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_started(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_finished(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, None if executemany else parameters, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_failed(context):
+    if context.connection is not None and context.connection.info.get("query_started"):
+        context.connection.info["query_started"].pop()
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        counts = self.series.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[0][i] += 1
+        counts[1] += value
+        counts[2] += 1
+
+    def render(self, name: str, help_text: str, label_names: tuple) -> list[str]:
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            base = _labels(label_names, labels)
+            for bound, n in zip(self.buckets, counts):
+                lines.append(f"{name}_bucket{{{base},le=\"{bound}\"}} {n}")
+            lines.append(f"{name}_bucket{{{base},le=\"+Inf\"}} {count}")
+            lines.append(f"{name}_sum{{{base}}} {round(total, 6)}")
+            lines.append(f"{name}_count{{{base}}} {count}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return ",".join(f'{n}="{v}"' for n, v in zip(names, escaped))
+
+
+class RequestProfiler:
+    def __init__(self, explain_engine: Engine | None = None, slow_seconds: float = 0.5, keep_slow: int = 50):
+        self.explain_engine = explain_engine
+        self.slow_seconds = slow_seconds
+        self.slow: deque[dict] = deque(maxlen=keep_slow)
+        self.requests: Counter[tuple] = Counter()
+        self.slow_requests: Counter[tuple] = Counter()
+        self.latency = _Histogram(LATENCY_BUCKETS)
+        self.queries = _Histogram(QUERY_BUCKETS)
+        self.db_time = _Histogram(LATENCY_BUCKETS)
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            self.latency.observe(key, elapsed)
+            self.queries.observe(key, stats.queries)
+            self.db_time.observe(key, stats.db_seconds)
+            if elapsed >= self.slow_seconds:
+                self.slow_requests[key] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines = ["# HELP worklog_http_requests_total Requests served, by route and status.", "# TYPE worklog_http_requests_total counter"]
+            lines += [f"worklog_http_requests_total{{{_labels(('method', 'route', 'status'), key)}}} {n}" for key, n in sorted(self.requests.items())]
+            lines += self.latency.render("worklog_http_request_duration_seconds", "Request latency.", ("method", "route"))
+            lines += self.queries.render("worklog_db_queries_per_request", "SQL statements executed per request.", ("method", "route"))
+            lines += self.db_time.render("worklog_db_seconds_per_request", "Time spent executing SQL per request.", ("method", "route"))
+            lines += [f"# HELP worklog_slow_requests_total Requests slower than {self.slow_seconds}s.", "# TYPE worklog_slow_requests_total counter"]
+            lines += [f"worklog_slow_requests_total{{{_labels(('method', 'route'), key)}}} {n}" for key, n in sorted(self.slow_requests.items())]
+        return "\n".join(lines) + "\n"
+
+    def explain(self, statement: str, parameters) -> list[str]:
+        if self.explain_engine is None or not statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+            return []
+        try:
+            with self.explain_engine.connect() as conn:
+                return [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ())]
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+
+    def record_slow(self, method: str, path: str, route: str, status: int, elapsed: float, stats: RequestStats) -> dict:
+        entry = {
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+            "method": method,
+            "path": path,
+            "route": route,
+            "status": status,
+            "seconds": round(elapsed, 4),
+            "queries": stats.queries,
+            "db_seconds": round(stats.db_seconds, 4),
+            # The same statement text run many times in one request is the usual N+1 signature.
+            "repeated": [{"sql": sql, "count": n} for sql, n in stats.statements.most_common(3) if n > 1],
+            "slowest": [
+                {"sql": sql, "seconds": round(seconds, 4), "plan": self.explain(sql, parameters)}
+                for seconds, _, sql, parameters in sorted(stats.slowest, reverse=True)
+            ],
+        }
+        self.slow.append(entry)
+        logger.warning(
+            "slow request %s %s: %.3fs, %d queries, %.3fs in db\n%s",
+            method,
+            path,
+            elapsed,
+            stats.queries,
+            stats.db_seconds,
+            "\n".join(f"  {s['seconds']}s {s['sql']}\n    " + "\n    ".join(s["plan"]) for s in entry["slowest"]),
+        )
+        return entry
+
+
+class _Sampler:
+    # Samples the stacks of every thread that is running app code, so it sees the request whether it
+    # runs on the event loop or in a threadpool worker (and anything else in flight at the time).
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def __enter__(self) -> _Sampler:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack, in_app = [], False
+                while frame is not None:
+                    path = frame.f_code.co_filename
+                    in_app = in_app or path.startswith(_APP_DIR)
+                    stack.append(f"{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                if in_app:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, profiler: RequestProfiler, prefix: str = "/api/"):
+        self.app = app
+        self.profiler = profiler
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        # Only reads are profiled: a profiled request's response is replaced by the stacks, which would
+        # hide the result of a write.
+        profile = scope["method"] in ("GET", "HEAD") and parse_qs(scope.get("query_string", b"").decode()).get("profile") == ["1"]
+        stats, status = RequestStats(), 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            if not profile:
+                await send(message)
+
+        token = _current.set(stats)
+        started = time.perf_counter()
+        sampler = _Sampler() if profile else None
+        try:
+            if sampler:
+                with sampler:
+                    await self.app(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            method, route = scope["method"], route_path(scope) or "unmatched"
+            self.profiler.observe(method, route, status, elapsed, stats)
+            if elapsed >= self.profiler.slow_seconds:
+                await anyio.to_thread.run_sync(self.profiler.record_slow, method, scope["path"], route, status, elapsed, stats)
+
+        if sampler:
+            headers = {"X-Profile-Status": str(status), "X-Profile-Seconds": f"{elapsed:.4f}", "X-Profile-Samples": str(sum(sampler.samples.values()))}
+            await PlainTextResponse(sampler.collapsed(), headers=headers)(scope, receive, send)
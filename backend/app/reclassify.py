@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from sqlalchemy import func, text, update
+from sqlmodel import Session, select
+
+from .models import Entry, PlayEnum
+from .rules import RULES_VERSION, classify_many, text_flags
+
+_PLAYS = {e.value: e for e in PlayEnum}
+
+# Entries up to through_id have been checked against rules_version. Only rows whose derived fields
+# changed are rewritten (and stamped), so unchanged rows keep their old stamp and are covered by
+# this watermark instead; a new RULES_VERSION starts it over from 0.
+_DDL = [
+    "CREATE TABLE IF NOT EXISTS reclassify_state (id INTEGER PRIMARY KEY CHECK (id = 1), rules_version TEXT NOT NULL, through_id INTEGER NOT NULL)",
+]
+
+
+def ensure_reclassify_state(conn) -> None:
+    for statement in _DDL:
+        conn.exec_driver_sql(statement)
+
+
+def _checked_through(session: Session) -> int:
+    row = session.execute(text("SELECT rules_version, through_id FROM reclassify_state")).first()
+    return row.through_id if row and row.rules_version == RULES_VERSION else 0
+
+
+def _stale(checked_through: int):
+    # Stage-change rows written by PATCH /api/deals/{id}/stage carry hand-set fields and no rules
+    # version; they are never reclassified. Entries a user captured with type "deal" are.
+    return (
+        (Entry.rules_version.is_(None) | (Entry.rules_version != RULES_VERSION))
+        & ~((Entry.type == "deal") & Entry.rules_version.is_(None))
+        & (Entry.id > checked_through)
+    )
+
+
+def count_stale(session: Session) -> int:
+    return session.exec(select(func.count()).select_from(Entry).where(_stale(_checked_through(session)))).one()
+
+
+def reclassify_entries(session: Session, chunk_size: int = 1000, max_rows: int | None = None, after: int = 0) -> dict:
+    # Keyset over ids with one short transaction per chunk: safe to interrupt and rerun. Pass the
+    # returned next_after back as `after` to continue a bounded run without rescanning done ids.
+    # Only rows whose derived fields changed are rewritten; the watermark covers the rest.
+    scanned = updated = 0
+    last_id = after
+    checked_through = _checked_through(session)
+    while max_rows is None or scanned < max_rows:
+        limit = chunk_size if max_rows is None else min(chunk_size, max_rows - scanned)
+        rows = session.exec(
+            select(Entry.id, Entry.type, Entry.raw_note, Entry.play, Entry.tags, Entry.outcomes, Entry.intention_bucket, Entry.text_flags)
+            .where(_stale(checked_through), Entry.id > last_id)
+            .order_by(Entry.id)
+            .limit(limit)
+        ).all()
+        if not rows:
+            break
+
+        changed = []
+        for row, derived in zip(rows, classify_many((r.raw_note, r.type) for r in rows)):
+            values = {
+                "play": _PLAYS.get(derived["play"], PlayEnum.OTHER),
+                "tags": derived["tags"],
+                "outcomes": derived["outcomes"],
+                "intention_bucket": derived["intention_bucket"],
+                "text_flags": text_flags(row.raw_note),
+            }
+            if values != {"play": row.play, "tags": row.tags, "outcomes": row.outcomes, "intention_bucket": row.intention_bucket, "text_flags": row.text_flags}:
+                changed.append({"id": row.id, "rules_version": RULES_VERSION, **values})
+
+        if changed:
+            session.execute(update(Entry), changed)
+        # Only a run that picked up at or below the watermark has checked every row up to here.
+        if last_id <= checked_through:
+            checked_through = rows[-1].id
+            session.execute(
+                text("INSERT OR REPLACE INTO reclassify_state (id, rules_version, through_id) VALUES (1, :version, :through)"),
+                {"version": RULES_VERSION, "through": checked_through},
+            )
+        session.commit()
+
+        scanned += len(rows)
+        updated += len(changed)
+        last_id = rows[-1].id
+
+    remaining = count_stale(session)
+    return {"rules_version": RULES_VERSION, "scanned": scanned, "updated": updated, "remaining": remaining, "next_after": last_id if remaining else None}
@@ -3,10 +3,12 @@ from __future__ import annotations
 from collections import Counter, defaultdict
 from datetime import date, datetime, timedelta
 
+from sqlalchemy import case, func
 from sqlmodel import Session, select
 
 from .models import Asset, Deal, Entry, FollowUp, Routine
-from .rules import count_unique
+from .rollups import rollup_stats
+from .rules import TEXT_FLAGS
 
 
 def week_start_for(day: date) -> date:
@@ -17,51 +19,108 @@ def month_key_for(day: date) -> str:
     return day.strftime("%Y-%m")
 
 
-def _collect_metrics(entries: list[Entry], session: Session, start: date, end: date) -> dict:
-    by_type = Counter(e.type for e in entries)
-    hours_by_play = defaultdict(float)
-    for e in entries:
-        hours_by_play[e.play.value if hasattr(e.play, "value") else str(e.play)] += e.duration_min / 60.0
+def _day_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.max.time())
 
-    followups = session.exec(select(FollowUp).where(FollowUp.due_date >= start, FollowUp.due_date <= end)).all()
-    assets = session.exec(select(Asset).where(Asset.date >= start, Asset.date <= end)).all()
-    deals = session.exec(select(Deal).where(Deal.updated_at >= datetime.combine(start, datetime.min.time()), Deal.updated_at <= datetime.combine(end, datetime.max.time()))).all()
-    routines = session.exec(select(Routine).where(Routine.is_active == True)).all()  # noqa: E712
-    completed = sum(1 for r in routines if r.last_completed_date and start <= r.last_completed_date <= end)
 
-    influenced = sum(d.est_value or 0 for d in deals)
-    influenced_fm = sum(d.est_fm or 0 for d in deals)
+def _entry_stats(session: Session, start: date, end: date) -> dict:
+    return _summarize_entries(rollup_stats(session, start, end))
 
+
+def _summarize_entries(stats: dict) -> dict:
+    by_type = Counter()
+    minutes_by_play = defaultdict(int)
+    for play, entry_type, count, minutes in stats["rows"]:
+        by_type[entry_type] += count
+        minutes_by_play[play.value if hasattr(play, "value") else str(play)] += minutes or 0
+    return {
+        "count": sum(by_type.values()),
+        "minutes": sum(minutes_by_play.values()),
+        "by_type": by_type,
+        "minutes_by_play": minutes_by_play,
+        "accounts": stats["accounts"],
+        "deals": stats["deals"],
+        "blockers": stats["blockers"],
+        "talk_tracks": stats["talk_tracks"],
+    }
+
+
+def _period_totals(session: Session, start: date, end: date) -> dict:
+    lo, hi = _day_bounds(start, end)
+    followups_created, followups_closed = session.exec(
+        select(func.count(), func.coalesce(func.sum(case((FollowUp.status == "done", 1), else_=0)), 0)).where(FollowUp.due_date >= start, FollowUp.due_date <= end)
+    ).one()
+    assets_created = session.exec(select(func.count()).select_from(Asset).where(Asset.date >= start, Asset.date <= end)).one()
+    influenced, influenced_fm = session.exec(
+        select(func.coalesce(func.sum(Deal.est_value), 0), func.coalesce(func.sum(Deal.est_fm), 0)).where(Deal.updated_at >= lo, Deal.updated_at <= hi)
+    ).one()
+    routines, completed = session.exec(
+        select(func.count(), func.coalesce(func.sum(case((Routine.last_completed_date.between(start, end), 1), else_=0)), 0)).where(Routine.is_active == True)  # noqa: E712
+    ).one()
     return {
-        "entry_counts_by_type": dict(by_type),
-        "hours_by_play": {k: round(v, 2) for k, v in hours_by_play.items()},
-        "cadence_completion_rate": round(completed / max(len(routines), 1), 2),
-        "accounts_touched": count_unique([e.account_id for e in entries]),
-        "deals_touched": count_unique([e.deal_id for e in entries]),
-        "assets_created": len(assets),
-        "followups_closed": sum(1 for f in followups if f.status == "done"),
-        "followups_created": len(followups),
+        "followups_created": followups_created,
+        "followups_closed": followups_closed,
+        "assets_created": assets_created,
         "influenced_value": influenced,
         "influenced_fm": influenced_fm,
+        "routines": routines,
+        "routines_completed": completed,
     }
 
 
+def _metrics(stats: dict, totals: dict) -> dict:
+    return {
+        "entry_counts_by_type": dict(stats["by_type"]),
+        "hours_by_play": {k: round(v / 60.0, 2) for k, v in stats["minutes_by_play"].items()},
+        "cadence_completion_rate": round(totals["routines_completed"] / max(totals["routines"], 1), 2),
+        "accounts_touched": stats["accounts"],
+        "deals_touched": stats["deals"],
+        "assets_created": totals["assets_created"],
+        "followups_closed": totals["followups_closed"],
+        "followups_created": totals["followups_created"],
+        "influenced_value": totals["influenced_value"],
+        "influenced_fm": totals["influenced_fm"],
+    }
+
+
+def _collect_metrics(stats: dict, session: Session, start: date, end: date) -> dict:
+    return _metrics(stats, _period_totals(session, start, end))
+
+
+PROOF_KEYWORDS = ["faster", "safer", "performance", "cost"]
+
+
+def _flag_hits(session: Session, start: date, end: date) -> set[str]:
+    lo, hi = _day_bounds(start, end)
+    keys = [*PROOF_KEYWORDS, "win story"]
+    found = session.exec(
+        select(*(func.max(Entry.text_flags.op("&")(TEXT_FLAGS[key])) for key in keys)).where(Entry.timestamp >= lo, Entry.timestamp <= hi)
+    ).one()
+    return {key for key, hit in zip(keys, found) if hit}
+
+
+def _deal_line(name: str, stage: str, next_step: str, next_step_date: date | None) -> str:
+    return f"- {name}: stage {stage}; next: {next_step} ({next_step_date})"
+
+
 def _deals_lines(session: Session, start: date, end: date) -> list[str]:
-    deals = session.exec(select(Deal).where(Deal.next_step_date >= start, Deal.next_step_date <= end)).all()
-    return [f"- {d.name}: stage {d.stage}; next: {d.next_step} ({d.next_step_date})" for d in deals[:5]]
+    deals = session.exec(
+        select(Deal.name, Deal.stage, Deal.next_step, Deal.next_step_date).where(Deal.next_step_date >= start, Deal.next_step_date <= end).order_by(Deal.next_step_date, Deal.id).limit(5)
+    ).all()
+    return [_deal_line(*d) for d in deals]
 
 
 def generate_weekly(session: Session, today: date | None = None) -> dict:
     today = today or date.today()
     start = week_start_for(today)
     end = start + timedelta(days=6)
-    entries = session.exec(
-        select(Entry).where(Entry.timestamp >= datetime.combine(start, datetime.min.time()), Entry.timestamp <= datetime.combine(end, datetime.max.time()))
-    ).all()
-    metrics = _collect_metrics(entries, session, start, end)
+    stats = _entry_stats(session, start, end)
+    return render_weekly(start, stats, _collect_metrics(stats, session, start, end), _deals_lines(session, start, end))
+
 
+def render_weekly(start: date, stats: dict, metrics: dict, deal_lines: list[str]) -> dict:
     bullets = [
-        f"{len(entries)} entries logged; {sum(e.duration_min for e in entries)} mins tracked across {metrics['accounts_touched']} accounts.",
+        f"{stats['count']} entries logged; {stats['minutes']} mins tracked across {metrics['accounts_touched']} accounts.",
         f"{metrics['deals_touched']} deals touched; cadence completion at {int(metrics['cadence_completion_rate']*100)}%.",
         f"{metrics['assets_created']} assets produced; {metrics['followups_created']} follow-ups created ({metrics['followups_closed']} closed).",
     ]
@@ -75,20 +134,20 @@ def generate_weekly(session: Session, today: date | None = None) -> dict:
             "1) Highlights",
             *[f"- {b}" for b in bullets[:3]],
             "\n2) Deals & pipeline movement",
-            *(_deals_lines(session, start, end) or ["- No deal updates logged."]),
+            *(deal_lines or ["- No deal updates logged."]),
             "\n3) Enablement & assets produced",
             f"- Assets created: {metrics['assets_created']}",
             "\n4) Co-sell touchpoints",
-            f"- Entries tagged co-sell/talk track: {sum('talk track' in (e.raw_note or '').lower() for e in entries)}",
+            f"- Entries tagged co-sell/talk track: {stats['talk_tracks']}",
             "\n5) Risks/blockers",
-            f"- Blockers flagged: {sum('blocker' in (e.raw_note or '').lower() for e in entries)}",
+            f"- Blockers flagged: {stats['blockers']}",
             "\n6) Next week focus",
             "- Progress top active deals and close open follow-ups.",
         ]
     )
     slide = "\n".join(
         [
-            f"• {len(entries)} worklog updates / {sum(e.duration_min for e in entries)//60}h logged",
+            f"• {stats['count']} worklog updates / {stats['minutes']//60}h logged",
             f"• {metrics['deals_touched']} deals active, {metrics['followups_closed']}/{metrics['followups_created']} follow-ups closed",
             f"• Cadence completion {int(metrics['cadence_completion_rate']*100)}%",
             "• Focus: move next steps and reduce blockers",
@@ -101,13 +160,13 @@ def generate_monthly(session: Session, today: date | None = None) -> dict:
     today = today or date.today()
     start = today.replace(day=1)
     end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-    entries = session.exec(
-        select(Entry).where(Entry.timestamp >= datetime.combine(start, datetime.min.time()), Entry.timestamp <= datetime.combine(end, datetime.max.time()))
-    ).all()
-    metrics = _collect_metrics(entries, session, start, end)
+    stats = _entry_stats(session, start, end)
+    return render_monthly(start, stats, _collect_metrics(stats, session, start, end), _flag_hits(session, start, end))
+
 
+def render_monthly(start: date, stats: dict, metrics: dict, note_hits: set[str]) -> dict:
     highlights = [
-        f"{len(entries)} total entries, {sum(e.duration_min for e in entries)//60}h logged",
+        f"{stats['count']} total entries, {stats['minutes']//60}h logged",
         f"{metrics['accounts_touched']} accounts and {metrics['deals_touched']} deals touched",
         f"{metrics['assets_created']} assets created and reused",
         f"Cadence completion: {int(metrics['cadence_completion_rate']*100)}%",
@@ -115,11 +174,7 @@ def generate_monthly(session: Session, today: date | None = None) -> dict:
     ]
     teams = "\n".join(f"- {h}" for h in highlights)
     subject = f"Monthly Summary – {start.strftime('%B %Y')}"
-    proof = []
-    raw = " ".join(e.raw_note.lower() for e in entries)
-    for key in ["faster", "safer", "performance", "cost"]:
-        if key in raw:
-            proof.append(f"- Proof ({key}): observed in logged updates.")
+    proof = [f"- Proof ({key}): observed in logged updates." for key in PROOF_KEYWORDS if key in note_hits]
 
     body = "\n".join(
         [
@@ -131,10 +186,10 @@ def generate_monthly(session: Session, today: date | None = None) -> dict:
             "\nProof statements",
             *(proof or ["- No explicit proof statements logged this month."]),
             "\nWin story status",
-            f"- {'drafted' if 'win story' in raw else 'not drafted'}",
+            f"- {'drafted' if 'win story' in note_hits else 'not drafted'}",
             "\nNext month priorities",
             "- Advance pipeline pods, complete enablement plan, and publish one win story.",
         ]
     )
     slide = "\n".join(f"• {h}" for h in highlights[:5])
-    return {"month": month_key_for(today), "teams": teams, "subject": subject, "email": body, "slide": slide, "metrics": metrics}
+    return {"month": month_key_for(start), "teams": teams, "subject": subject, "email": body, "slide": slide, "metrics": metrics}
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import distinct, func
+from sqlmodel import Session, select
+
+from .models import DailyRollup
+
+# Per-entry contribution to its (day, play, type, account, deal) rollup row. Blockers and talk
+# tracks come from the bits rules.text_flags stored on the entry.
+_KEY = "day, play, type, account_id, deal_id"
+_VALUES = """date({r}.timestamp), {r}.play, {r}.type, coalesce({r}.account_id, 0), coalesce({r}.deal_id, 0),
+    {sign}, {sign} * {r}.duration_min,
+    {sign} * ((coalesce({r}.text_flags, 0) & 1) > 0), {sign} * ((coalesce({r}.text_flags, 0) & 2) > 0)"""
+_APPLY = f"""
+    INSERT INTO daily_rollups ({_KEY}, entries, minutes, blockers, talk_tracks)
+    VALUES ({{values}})
+    ON CONFLICT ({_KEY}) DO UPDATE SET
+        entries = entries + excluded.entries,
+        minutes = minutes + excluded.minutes,
+        blockers = blockers + excluded.blockers,
+        talk_tracks = talk_tracks + excluded.talk_tracks;
+"""
+_ADD = _APPLY.format(values=_VALUES.format(r="new", sign=1))
+_REMOVE = _APPLY.format(values=_VALUES.format(r="old", sign=-1)) + """    DELETE FROM daily_rollups
+    WHERE day = date(old.timestamp) AND play = old.play AND type = old.type
+      AND account_id = coalesce(old.account_id, 0) AND deal_id = coalesce(old.deal_id, 0) AND entries = 0;
+"""
+
+_TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS daily_rollups_ai AFTER INSERT ON entries BEGIN{_ADD}END",
+    f"CREATE TRIGGER IF NOT EXISTS daily_rollups_ad AFTER DELETE ON entries BEGIN{_REMOVE}END",
+    "CREATE TRIGGER IF NOT EXISTS daily_rollups_au AFTER UPDATE OF timestamp, play, type, account_id, deal_id, duration_min, text_flags"
+    f" ON entries BEGIN{_REMOVE}{_ADD}END",
+]
+
+
+def rebuild_rollups(conn) -> int:
+    conn.exec_driver_sql("DELETE FROM daily_rollups")
+    conn.exec_driver_sql(
+        f"""
+        INSERT INTO daily_rollups ({_KEY}, entries, minutes, blockers, talk_tracks)
+        SELECT date(timestamp), play, type, coalesce(account_id, 0), coalesce(deal_id, 0), count(*), sum(duration_min),
+               sum((coalesce(text_flags, 0) & 1) > 0), sum((coalesce(text_flags, 0) & 2) > 0)
+        FROM entries
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+    return conn.exec_driver_sql("SELECT count(*) FROM daily_rollups").scalar()
+
+
+def ensure_rollups(conn) -> None:
+    for name in ["daily_rollups_ai", "daily_rollups_ad", "daily_rollups_au"]:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+    for statement in _TRIGGERS:
+        conn.exec_driver_sql(statement)
+    rebuild_rollups(conn)
+
+
+def rollup_stats(session: Session, start: date, end: date) -> dict:
+    in_period = (DailyRollup.day >= start, DailyRollup.day <= end)
+    rows = session.exec(
+        select(DailyRollup.play, DailyRollup.type, func.sum(DailyRollup.entries), func.sum(DailyRollup.minutes)).where(*in_period).group_by(DailyRollup.play, DailyRollup.type)
+    ).all()
+    accounts, deals, blockers, talk_tracks = session.exec(
+        select(
+            func.count(distinct(DailyRollup.account_id)).filter(DailyRollup.account_id != 0),
+            func.count(distinct(DailyRollup.deal_id)).filter(DailyRollup.deal_id != 0),
+            func.coalesce(func.sum(DailyRollup.blockers), 0),
+            func.coalesce(func.sum(DailyRollup.talk_tracks), 0),
+        ).where(*in_period)
+    ).one()
+    return {"rows": rows, "accounts": accounts, "deals": deals, "blockers": blockers, "talk_tracks": talk_tracks}
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 from datetime import date, datetime, timedelta
 from typing import Iterable
@@ -113,5 +115,126 @@ def extract_followups(raw: str, base_date: date | None = None) -> list[dict]:
     return [{"title": raw[:80], "due_date": due.isoformat(), "status": "open"}]
 
 
+# Keywords whose presence in a note is stored as a bit in Entry.text_flags at write time, so
+# reports count them in SQL instead of rescanning note text.
+TEXT_FLAGS = {"blocker": 1, "talk track": 2, "faster": 4, "safer": 8, "performance": 16, "cost": 32, "win story": 64}
+
+
+def text_flags(raw: str | None) -> int:
+    t = (raw or "").lower()
+    return sum(bit for key, bit in TEXT_FLAGS.items() if key in t)
+
+
 def count_unique(values: Iterable[int | None]) -> int:
     return len({v for v in values if v is not None})
+
+
+# Single-pass classifier. Every keyword from the tables above is compiled into one
+# trie-shaped regex; scanning a note yields the longest keyword starting at each
+# position, and every other keyword starting there is a prefix of it, so the
+# hit set matches the per-function `k in t` checks exactly.
+
+_EXTRA_KEYWORDS = ["meeting", "cadence", "weekly", "friday"]
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else f"(?:{'|'.join(alts)})"
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+
+def _compile_classifier() -> tuple[re.Pattern, dict[str, tuple], re.Pattern]:
+    keywords = {k for keys in PLAY_KEYWORDS.values() for k in keys}
+    keywords |= {k for keys in TAG_KEYWORDS.values() for k in keys}
+    keywords |= {k for keys in INTENTION_KEYWORDS.values() for k in keys}
+    keywords |= set(OUTCOME_MAP) | set(_EXTRA_KEYWORDS)
+    plays, buckets = list(PLAY_KEYWORDS.values()), list(INTENTION_KEYWORDS.values())
+
+    # For each possible longest match: (first play rank, tags, outcomes, first bucket rank, all keywords hit).
+    matches = {}
+    for word in keywords:
+        hit = frozenset(k for k in keywords if word.startswith(k))
+        matches[word] = (
+            min((i for i, keys in enumerate(plays) if not hit.isdisjoint(keys)), default=_NO_RANK),
+            frozenset(tag for tag, keys in TAG_KEYWORDS.items() if not hit.isdisjoint(keys)),
+            frozenset(outcome for key, outcome in OUTCOME_MAP.items() if key in hit) | ({"meeting completed"} if "meeting" in hit else set()),
+            min((i for i, keys in enumerate(buckets) if not hit.isdisjoint(keys)), default=_NO_RANK),
+            hit,
+        )
+    scanner = re.compile(f"(?=({_trie_pattern(keywords)}))")
+    followup = re.compile("|".join(f"(?:{p})" for p in FOLLOWUP_PATTERNS))
+    return scanner, matches, followup
+
+
+_NO_RANK = 1 << 30
+_SCANNER, _MATCHES, _FOLLOWUP_RE = _compile_classifier()
+_MAX_LEN = max(map(len, _MATCHES))
+_PLAY_NAMES, _BUCKET_NAMES = list(PLAY_KEYWORDS), list(INTENTION_KEYWORDS)
+# Fingerprint of every table above; stored on entries so stale classifications can be found.
+RULES_VERSION = hashlib.sha1(
+    json.dumps([PLAY_KEYWORDS, TAG_KEYWORDS, OUTCOME_MAP, INTENTION_KEYWORDS, FOLLOWUP_PATTERNS, TEXT_FLAGS]).encode()
+).hexdigest()[:12]
+
+
+def classify(raw: str, entry_type: str = "note", base_date: date | None = None) -> dict:
+    t = _text(raw)
+    play_rank = bucket_rank = _NO_RANK
+    tags: set[str] = set()
+    outcomes: set[str] = set()
+    words: set[str] = set()
+    for match in set(_SCANNER.findall(t)):
+        play, match_tags, match_outcomes, bucket, hit = _MATCHES[match]
+        play_rank, bucket_rank = min(play_rank, play), min(bucket_rank, bucket)
+        tags |= match_tags
+        outcomes |= match_outcomes
+        words |= hit
+    note_words = set(words)
+    # Intention keywords are matched against "<entry_type> <note>"; only matches
+    # starting in the head need a second look, and they cannot reach past _MAX_LEN.
+    for match in _SCANNER.findall(f"{entry_type} {t[:_MAX_LEN]}"):
+        bucket_rank = min(bucket_rank, _MATCHES[match][3])
+        words |= _MATCHES[match][4]
+
+    play = _PLAY_NAMES[play_rank] if play_rank != _NO_RANK else "Other"
+    if bucket_rank != _NO_RANK:
+        bucket = _BUCKET_NAMES[bucket_rank]
+    else:
+        bucket = "D" if "cadence" in words or "weekly" in words else "A"
+
+    followups = []
+    if _FOLLOWUP_RE.search(t):
+        due = base_date or date.today()
+        if "friday" in note_words:
+            days_ahead = (4 - due.weekday()) % 7
+            due = due + timedelta(days=days_ahead or 7)
+        m = _DATE_RE.search(t)
+        if m:
+            due = datetime.strptime(m.group(1), "%Y-%m-%d").date()
+        followups.append({"title": raw[:80], "due_date": due.isoformat(), "status": "open"})
+
+    return {
+        "play": play,
+        "tags": sorted(tags),
+        "outcomes": sorted(outcomes)[:5],
+        "intention_bucket": bucket,
+        "followups": followups,
+    }
+
+
+def classify_many(items: Iterable[tuple[str, str]], base_date: date | None = None) -> list[dict]:
+    base_date = base_date or date.today()
+    return [classify(raw, entry_type, base_date) for raw, entry_type in items]
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import base64
+import json
+import re
+
+from sqlalchemy import Date, DateTime, text
+from sqlmodel import Session
+
+from .models import PlayEnum
+
+# External-content FTS5 indexes over entries and deals, kept in sync by triggers.
+_FTS_DDL = {
+    "entries_fts": [
+        "CREATE VIRTUAL TABLE entries_fts USING fts5(title, raw_note, tags, content='entries', content_rowid='id', prefix='2 3')",
+        "INSERT INTO entries_fts(entries_fts, rank) VALUES('rank', 'bm25(4.0, 1.0, 2.0)')",
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_ai AFTER INSERT ON entries BEGIN
+            INSERT INTO entries_fts(rowid, title, raw_note, tags) VALUES (new.id, new.title, new.raw_note, new.tags);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_ad AFTER DELETE ON entries BEGIN
+            INSERT INTO entries_fts(entries_fts, rowid, title, raw_note, tags) VALUES ('delete', old.id, old.title, old.raw_note, old.tags);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS entries_fts_au AFTER UPDATE OF title, raw_note, tags ON entries BEGIN
+            INSERT INTO entries_fts(entries_fts, rowid, title, raw_note, tags) VALUES ('delete', old.id, old.title, old.raw_note, old.tags);
+            INSERT INTO entries_fts(rowid, title, raw_note, tags) VALUES (new.id, new.title, new.raw_note, new.tags);
+        END""",
+        "INSERT INTO entries_fts(entries_fts) VALUES('rebuild')",
+    ],
+    "deals_fts": [
+        "CREATE VIRTUAL TABLE deals_fts USING fts5(name, content='deals', content_rowid='id', prefix='2 3')",
+        """CREATE TRIGGER IF NOT EXISTS deals_fts_ai AFTER INSERT ON deals BEGIN
+            INSERT INTO deals_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS deals_fts_ad AFTER DELETE ON deals BEGIN
+            INSERT INTO deals_fts(deals_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS deals_fts_au AFTER UPDATE OF name ON deals BEGIN
+            INSERT INTO deals_fts(deals_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO deals_fts(rowid, name) VALUES (new.id, new.name);
+        END""",
+        "INSERT INTO deals_fts(deals_fts) VALUES('rebuild')",
+    ],
+}
+
+
+def ensure_search_index(conn) -> None:
+    # Creates and backfills the indexes the first time only; triggers keep them current afterwards.
+    existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, statements in _FTS_DDL.items():
+        if table not in existing:
+            for statement in statements:
+                conn.exec_driver_sql(statement)
+
+
+def fts_query(q: str) -> str:
+    # Quote every term so user input can't inject FTS syntax; the last term matches as a prefix.
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return ""
+    return " ".join(f'"{t}"' for t in terms[:-1]) + (" " if len(terms) > 1 else "") + f'"{terms[-1]}"*'
+
+
+def _encode_cursor(floor: int, ceiling: int, rank: float | None, row_id: int | None) -> str:
+    return base64.urlsafe_b64encode(json.dumps([floor, ceiling, rank, row_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[int, int, float | None, int | None]:
+    try:
+        floor, ceiling, rank, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(floor), int(ceiling), None if rank is None else float(rank), None if row_id is None else int(row_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+# bm25 has to be computed for every candidate, so matches are ranked in windows of RANK_WINDOW
+# by recency: the newest window first, then the next older one once it is used up. FTS5 can walk
+# matches by descending rowid and push a rowid range into the ranked query, which keeps a
+# keystroke bounded however large the table gets. The window travels in the cursor so later
+# pages rank the same set.
+RANK_WINDOW = 2000
+_NO_CEILING = 2**63 - 1
+
+_ENTRY_HITS = text(
+    """
+    SELECT e.id, e.timestamp, e.type, e.play, e.account_id, e.deal_id, entries_fts.rank AS rank,
+           highlight(entries_fts, 0, '<mark>', '</mark>') AS title,
+           snippet(entries_fts, 1, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM entries_fts JOIN entries e ON e.id = entries_fts.rowid
+    WHERE entries_fts MATCH :match AND entries_fts.rowid >= :floor AND entries_fts.rowid <= :ceiling
+      AND (:rank IS NULL OR entries_fts.rank > :rank OR (entries_fts.rank = :rank AND entries_fts.rowid > :after_id))
+    ORDER BY entries_fts.rank, entries_fts.rowid
+    LIMIT :limit
+    """
+).columns(timestamp=DateTime)
+
+
+def _window_floor(session: Session, match: str, ceiling: int) -> int:
+    # Lowest rowid among the RANK_WINDOW newest matches at or below ceiling; 0 when fewer remain.
+    return session.execute(
+        text("SELECT rowid FROM entries_fts WHERE entries_fts MATCH :match AND rowid <= :ceiling ORDER BY rowid DESC LIMIT 1 OFFSET :offset"),
+        {"match": match, "ceiling": ceiling, "offset": RANK_WINDOW - 1},
+    ).scalar() or 0
+
+
+def search_entries(session: Session, q: str, limit: int = 20, cursor: str | None = None) -> tuple[list[dict], str | None]:
+    match = fts_query(q)
+    if not match:
+        return [], None
+    if cursor:
+        floor, ceiling, rank, after_id = _decode_cursor(cursor)
+    else:
+        ceiling, rank, after_id = _NO_CEILING, None, None
+        floor = _window_floor(session, match, ceiling)
+
+    # Fetch one row past the page, moving on to older windows while the current one runs out.
+    hits: list[tuple] = []
+    while True:
+        params = {"match": match, "floor": floor, "ceiling": ceiling, "rank": rank, "after_id": after_id, "limit": limit + 1 - len(hits)}
+        hits += [(row, floor, ceiling) for row in session.execute(_ENTRY_HITS, params).all()]
+        if len(hits) > limit or floor == 0:
+            break
+        ceiling, rank, after_id = floor - 1, None, None
+        floor = _window_floor(session, match, ceiling)
+
+    page = [row for row, _, _ in hits[:limit]]
+    results = [
+        {
+            "id": r.id,
+            "timestamp": r.timestamp,
+            "type": r.type,
+            "title": r.title,
+            "snippet": r.snippet,
+            "play": PlayEnum[r.play].value if r.play in PlayEnum.__members__ else r.play,
+            "account_id": r.account_id,
+            "deal_id": r.deal_id,
+        }
+        for r in page
+    ]
+    next_cursor = None
+    if len(hits) > limit:
+        # Resume inside the window of the first row not returned: after the last returned row if it
+        # is in the same window, otherwise from the top of that window.
+        last, last_floor, _ = hits[limit - 1]
+        _, floor, ceiling = hits[limit]
+        next_cursor = _encode_cursor(floor, ceiling, last.rank, last.id) if last_floor == floor else _encode_cursor(floor, ceiling, None, None)
+    return results, next_cursor
+
+
+def search_deals(session: Session, q: str, limit: int = 10) -> list[dict]:
+    match = fts_query(q)
+    if not match:
+        return []
+    rows = session.execute(
+        text(
+            """
+            SELECT d.id, d.account_id, d.stage, d.next_step, d.next_step_date,
+                   highlight(deals_fts, 0, '<mark>', '</mark>') AS name
+            FROM deals_fts JOIN deals d ON d.id = deals_fts.rowid
+            WHERE deals_fts MATCH :match
+            ORDER BY deals_fts.rank
+            LIMIT :limit
+            """
+        ).columns(next_step_date=Date),
+        {"match": match, "limit": limit},
+    ).all()
+    return [dict(r._mapping) for r in rows]
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from .models import Account, Asset, Deal, Entry, FollowUp, MonthlySnapshot, WeeklySnapshot
+
+# Change log for offline clients. Triggers record every insert/update/delete in the same
+# transaction as the write; INSERT OR REPLACE keeps only the latest change per row, so the log
+# stays about the size of the synced tables plus recent deletes. Deletes older than the retention
+# window are compacted away, and clients that last synced before that must do a full resync.
+# Writes are serialized through the single writer connection, so seq order is commit order.
+SYNC_MODELS = {
+    "accounts": Account,
+    "entries": Entry,
+    "deals": Deal,
+    "followups": FollowUp,
+    "assets": Asset,
+    "snapshots_weekly": WeeklySnapshot,
+    "snapshots_monthly": MonthlySnapshot,
+}
+SYNC_TABLES = tuple(SYNC_MODELS)
+RETENTION_DAYS = 30
+# Bookkeeping columns whose updates alone are not a change clients need (reclassify stamps
+# rules_version on every entry it checked, changed or not).
+UNSYNCED_COLUMNS = {"entries": {"rules_version"}}
+
+_LOG = "INSERT OR REPLACE INTO changes (table_name, row_id, op, changed_at) VALUES ('{table}', {row}.id, '{op}', strftime('%Y-%m-%d %H:%M:%f', 'now'));"
+
+_DDL = [
+    """CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        op TEXT NOT NULL,
+        changed_at TEXT NOT NULL,
+        UNIQUE (table_name, row_id)
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_changes_op_changed_at ON changes (op, changed_at)",
+    "CREATE TABLE IF NOT EXISTS sync_state (id INTEGER PRIMARY KEY CHECK (id = 1), compacted_through INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO sync_state (id, compacted_through) VALUES (1, 0)",
+]
+for _table, _model in SYNC_MODELS.items():
+    _columns = ", ".join(c.name for c in _model.__table__.columns if c.name not in UNSYNCED_COLUMNS.get(_table, ()))
+    _DDL += [
+        f"CREATE TRIGGER IF NOT EXISTS changes_{_table}_ai AFTER INSERT ON {_table} BEGIN {_LOG.format(table=_table, row='new', op='upsert')} END",
+        # Recreated rather than kept, so the column list follows the models.
+        f"DROP TRIGGER IF EXISTS changes_{_table}_au",
+        f"CREATE TRIGGER changes_{_table}_au AFTER UPDATE OF {_columns} ON {_table} BEGIN {_LOG.format(table=_table, row='new', op='upsert')} END",
+        f"CREATE TRIGGER IF NOT EXISTS changes_{_table}_ad AFTER DELETE ON {_table} BEGIN {_LOG.format(table=_table, row='old', op='delete')} END",
+        # Rows that predate the log are recorded once so a client syncing from 0 gets everything.
+        f"INSERT OR IGNORE INTO changes (table_name, row_id, op, changed_at) SELECT '{_table}', id, 'upsert', strftime('%Y-%m-%d %H:%M:%f', 'now') FROM {_table}",
+    ]
+
+
+def ensure_change_log(conn) -> None:
+    for statement in _DDL:
+        conn.exec_driver_sql(statement)
+
+
+class ResyncRequired(Exception):
+    pass
+
+
+def changes_since(session: Session, since: int = 0, limit: int = 500) -> dict:
+    compacted_through = session.execute(text("SELECT compacted_through FROM sync_state")).scalar() or 0
+    if 0 < since < compacted_through:
+        raise ResyncRequired(f"Changes before {compacted_through} were compacted; resync from 0")
+    rows = session.execute(
+        text("SELECT seq, table_name, row_id, op FROM changes WHERE seq > :since ORDER BY seq LIMIT :limit"),
+        {"since": since, "limit": limit + 1},
+    ).all()
+    batch = rows[:limit]
+
+    upserts: dict[str, list[int]] = {}
+    deletes: dict[str, list[int]] = {}
+    for _, table, row_id, op in batch:
+        (upserts if op == "upsert" else deletes).setdefault(table, []).append(row_id)
+
+    changes = {}
+    for table in SYNC_TABLES:
+        if table not in upserts and table not in deletes:
+            continue
+        model = SYNC_MODELS[table]
+        ids = upserts.get(table, [])
+        current = session.exec(select(model).where(model.id.in_(ids)).order_by(model.id)).all() if ids else []
+        changes[table] = {"upserted": jsonable_encoder([row.model_dump() for row in current]), "deleted": deletes.get(table, [])}
+
+    cursor = batch[-1][0] if batch else max(since, compacted_through)
+    return {"changes": changes, "cursor": cursor, "has_more": len(rows) > limit}
+
+
+def compact_changes(conn, retention_days: int = RETENTION_DAYS) -> dict:
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+    through = conn.execute(text("SELECT max(seq) FROM changes WHERE op = 'delete' AND changed_at < :cutoff"), {"cutoff": cutoff}).scalar()
+    removed = 0
+    if through:
+        removed = conn.execute(text("DELETE FROM changes WHERE op = 'delete' AND seq <= :through"), {"through": through}).rowcount
+        conn.execute(text("UPDATE sync_state SET compacted_through = max(compacted_through, :through)"), {"through": through})
+    return {"removed": removed, "compacted_through": conn.execute(text("SELECT compacted_through FROM sync_state")).scalar()}
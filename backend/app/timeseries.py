@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy import text
+from sqlmodel import Session
+
+from .models import PlayEnum
+from .reporting import week_start_for
+
+# Dense per-period series binned with NumPy. Entry totals come from daily_rollups (kept summed per
+# day, play, type, account and deal by triggers) rather than from entries, so the work scales with
+# distinct rollup keys. Follow-up and cadence definitions match _collect_metrics.
+GRANULARITIES = ("day", "week", "month")
+DIMENSIONS = ("play", "type", "account_id", "deal_id")
+MAX_PERIODS = 3660
+
+
+def period_starts(granularity: str, start: date, end: date) -> np.ndarray:
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity}")
+    if end < start:
+        raise ValueError("end must not be before start")
+    if granularity == "day":
+        starts = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    elif granularity == "week":
+        starts = np.arange(np.datetime64(week_start_for(start), "D"), np.datetime64(end, "D") + 1, 7)
+    else:
+        starts = np.arange(np.datetime64(start, "M"), np.datetime64(end, "M") + 1).astype("datetime64[D]")
+    if len(starts) > MAX_PERIODS:
+        raise ValueError(f"Too many periods ({len(starts)}); use a coarser granularity")
+    return starts
+
+
+def _period_end(granularity: str, last_start: np.datetime64) -> np.datetime64:
+    if granularity == "month":
+        return (last_start.astype("datetime64[M]") + 1).astype("datetime64[D]") - 1
+    return last_start + (6 if granularity == "week" else 0)
+
+
+def _bin(days: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    return np.searchsorted(starts, days, side="right") - 1
+
+
+def _days(values: list) -> np.ndarray:
+    return np.array(values, dtype="datetime64[D]") if values else np.empty(0, dtype="datetime64[D]")
+
+
+def metric_timeseries(session: Session, granularity: str, start: date, end: date, dims: list[str]) -> dict:
+    dims = list(dict.fromkeys(dims))
+    unknown = [d for d in dims if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown dims: {', '.join(unknown)}")
+    starts = period_starts(granularity, start, end)
+    n = len(starts)
+    lo, hi = str(starts[0]), str(_period_end(granularity, starts[-1]))
+
+    # Summed per day in SQL (a covering-index scan), then binned into periods here.
+    columns = ", ".join(dims)
+    rows = session.execute(
+        text(f"SELECT day, {columns + ', ' if dims else ''}sum(entries), sum(minutes) FROM daily_rollups WHERE day >= :lo AND day <= :hi GROUP BY day{', ' + columns if dims else ''}"),
+        {"lo": lo, "hi": hi},
+    ).all()
+    data = list(zip(*rows)) if rows else [[] for _ in range(len(dims) + 3)]
+    period = _bin(_days(list(data[0])), starts)
+    entries = np.array(data[-2], dtype=np.int64)
+    minutes = np.array(data[-1], dtype=np.float64)
+
+    # One combined code per (dim values) tuple, then a single bincount over (period, code).
+    codes = np.zeros(len(rows), dtype=np.int64)
+    labels: list[np.ndarray] = []
+    for values in data[1 : len(dims) + 1]:
+        uniques, inverse = np.unique(np.array(values), return_inverse=True)
+        codes = codes * len(uniques) + inverse
+        labels.append(uniques)
+    keys, combo = np.unique(codes, return_inverse=True)
+    width = max(len(keys), 1)
+    flat = period * width + combo
+    entry_grid = np.bincount(flat, weights=entries, minlength=n * width).reshape(n, width)
+    minute_grid = np.bincount(flat, weights=minutes, minlength=n * width).reshape(n, width)
+
+    series = []
+    for column, key in enumerate(keys):
+        parts = {}
+        for dim, uniques in reversed(list(zip(dims, labels))):
+            key, index = divmod(key, len(uniques))
+            label = uniques[index].item()
+            parts[dim] = PlayEnum[label].value if dim == "play" else label
+        series.append(
+            {
+                "key": {dim: parts[dim] for dim in dims},
+                "entries": entry_grid[:, column].astype(np.int64).tolist(),
+                "hours": np.round(minute_grid[:, column] / 60.0, 2).tolist(),
+            }
+        )
+
+    pairs = session.execute(
+        text("SELECT DISTINCT day, account_id FROM daily_rollups WHERE day >= :lo AND day <= :hi AND account_id != 0"), {"lo": lo, "hi": hi}
+    ).all()
+    days, account_ids = (list(c) for c in zip(*pairs)) if pairs else ([], [])
+    account_ids = np.array(account_ids, dtype=np.int64)
+    span = int(account_ids.max(initial=0)) + 1
+    touched = np.unique(_bin(_days(days), starts) * span + account_ids)
+    accounts = np.bincount(touched // span, minlength=n)
+
+    followups = session.execute(text("SELECT due_date, status FROM followups WHERE due_date >= :lo AND due_date <= :hi"), {"lo": lo, "hi": hi}).all()
+    due = _bin(_days([f[0] for f in followups]), starts)
+    created = np.bincount(due, minlength=n)
+    closed = np.bincount(due, weights=np.array([f[1] == "done" for f in followups], dtype=np.float64), minlength=n).astype(np.int64)
+
+    routines = session.execute(text("SELECT last_completed_date FROM routines WHERE is_active = 1")).scalars().all()
+    completed_days = _days([d for d in routines if d])
+    completed_days = completed_days[(completed_days >= np.datetime64(lo)) & (completed_days <= np.datetime64(hi))]
+    completed = np.bincount(_bin(completed_days, starts), minlength=n)
+
+    return {
+        "granularity": granularity,
+        "periods": [str(s) for s in starts],
+        "dims": dims,
+        "series": series,
+        "totals": {
+            "entries": entry_grid.sum(axis=1).astype(np.int64).tolist(),
+            "hours": np.round(minute_grid.sum(axis=1) / 60.0, 2).tolist(),
+            "accounts_touched": accounts.tolist(),
+            "followups_created": created.tolist(),
+            "followups_closed": closed.tolist(),
+            "followup_closure_rate": np.round(closed / np.maximum(created, 1), 2).tolist(),
+            "cadence_completion_rate": np.round(completed / max(len(routines), 1), 2).tolist(),
+        },
+    }
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import itertools
+import re
+import sqlite3
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+# Per-table data versions. Every committed transaction that ran INSERT/UPDATE/DELETE against a
+# table stamps it with the next value of one process-wide sequence, so data_version(*tables) is a
+# single monotonic number that changes whenever any of those tables did.
+#
+# Writes from another process (e.g. the CLI) are caught by PRAGMA data_version once the server's
+# writer engine is watched: a monitor connection reports any commit, and a commit the process did
+# not make itself bumps every table. In-process commits resample the monitor as they return their
+# connection; an outside commit landing in that short window is still caught when the writer next
+# begins, since its own PRAGMA data_version moves only for other connections' commits.
+
+_DML = re.compile(r"\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+[\"`]?(\w+)", re.IGNORECASE)
+_sequence = itertools.count(1)
+_versions: dict[str, int] = {}
+_lock = threading.Lock()
+_external = 0
+_monitor: sqlite3.Connection | None = None
+_monitor_seen = None
+
+
+def bump(*tables: str) -> int:
+    with _lock:
+        version = next(_sequence)
+        for table in tables:
+            _versions[table] = version
+    return version
+
+
+def _bump_external() -> None:
+    global _external
+    with _lock:
+        _external = next(_sequence)
+
+
+def _poll_monitor(absorb: bool = False) -> None:
+    # absorb: the change is this process's own commit, already bumped per table.
+    global _monitor_seen
+    with _lock:
+        if _monitor is None:
+            return
+        value = _monitor.execute("PRAGMA data_version").fetchone()[0]
+        changed, _monitor_seen = value != _monitor_seen, value
+    if changed and not absorb:
+        _bump_external()
+
+
+def watch(engine) -> None:
+    # Starts noticing commits by other processes on engine's database file; None stops.
+    global _monitor, _monitor_seen
+    path = engine.url.database if engine is not None else None
+    monitor = sqlite3.connect(path, check_same_thread=False) if path and path != ":memory:" else None
+    with _lock:
+        previous, _monitor, _monitor_seen = _monitor, monitor, None
+    if previous is not None:
+        previous.close()
+    if monitor is not None:
+        _poll_monitor(absorb=True)
+        if not event.contains(engine, "begin", _check_writer):
+            event.listen(engine, "begin", _check_writer)
+
+
+def _check_writer(conn) -> None:
+    value = conn.exec_driver_sql("PRAGMA data_version").scalar()
+    seen, conn.info["data_version"] = conn.info.get("data_version"), value
+    if seen is not None and value != seen:
+        _bump_external()
+
+
+def data_version(*tables: str) -> int:
+    _poll_monitor()
+    return max([_external, *(_versions.get(t, 0) for t in tables)])
+
+
+def latest_version() -> int:
+    _poll_monitor()
+    return max([_external, *_versions.values()])
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _track_writes(conn, cursor, statement, parameters, context, executemany):
+    match = _DML.match(statement)
+    if match:
+        conn.info.setdefault("written_tables", set()).add(match.group(1))
+
+
+@event.listens_for(Engine, "commit")
+def _bump_on_commit(conn):
+    # This fires just before the DBAPI commit, so a reader could still snapshot the old data under
+    # the new version; bumping again when the connection returns to the pool closes that window.
+    tables = conn.info.pop("written_tables", None)
+    if tables:
+        bump(*tables)
+        conn.info["committed_tables"] = tables
+
+
+@event.listens_for(Pool, "checkin")
+def _bump_after_commit(dbapi_conn, record):
+    tables = record.info.pop("committed_tables", None) if record is not None else None
+    if tables:
+        bump(*tables)
+        _poll_monitor(absorb=True)
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_on_rollback(conn):
+    conn.info.pop("written_tables", None)
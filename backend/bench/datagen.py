@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, text
+from sqlmodel import Session
+
+from app.database import create_engines, init_db
+from app.ingest import ingest_entries
+from app.models import Account, Asset, Deal, Routine
+from app.rules import INTENTION_KEYWORDS, OUTCOME_MAP, PLAY_KEYWORDS, TAG_KEYWORDS
+
+# Seeded synthetic worklog at realistic scale. Notes are assembled from the keyword tables in
+# app.rules, so classification, tags, outcomes, follow-ups and keyword flags come out with a
+# plausible spread, and entries go through app.ingest like a bulk import would. The same seed,
+# size and end date always produce the same database.
+#
+#   python -m bench.datagen --entries 100000 --db /tmp/worklog-100k.db
+INDUSTRIES = ["Retail", "Healthcare", "Finance", "Manufacturing", "Media", "Public Sector", "Telco", "Energy"]
+SEGMENTS = ["Enterprise", "Mid", "Strategic", "Startup"]
+STAGES = ["Discovery", "Qualification", "Proposal", "Negotiation", "Closed Won", "Closed Lost"]
+ENTRY_TYPES = ["note", "meeting", "call", "email", "learning"]
+ENTRY_TYPE_WEIGHTS = [35, 30, 15, 15, 5]
+DURATIONS = [15, 15, 30, 30, 30, 45, 60, 90]
+STAKEHOLDERS = ["CTO", "VP Eng", "Platform lead", "Procurement", "CFO", "Data lead", "Security", "AE", "SE", "Partner"]
+ASSET_TYPES = ["deck", "one-pager", "datasheet", "talk track", "checklist", "demo script"]
+ROUTINES = [
+    ("pipeline pod", "weekly", "Tue"),
+    ("co-sell touchpoint", "weekly", "Thu"),
+    ("learning block", "weekly", "Fri"),
+    ("enablement", "twice-monthly", "1st & 3rd Wed"),
+    ("win story", "quarterly", "last week"),
+]
+NAME_PARTS = ["North", "Blue", "Iron", "Bright", "Summit", "Harbor", "Cedar", "Apex", "Vector", "Silver", "Prairie", "Atlas"]
+NAME_SUFFIXES = ["Retail", "Health", "Bank", "Systems", "Foods", "Logistics", "Energy", "Media", "Labs", "Motors"]
+FILLER = [
+    "Went through the current state and open questions.",
+    "They want numbers before the next steering meeting.",
+    "Team is stretched this quarter.",
+    "Budget cycle closes at the end of the month.",
+    "Good energy in the room.",
+    "Need to tighten the story for execs.",
+    "Reviewed last week's action items.",
+    "Mostly status, nothing new.",
+]
+FOLLOWUP_PHRASES = ["follow up by friday", "send recap by monday", "waiting on procurement", "need from them the usage export", "follow up next week"]
+
+_PLAY_WORDS = [k for keys in PLAY_KEYWORDS.values() for k in keys]
+_TAG_WORDS = [k for keys in TAG_KEYWORDS.values() for k in keys]
+_INTENT_WORDS = [k for keys in INTENTION_KEYWORDS.values() for k in keys]
+_OUTCOME_WORDS = list(OUTCOME_MAP)
+
+
+def note(rng: random.Random, base_date: date | None = None, sentences: int | None = None) -> str:
+    # Mostly short captures, some paragraph-length, a few pasted meeting notes.
+    if sentences is None:
+        roll = rng.random()
+        sentences = rng.randint(1, 2) if roll < 0.6 else rng.randint(3, 8) if roll < 0.97 else rng.randint(15, 40)
+    parts = [f"{rng.choice(['Discussed', 'Reviewed', 'Worked on', 'Prepped', 'Ran'])} {rng.choice(_PLAY_WORDS)} {rng.choice(['plan', 'roadmap', 'options', 'next steps', 'sizing'])} with {rng.choice(STAKEHOLDERS)}"]
+    for _ in range(sentences - 1):
+        roll = rng.random()
+        if roll < 0.3:
+            parts.append(f"{rng.choice(_TAG_WORDS)} {rng.choice(['came up', 'agreed', 'in progress', 'drafted'])}")
+        elif roll < 0.5:
+            parts.append(f"{rng.choice(_OUTCOME_WORDS)} {rng.choice(['today', 'for the account', 'shared'])}")
+        elif roll < 0.65:
+            parts.append(f"{rng.choice(_INTENT_WORDS)} {rng.choice(['focus', 'angle', 'track'])}")
+        elif roll < 0.75:
+            parts.append(f"{rng.choice(_PLAY_WORDS)} and {rng.choice(_PLAY_WORDS)} both in scope")
+        else:
+            parts.append(rng.choice(FILLER).rstrip("."))
+    if rng.random() < 0.05:
+        parts.append("blocker flagged on access")
+    if rng.random() < 0.15:
+        parts.append(rng.choice(FOLLOWUP_PHRASES) if base_date is None or rng.random() < 0.7 else f"send deck by {base_date + timedelta(days=rng.randint(1, 14))}")
+    return ". ".join(parts) + "."
+
+
+def _accounts(rng: random.Random, count: int) -> list[dict]:
+    return [
+        {"name": f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_SUFFIXES)} {i + 1}", "industry": rng.choice(INDUSTRIES), "segment": rng.choice(SEGMENTS), "notes": ""}
+        for i in range(count)
+    ]
+
+
+def _deals(rng: random.Random, accounts: int, end: date) -> list[dict]:
+    rows = []
+    for account_id in range(1, accounts + 1):
+        for _ in range(rng.choice([0, 1, 1, 2, 3, 5])):
+            play = rng.choice(list(PLAY_KEYWORDS))
+            value = rng.randrange(50, 2000) * 1000
+            rows.append(
+                {
+                    "account_id": account_id,
+                    "name": f"{play} {rng.choice(['Migration', 'Pilot', 'Expansion', 'Foundation', 'Renewal'])} {len(rows) + 1}",
+                    "play_type": play,
+                    "stage": rng.choice(STAGES),
+                    "est_value": value,
+                    "est_fm": value * 0.2,
+                    "probability": rng.choice([0.1, 0.25, 0.5, 0.75, 0.9]),
+                    "next_step": rng.choice(["Workshop", "Send SOW", "Exec readout", "Sizing call", "POC kickoff"]),
+                    "next_step_date": end + timedelta(days=rng.randint(-45, 30)),
+                    "owners": rng.sample(["AE", "SE", "CE", "Partner"], k=rng.randint(1, 3)),
+                    "notes": "",
+                    "updated_at": datetime.combine(end, datetime.min.time()) - timedelta(days=rng.randint(0, 90)),
+                }
+            )
+    return rows
+
+
+def _assets(rng: random.Random, count: int, accounts: int, start: date, days: int) -> list[dict]:
+    return [
+        {
+            "date": start + timedelta(days=rng.randrange(days)),
+            "asset_type": kind,
+            "title": f"{rng.choice(_PLAY_WORDS)} {kind}",
+            "linked_account_id": rng.randint(1, accounts) if rng.random() < 0.6 else None,
+            "linked_deal_id": None,
+            "effort_min": rng.choice([30, 60, 90, 120]),
+            "notes": "",
+        }
+        for kind in (rng.choice(ASSET_TYPES) for _ in range(count))
+    ]
+
+
+def _entries(rng: random.Random, count: int, account_deals: dict[int, list[int]], accounts: int, start: datetime, span: timedelta):
+    # Chronological, so rowid order follows timestamps the way live captures do.
+    step = span / count
+    for n in range(count):
+        timestamp = start + step * n + timedelta(seconds=rng.randrange(int(step.total_seconds()) + 1))
+        if timestamp.weekday() >= 5 and rng.random() < 0.8:
+            timestamp -= timedelta(days=timestamp.weekday() - 4)
+        account_id = rng.randint(1, accounts) if rng.random() < 0.8 else None
+        deals = account_deals.get(account_id, [])
+        raw = note(rng, timestamp.date())
+        yield (
+            n,
+            {
+                "timestamp": timestamp,
+                "type": rng.choices(ENTRY_TYPES, ENTRY_TYPE_WEIGHTS)[0],
+                "title": raw.split(".")[0][:60],
+                "raw_note": raw,
+                "account_id": account_id,
+                "deal_id": rng.choice(deals) if deals and rng.random() < 0.6 else None,
+                "duration_min": rng.choice(DURATIONS),
+                "stakeholders": rng.sample(STAKEHOLDERS, k=rng.randint(0, 2)),
+            },
+        )
+
+
+def generate(path: Path, entries: int, seed: int = 1, days: int = 365, end: date | None = None, chunk_size: int = 5000, progress=None) -> dict:
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+    accounts = max(10, entries // 500)
+    writer, reader = create_engines(path)
+    try:
+        init_db(writer)
+        deals = _deals(rng, accounts, end)
+        with writer.begin() as conn:
+            conn.execute(insert(Account.__table__), _accounts(rng, accounts))
+            conn.execute(insert(Deal.__table__), deals)
+            conn.execute(insert(Asset.__table__), _assets(rng, max(1, entries // 100), accounts, start, days))
+            conn.execute(
+                insert(Routine.__table__),
+                [{"routine_type": t, "frequency": f, "default_day": d, "last_completed_date": end - timedelta(days=rng.randint(0, 40)), "is_active": True} for t, f, d in ROUTINES],
+            )
+        account_deals: dict[int, list[int]] = {}
+        for deal_id, deal in enumerate(deals, start=1):
+            account_deals.setdefault(deal["account_id"], []).append(deal_id)
+
+        rows = _entries(rng, entries, account_deals, accounts, datetime.combine(start, datetime.min.time()), timedelta(days=days))
+        with Session(writer) as session:
+            done = 0
+            while chunk := [row for _, row in zip(range(chunk_size), rows)]:
+                _, errors = ingest_entries(session, chunk, chunk_size=chunk_size)
+                if errors:
+                    raise RuntimeError(f"ingest failed: {errors[0]}")
+                done += len(chunk)
+                if progress:
+                    progress(done, entries)
+
+        with writer.begin() as conn:
+            # Close most follow-ups that fell due well before the end date (deterministic, no RNG).
+            conn.execute(
+                text("UPDATE followups SET status = 'done' WHERE due_date < :cutoff AND (id * 2654435761) % 10 < 7"),
+                {"cutoff": end - timedelta(days=7)},
+            )
+            counts = {table: conn.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in ("accounts", "deals", "entries", "followups", "assets", "routines")}
+    finally:
+        writer.dispose()
+        reader.dispose()
+    return {"seed": seed, "start": start.isoformat(), "end": end.isoformat(), **counts}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=10000, help="10k to 2M")
+    parser.add_argument("--db", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day of data (default: today)")
+    args = parser.parse_args()
+    if args.db.exists():
+        parser.error(f"{args.db} already exists")
+
+    began = time.perf_counter()
+
+    def progress(done: int, total: int) -> None:
+        print(f"\r{done}/{total} entries, {time.perf_counter() - began:.0f}s", end="", file=sys.stderr)
+
+    summary = generate(args.db, args.entries, args.seed, args.days, args.end, progress=progress)
+    print(file=sys.stderr)
+    print({**summary, "seconds": round(time.perf_counter() - began, 1)})
+
+
+if __name__ == "__main__":
+    main()
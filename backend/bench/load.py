@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlmodel import Session
+
+from app.database import create_engines, get_read_session, get_write_session
+from app.main import app, profiler
+
+from .datagen import STAKEHOLDERS, generate, note
+
+# Closed-loop HTTP load against the ASGI app over httpx, on a copy of a generated database (see
+# bench.datagen), so runs never change their input. Each client picks the next request from the
+# profile's weighted mix as soon as the previous one returns. Results are JSON with the commit they
+# ran on, so runs can be diffed across commits.
+#
+#   python -m bench.datagen --entries 200000 --db /tmp/worklog-200k.db
+#   python -m bench.load --db /tmp/worklog-200k.db --profile report-heavy --clients 20 --duration 30 --out report.json
+
+
+def _capture(rng: random.Random, ctx: dict) -> tuple:
+    body = {
+        "type": rng.choice(["note", "meeting", "call"]),
+        "title": "Load test capture",
+        "raw_note": note(rng, date.today()),
+        "account_id": rng.randint(1, ctx["accounts"]),
+        "duration_min": rng.choice([15, 30, 60]),
+        "stakeholders": rng.sample(STAKEHOLDERS, k=rng.randint(0, 2)),
+    }
+    return "POST", "/api/entries", {"json": body}
+
+
+def _bulk(rng: random.Random, ctx: dict) -> tuple:
+    rows = [json.dumps({"type": "note", "title": "Load test import", "raw_note": note(rng), "account_id": rng.randint(1, ctx["accounts"])}) for _ in range(50)]
+    return "POST", "/api/entries/bulk", {"content": "\n".join(rows)}
+
+
+def _entries(rng: random.Random, ctx: dict) -> tuple:
+    return "GET", "/api/entries", {"params": {"account_id": rng.randint(1, ctx["accounts"]), "limit": 20}}
+
+
+def _search(rng: random.Random, ctx: dict) -> tuple:
+    return "GET", "/api/search", {"params": {"q": note(rng, sentences=1).split()[1]}}
+
+
+def _timeseries(rng: random.Random, ctx: dict) -> tuple:
+    return "GET", "/api/metrics/timeseries", {"params": {"granularity": rng.choice(["week", "month"]), "dims": rng.choice(["play", "play,type", "account_id"])}}
+
+
+def _export(rng: random.Random, ctx: dict) -> tuple:
+    return "GET", f"/api/export/{rng.choice(['weekly', 'monthly'])}/md", {}
+
+
+def _get(path: str):
+    return lambda rng, ctx: ("GET", path, {})
+
+
+def _post(path: str):
+    return lambda rng, ctx: ("POST", path, {})
+
+
+# name -> [(weight, request factory)]; the factory returns (method, url, httpx request kwargs).
+PROFILES = {
+    "capture-heavy": [
+        (60, _capture),
+        (5, _bulk),
+        (15, _get("/api/home")),
+        (10, _entries),
+        (10, _search),
+    ],
+    "report-heavy": [
+        (20, _post("/api/generate/weekly")),
+        (10, _post("/api/generate/monthly")),
+        (10, _post("/api/generate/slides")),
+        (15, _export),
+        (15, _timeseries),
+        (10, _get("/api/reports/weekly")),
+        (10, _get("/api/home")),
+        (10, _capture),
+    ],
+}
+
+
+def _percentiles(latencies: list[float]) -> dict:
+    if len(latencies) < 2:
+        return {"count": len(latencies)}
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "count": len(latencies),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+async def run_load(profile: str, clients: int, ctx: dict, duration: float | None = None, requests: int | None = None, seed: int = 1) -> dict:
+    weights, factories = zip(*PROFILES[profile])
+    by_op: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    issued = 0
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def client(n: int):
+        nonlocal issued
+        rng = random.Random(seed * 1000 + n)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+            while (deadline is None or time.perf_counter() < deadline) and (requests is None or issued < requests):
+                issued += 1
+                method, url, kwargs = rng.choices(factories, weights)[0](rng, ctx)
+                began = time.perf_counter()
+                res = await http.request(method, url, **kwargs)
+                op = f"{method} {url}"
+                by_op.setdefault(op, []).append(time.perf_counter() - began)
+                if res.status_code >= 400:
+                    errors[op] = errors.get(op, 0) + 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - began
+    latencies = [t for times in by_op.values() for t in times]
+    return {
+        "profile": profile,
+        "clients": clients,
+        "seconds": round(elapsed, 2),
+        "requests": len(latencies),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "latency": _percentiles(latencies),
+        "endpoints": {op: {**_percentiles(times), "errors": errors.get(op, 0)} for op, times in sorted(by_op.items())},
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(db: Path, profile: str, clients: int, duration: float | None = None, requests: int | None = None, seed: int = 1) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "worklog.db"
+        with closing(sqlite3.connect(db)) as src, closing(sqlite3.connect(path)) as dst:
+            src.backup(dst)
+        writer, reader = create_engines(path)
+        with reader.connect() as conn:
+            ctx = {"accounts": conn.exec_driver_sql("SELECT count(*) FROM accounts").scalar(), "entries": conn.exec_driver_sql("SELECT count(*) FROM entries").scalar()}
+
+        def read_session():
+            with Session(reader) as s:
+                yield s
+
+        def write_session():
+            with Session(writer) as s:
+                yield s
+
+        app.dependency_overrides.update({get_read_session: read_session, get_write_session: write_session})
+        explain_engine, profiler.explain_engine = profiler.explain_engine, reader
+        try:
+            result = asyncio.run(run_load(profile, clients, ctx, duration, requests, seed))
+        finally:
+            app.dependency_overrides.clear()
+            profiler.explain_engine = explain_engine
+            writer.dispose()
+            reader.dispose()
+    return {
+        "commit": _commit(),
+        "run_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "db": {"path": str(db), **ctx},
+        **result,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", type=Path, help="database from bench.datagen; omit to generate one with --entries")
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="capture-heavy")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path, help="write the JSON result here as well as to stdout")
+    args = parser.parse_args()
+    # Requests over the slow threshold are expected under load; keep their log lines out of the output.
+    logging.getLogger("app.profiling").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = args.db
+        if db is None:
+            db = Path(tmp) / "generated.db"
+            print(f"generating {args.entries} entries", file=sys.stderr)
+            # Data ends yesterday so the captures made during the run are the newest rows.
+            generate(db, args.entries, args.seed, end=date.today() - timedelta(days=1))
+        result = run(db, args.profile, args.clients, duration=args.duration, seed=args.seed)
+    output = json.dumps(result, indent=2)
+    if args.out:
+        args.out.write_text(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import timeit
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy.dialects import sqlite
+from sqlmodel import Session
+
+from app.database import create_engines, schema_fingerprint
+from app.reporting import generate_monthly, generate_weekly
+from app.rules import RULES_VERSION, classify, extract_followups, infer_intention_bucket, infer_outcomes, infer_play, infer_tags
+
+from .datagen import generate, note
+
+# Microbenchmarks for the CPU hot paths: the rule functions every capture runs, over a corpus of
+# short/medium/long notes, and the report generators over prebuilt databases of several sizes.
+# Each benchmark's median is compared with bench/baseline.json, and the run fails when one is more
+# than --threshold slower. Baselines are per machine: re-record them with --update after a
+# deliberate change or on new hardware.
+#
+#   python -m bench.micro                 # compare against the baseline, exit 1 on regression
+#   python -m bench.micro --update        # record a new baseline
+BASELINE = Path(__file__).with_name("baseline.json")
+CACHE_DIR = Path(__file__).with_name(".cache")
+THRESHOLD = 0.25
+ROUNDS = 15
+ROUND_SECONDS = 0.05
+# Fixed, so the report period and the data in it are the same on every run.
+REPORT_DAY = date(2025, 6, 27)
+SIZES = (2000, 20000, 100000)
+CORPUS = {"short": (1, 300), "medium": (6, 200), "long": (30, 50)}  # sentences per note, notes
+
+
+def measure(benchmarks: dict[str, tuple], rounds: int = ROUNDS) -> dict[str, dict]:
+    # benchmarks: name -> (fn, calls per fn()). Rounds are interleaved across benchmarks, so a burst
+    # of noise from elsewhere on the machine lands on one round of each rather than all rounds of one.
+    timers = {}
+    for name, (fn, per_call) in benchmarks.items():
+        timer, number = timeit.Timer(fn), 1
+        while timer.timeit(number) < ROUND_SECONDS:
+            number *= 2
+        timers[name] = (timer, number, per_call)
+    samples: dict[str, list[float]] = {name: [] for name in timers}
+    for _ in range(rounds):
+        for name, (timer, number, per_call) in timers.items():
+            samples[name].append(timer.timeit(number) / number / per_call * 1e6)
+    return {
+        name: {"median_us": round(statistics.median(times), 3), "min_us": round(min(times), 3), "rounds": rounds, "number": timers[name][1]}
+        for name, times in samples.items()
+    }
+
+
+def corpus(seed: int = 1) -> dict[str, list[str]]:
+    rng = random.Random(seed)
+    return {name: [note(rng, REPORT_DAY, sentences) for _ in range(count)] for name, (sentences, count) in CORPUS.items()}
+
+
+def rule_benchmarks(rounds: int = ROUNDS) -> dict[str, dict]:
+    rules = {
+        "infer_play": infer_play,
+        "infer_tags": infer_tags,
+        "infer_outcomes": infer_outcomes,
+        "infer_intention_bucket": lambda raw: infer_intention_bucket(raw, "meeting"),
+        "extract_followups": lambda raw: extract_followups(raw, REPORT_DAY),
+        "classify": lambda raw: classify(raw, "meeting", REPORT_DAY),
+    }
+    benchmarks = {
+        f"rules.{name}[{length}]": (lambda fn=fn, notes=notes: [fn(raw) for raw in notes], len(notes))
+        for length, notes in corpus().items()
+        for name, fn in rules.items()
+    }
+    return measure(benchmarks, rounds)
+
+
+def prebuilt_db(entries: int, cache_dir: Path = CACHE_DIR) -> Path:
+    # Keyed by everything that changes what gets generated, so stale databases are never reused.
+    key = f"{schema_fingerprint(sqlite.dialect())[:10]}-{RULES_VERSION[:8]}"
+    path = cache_dir / f"worklog-{entries}-{REPORT_DAY.isoformat()}-{key}.db"
+    if not path.exists():
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        for stale in cache_dir.glob(f"{partial.name}*"):
+            stale.unlink()
+        generate(partial, entries, seed=1, end=REPORT_DAY)
+        partial.rename(path)
+    return path
+
+
+def report_benchmarks(sizes=SIZES, rounds: int = ROUNDS, cache_dir: Path = CACHE_DIR) -> dict[str, dict]:
+    engines, sessions, benchmarks = [], [], {}
+    try:
+        for size in sizes:
+            engines.extend(create_engines(prebuilt_db(size, cache_dir)))
+            session = Session(engines[-1])
+            sessions.append(session)
+            for name, fn in (("generate_weekly", generate_weekly), ("generate_monthly", generate_monthly)):
+                benchmarks[f"reports.{name}[{size}]"] = (lambda fn=fn, session=session: fn(session, REPORT_DAY), 1)
+        return measure(benchmarks, rounds)
+    finally:
+        for session in sessions:
+            session.close()
+        for engine in engines:
+            engine.dispose()
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float = THRESHOLD) -> list[dict]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and result["median_us"] > before["median_us"] * (1 + threshold):
+            regressions.append({"name": name, "baseline_us": before["median_us"], "median_us": result["median_us"], "ratio": round(result["median_us"] / before["median_us"], 2)})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", choices=["rules", "reports"])
+    parser.add_argument("--sizes", type=lambda s: tuple(int(n) for n in s.split(",")), default=SIZES, help="comma-separated entry counts")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed median slowdown, 0.25 = 25%%")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args()
+
+    results = {}
+    if args.only != "reports":
+        results.update(rule_benchmarks(args.rounds))
+    if args.only != "rules":
+        results.update(report_benchmarks(args.sizes, args.rounds))
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"results": {}}
+    baseline = stored["results"]
+    for name, result in results.items():
+        before = baseline.get(name, {}).get("median_us")
+        change = f"{result['median_us'] / before - 1:+.0%}" if before else "new"
+        print(f"{name:45} {result['median_us']:>12.2f} us  {change:>6}")
+
+    if args.update:
+        stored = {"machine": platform.machine(), "python": platform.python_version(), "results": {**baseline, **results}}
+        args.baseline.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['name']}: {r['baseline_us']} -> {r['median_us']} us ({r['ratio']}x)", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
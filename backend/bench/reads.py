@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlmodel import Session, SQLModel
+
+from app import database
+from app import main as server
+from app.migrations import run_migrations
+from app.models import Account, Entry
+
+# p50/p95/p99 of the read endpoints at high client concurrency, against the real app in-process over
+# httpx's ASGI transport on a seeded WAL database. Results carry the commit, so the handlers before
+# and after a change are compared by running this same script on both checkouts:
+#
+#   python -m bench.reads --clients 500 --requests 4
+#   git worktree add /tmp/before <commit> && cp bench/reads.py /tmp/before/backend/bench/
+#   (cd /tmp/before/backend && python -m bench.reads --clients 500 --requests 4)
+PATHS = ["/api/home", "/api/accounts?limit=50", "/api/entries?limit=20&facets=false", "/api/search?q=kubernetes"]
+WORDS = ["kubernetes", "gke", "vertex", "finops", "migration", "pilot", "workshop", "blocker", "sow", "demo", "cost", "latency"]
+
+
+def seed(engine, accounts: int, entries: int, rng: random.Random) -> None:
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        run_migrations(conn)
+        conn.execute(Account.__table__.insert(), [{"name": f"Account {i}"} for i in range(accounts)])
+        start = datetime.combine(date.today() - timedelta(days=90), datetime.min.time())
+        conn.execute(
+            Entry.__table__.insert(),
+            [
+                {
+                    "timestamp": start + timedelta(minutes=rng.randrange(90 * 1440)),
+                    "type": "note",
+                    "title": f"Entry {i}",
+                    "raw_note": " ".join(rng.choices(WORDS, k=12)),
+                    "account_id": rng.randrange(1, accounts + 1),
+                }
+                for i in range(entries)
+            ],
+        )
+
+
+async def load(clients: int, requests: int, seed_value: int) -> dict:
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=server.app)
+
+    async def client(n: int):
+        rng = random.Random(seed_value + n)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for _ in range(requests):
+                began = time.perf_counter()
+                res = await http.get(rng.choice(PATHS))
+                latencies.append(time.perf_counter() - began)
+                res.raise_for_status()
+
+    began = time.perf_counter()
+    await asyncio.gather(*(client(n) for n in range(clients)))
+    elapsed = time.perf_counter() - began
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 1),
+        "p95_ms": round(cuts[94] * 1000, 1),
+        "p99_ms": round(cuts[98] * 1000, 1),
+    }
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--accounts", type=int, default=200)
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Requests over the slow threshold are expected at this concurrency; keep their log lines out of the output.
+    logging.getLogger("app.profiling").setLevel(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "worklog.db"
+        writer, reader = database.create_engines(path)
+        seed(writer, args.accounts, args.entries, random.Random(args.seed))
+
+        def read_session():
+            with Session(reader) as s:
+                yield s
+
+        def write_session():
+            with Session(writer) as s:
+                yield s
+
+        overrides = {database.get_read_session: read_session, database.get_write_session: write_session}
+        # Checkouts that served reads from an aiosqlite engine also need that session overridden.
+        async_reader = None
+        if hasattr(database, "get_async_read_session"):
+            from sqlmodel.ext.asyncio.session import AsyncSession
+
+            async_reader = database.create_async_read_engine(path)
+
+            async def async_read_session():
+                async with AsyncSession(async_reader) as s:
+                    yield s
+
+            overrides[database.get_async_read_session] = async_read_session
+        server.app.dependency_overrides.update(overrides)
+        # Slow requests are EXPLAINed; point that at the bench database too (the profiler is newer than the port).
+        profiler = getattr(server, "profiler", None)
+        if profiler is not None:
+            explain_engine, profiler.explain_engine = profiler.explain_engine, reader
+        try:
+            results = {"commit": _commit(), "clients": args.clients, "entries": args.entries, **asyncio.run(load(args.clients, args.requests, args.seed))}
+        finally:
+            server.app.dependency_overrides.clear()
+            if profiler is not None:
+                profiler.explain_engine = explain_engine
+            if async_reader is not None:
+                asyncio.run(async_reader.dispose())
+            writer.dispose()
+            reader.dispose()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
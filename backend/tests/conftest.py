@@ -0,0 +1,37 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.database import get_read_session, get_write_session
+from app.main import app
+from app.migrations import run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # A file database, so sessions on the threadpool and in the test body see the same committed data.
+    engine = create_engine(f"sqlite:///{tmp_path / 'worklog.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        run_migrations(conn)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    def override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides.update({get_read_session: override, get_write_session: override})
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
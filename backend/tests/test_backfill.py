@@ -0,0 +1,53 @@
+import random
+from datetime import date, datetime, timedelta
+
+from sqlmodel import select
+
+from app.backfill import build_snapshots, periods_between, upsert_snapshots
+from app.models import Account, Asset, Deal, Entry, FollowUp, MonthlySnapshot, PlayEnum, Routine, WeeklySnapshot
+from app.reporting import generate_monthly, generate_weekly
+
+
+def seed(session):
+    rng = random.Random(11)
+    base = date(2025, 1, 1)
+    notes = ["gke blocker", "talk track review", "faster deploys", "win story draft", "cost review", "plain"]
+    for i in range(4):
+        session.add(Account(name=f"A{i}"))
+    for i in range(10):
+        day = base + timedelta(days=rng.randrange(90))
+        session.add(Deal(account_id=1, name=f"D{i}", play_type="GKE", stage="Discovery", next_step="call", next_step_date=base + timedelta(days=rng.randrange(90)), est_value=rng.choice([None, 1000.0, 250.0]), updated_at=datetime.combine(day, datetime.min.time())))
+    for i in range(400):
+        ts = datetime.combine(base + timedelta(days=rng.randrange(90)), datetime.min.time()) + timedelta(minutes=rng.randrange(1440))
+        session.add(Entry(type=rng.choice(["meeting", "note"]), title="t", raw_note=rng.choice(notes), play=rng.choice(list(PlayEnum)), account_id=rng.choice([None, 1, 2]), deal_id=rng.choice([None, 3]), duration_min=rng.choice([15, 30, 45]), timestamp=ts))
+    for i in range(30):
+        session.add(FollowUp(title="f", due_date=base + timedelta(days=rng.randrange(90)), status=rng.choice(["open", "done"])))
+        session.add(Asset(asset_type="deck", title="a", date=base + timedelta(days=rng.randrange(90))))
+    session.add(Routine(routine_type="r", frequency="weekly", default_day="Tue", last_completed_date=base + timedelta(days=20)))
+    session.commit()
+
+
+def test_periods_between():
+    assert periods_between("weekly", date(2025, 1, 8), date(2025, 1, 14)) == [(date(2025, 1, 6), date(2025, 1, 12)), (date(2025, 1, 13), date(2025, 1, 19))]
+    assert periods_between("monthly", date(2025, 1, 31), date(2025, 2, 1))[-1] == (date(2025, 2, 1), date(2025, 2, 28))
+
+
+def test_backfill_matches_per_period_generation_and_is_idempotent(session):
+    seed(session)
+    start, end = date(2025, 1, 1), date(2025, 3, 31)
+
+    weekly = build_snapshots(session, "weekly", start, end)
+    assert len(weekly) == 14
+    for report in weekly:
+        assert report == generate_weekly(session, report["start"])
+
+    monthly = build_snapshots(session, "monthly", start, end, workers=2)
+    assert [report["month"] for report in monthly] == ["2025-01", "2025-02", "2025-03"]
+    for report in monthly:
+        assert report == generate_monthly(session, date.fromisoformat(report["month"] + "-01"))
+
+    assert upsert_snapshots(session, "weekly", weekly) == {"periods": 14, "inserted": 14, "updated": 0}
+    assert upsert_snapshots(session, "weekly", weekly) == {"periods": 14, "inserted": 0, "updated": 14}
+    assert upsert_snapshots(session, "monthly", monthly)["inserted"] == 3
+    assert len(session.exec(select(WeeklySnapshot)).all()) == 14
+    assert len(session.exec(select(MonthlySnapshot)).all()) == 3
@@ -0,0 +1,37 @@
+import random
+import sqlite3
+from datetime import date
+
+from app.rules import classify
+from bench.datagen import generate, note
+from bench.load import PROFILES, run
+
+
+def test_generated_data_is_seeded_and_classifies_across_plays(tmp_path):
+    assert note(random.Random(3)) == note(random.Random(3))
+    first = generate(tmp_path / "a.db", 600, seed=5, days=60, end=date(2025, 6, 30))
+    second = generate(tmp_path / "b.db", 600, seed=5, days=60, end=date(2025, 6, 30))
+    assert first == second
+    assert first["entries"] == 600 and first["accounts"] >= 10 and first["followups"] > 0 and first["routines"] == 5
+
+    query = "SELECT timestamp, raw_note, play, account_id, deal_id FROM entries ORDER BY id"
+    with sqlite3.connect(tmp_path / "a.db") as a, sqlite3.connect(tmp_path / "b.db") as b:
+        rows = a.execute(query).fetchall()
+        assert rows == b.execute(query).fetchall()
+        assert min(r[0] for r in rows) >= "2025-05-02" and max(r[0] for r in rows) < "2025-07-01"
+        assert len({r[2] for r in rows}) >= 5
+        assert a.execute("SELECT count(*) FROM daily_rollups").fetchone()[0] > 0
+        assert a.execute("SELECT count(*) FROM followups WHERE status = 'done'").fetchone()[0] > 0
+    assert {classify(r[1])["play"] for r in rows[:50]} - {"Other"}
+
+
+def test_load_profiles_run_against_a_copy(tmp_path):
+    db = tmp_path / "worklog.db"
+    generate(db, 300, seed=1, days=30)
+    for profile in PROFILES:
+        result = run(db, profile, clients=3, requests=30)
+        assert result["profile"] == profile and result["requests"] == 30 and result["errors"] == 0
+        assert result["latency"]["p50_ms"] <= result["latency"]["p99_ms"] <= result["latency"]["max_ms"]
+        assert sum(e["count"] for e in result["endpoints"].values()) == 30
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT count(*) FROM entries").fetchone()[0] == 300
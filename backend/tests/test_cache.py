@@ -0,0 +1,71 @@
+import threading
+import time
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+import app.main as main
+from app.cache import ReportCache
+from app.models import Entry, WeeklySnapshot
+from app.versions import data_version
+
+
+def test_lru_evicts_by_size_and_recency():
+    cache = ReportCache(max_bytes=10)
+    cache.get_or_compute("a", lambda: b"aaaa")
+    cache.get_or_compute("b", lambda: b"bbbb")
+    cache.get_or_compute("a", lambda: b"never")
+    cache.get_or_compute("c", lambda: b"cccc")
+    assert len(cache) == 2
+    assert cache.get_or_compute("a", lambda: b"new") == b"aaaa"
+    assert cache.get_or_compute("b", lambda: b"recomputed") == b"recomputed"
+
+
+def test_concurrent_misses_compute_once():
+    cache = ReportCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "report"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["report"] * 8 and len(calls) == 1
+
+
+def test_versions_follow_committed_writes_per_table():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        before = data_version("entries"), data_version("snapshots_weekly")
+        session.add(Entry(type="note", title="t", raw_note="n"))
+        session.rollback()
+        assert (data_version("entries"), data_version("snapshots_weekly")) == before
+        session.add(Entry(type="note", title="t", raw_note="n"))
+        session.commit()
+        assert data_version("entries") > before[0]
+        assert data_version("snapshots_weekly") == before[1]
+
+
+def test_report_endpoints_share_cache_until_entries_change(monkeypatch, client, engine):
+    calls = []
+    real = main.generate_weekly
+    monkeypatch.setattr(main, "generate_weekly", lambda *a: calls.append(1) or real(*a))
+    main.report_cache.clear()
+    assert client.post("/api/generate/weekly").status_code == 200
+    client.post("/api/generate/slides")
+    client.get("/api/export/weekly/md")
+    first_pdf = client.get("/api/export/weekly/pdf").content
+    assert client.get("/api/export/weekly/pdf").content == first_pdf
+    assert len(calls) == 1
+
+    client.post("/api/entries", json={"title": "x", "raw_note": "blocker"})
+    assert "Blockers flagged: 1" in client.get("/api/export/weekly/md").text
+    assert len(calls) == 2
+    with Session(engine) as session:
+        assert len(session.exec(select(WeeklySnapshot)).all()) == 1
@@ -0,0 +1,80 @@
+import sqlite3
+from contextlib import closing
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session
+
+from app import versions
+from app.models import Account, Entry
+from app.versions import data_version, watch
+
+
+def test_etag_revalidation_skips_endpoint_until_relevant_table_changes(client, engine):
+    # Counts read transactions, so a 304 is seen to skip the endpoint.
+    opened = []
+
+    def count(*args):
+        opened.append(1)
+
+    event.listen(OrmSession, "after_begin", count)
+    try:
+        with Session(engine) as session:
+            session.add(Account(name="A"))
+            session.commit()
+
+        first = client.get("/api/accounts")
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('"')
+
+        calls = len(opened)
+        assert calls
+        cached = client.get("/api/accounts", headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+        assert len(opened) == calls
+
+        with Session(engine) as session:
+            session.add(Entry(type="note", title="t", raw_note="n"))
+            session.commit()
+        assert client.get("/api/accounts", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/api/home", headers={"If-None-Match": etag}).status_code == 200
+
+        with Session(engine) as session:
+            session.add(Account(name="B"))
+            session.commit()
+        fresh = client.get("/api/accounts", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+        assert [a["name"] for a in fresh.json()["items"]] == ["A", "B"]
+    finally:
+        event.remove(OrmSession, "after_begin", count)
+
+
+def test_writes_from_another_process_invalidate_etags(client, engine):
+    watch(engine)
+    try:
+        with Session(engine) as session:
+            session.add(Account(name="A"))
+            session.commit()
+        etag = client.get("/api/accounts").headers["etag"]
+        assert client.get("/api/accounts", headers={"If-None-Match": etag}).status_code == 304
+
+        # As the CLI would: a separate connection, bypassing this process's write tracking.
+        with closing(sqlite3.connect(engine.url.database)) as other:
+            other.execute("UPDATE accounts SET name = 'renamed'")
+            other.commit()
+        fresh = client.get("/api/accounts", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.json()["items"][0]["name"] == "renamed"
+
+        # One that lands as this process resamples the monitor after its own commit is still
+        # caught when the writer next begins.
+        entries = data_version("entries")
+        with closing(sqlite3.connect(engine.url.database)) as other:
+            other.execute("UPDATE accounts SET name = 'again'")
+            other.commit()
+        versions._poll_monitor(absorb=True)
+        assert data_version("entries") == entries
+        with engine.begin() as conn:
+            conn.exec_driver_sql("SELECT 1")
+        assert data_version("entries") > entries
+    finally:
+        watch(None)
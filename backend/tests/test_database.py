@@ -0,0 +1,55 @@
+import threading
+import time
+
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, select
+
+from app.database import create_engines
+from app.models import Entry
+
+
+def test_reads_proceed_while_a_write_is_in_progress(tmp_path):
+    writer, reader = create_engines(tmp_path / "worklog.db")
+    SQLModel.metadata.create_all(writer)
+    with writer.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+    def count() -> int:
+        with Session(reader) as session:
+            return session.exec(select(func.count()).select_from(Entry)).one()
+
+    second_write_done = []
+
+    def second_writer():
+        with Session(writer) as session:
+            session.add(Entry(type="note", title="second", raw_note="second"))
+            session.commit()
+        second_write_done.append(time.perf_counter())
+
+    with Session(writer) as session:
+        session.add_all(Entry(type="note", title=f"e{i}", raw_note="long write") for i in range(2000))
+        session.flush()  # write transaction open and holding the write lock
+
+        started = time.perf_counter()
+        assert count() == 0
+        assert time.perf_counter() - started < 1
+
+        thread = threading.Thread(target=second_writer)
+        thread.start()
+        time.sleep(0.2)
+        assert not second_write_done  # writers are serialized behind the open transaction
+        session.commit()
+        committed = time.perf_counter()
+
+    thread.join(5)
+    assert second_write_done and second_write_done[0] >= committed
+    assert count() == 2001
+
+    with Session(reader) as session:
+        try:
+            session.add(Entry(type="note", title="x", raw_note="x"))
+            session.commit()
+        except Exception as exc:
+            assert "readonly" in str(exc).lower()
+        else:
+            raise AssertionError("read session accepted a write")
@@ -0,0 +1,53 @@
+import io
+import zipfile
+from datetime import date
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from sqlmodel import Session
+
+from app import documents
+from app.documents import render_pdfs, shutdown_pool, wrap_line
+from app.exports import snapshot_documents
+from app.models import MonthlySnapshot, WeeklySnapshot
+
+
+def test_wrap_line_keeps_every_word_within_width():
+    line = "- " + " ".join(f"word{i}" for i in range(80)) + " " + "x" * 300
+    parts = wrap_line(line, "Helvetica", 10, 468)
+    assert len(parts) > 3
+    assert all(stringWidth(p, "Helvetica", 10) <= 468 for p in parts)
+    assert "".join(parts).replace(" ", "") == line.replace(" ", "")
+    assert wrap_line("short", "Helvetica", 10, 468) == ["short"]
+
+
+def test_render_pdfs_in_process_pool_keeps_input_order():
+    docs = [(f"d{i}.pdf", f"Title {i}", "body " * 500) for i in range(5)]
+    rendered = list(render_pdfs(docs, workers=2))
+    assert [name for name, _ in rendered] == [name for name, _, _ in docs]
+    assert all(pdf.startswith(b"%PDF") for _, pdf in rendered)
+
+    pool = documents._pool
+    assert pool._mp_context.get_start_method() == "spawn"
+    shutdown_pool()
+    assert documents._pool is None and pool._shutdown_thread
+    shutdown_pool()
+
+
+def test_snapshot_zip_export_filters_by_range(client, engine):
+    with Session(engine) as session:
+        for week in [date(2025, 1, 6), date(2025, 2, 3), date(2025, 4, 7)]:
+            session.add(WeeklySnapshot(week_start=week, teams_text="t", email_subject="Weekly", email_body="b", slide_bullets="s"))
+        for month in ["2025-01", "2025-03", "2025-05"]:
+            session.add(MonthlySnapshot(month_yyyy_mm=month, teams_text="t", email_subject="Monthly", email_body="b", slide_bullets="s"))
+        session.commit()
+
+    docs = snapshot_documents(engine, date(2025, 1, 15), date(2025, 3, 31), chunk_rows=1)
+    assert next(docs) == ("weekly/2025-02-03-2.pdf", "Weekly", "t\n\nb\n\ns")
+    assert [name for name, _, _ in docs] == ["monthly/2025-01-1.pdf", "monthly/2025-03-2.pdf"]
+
+    res = client.get("/api/export/snapshots/pdf.zip", params={"from": "2025-01-15", "to": "2025-03-31"})
+    assert res.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    assert archive.testzip() is None
+    assert archive.namelist() == ["weekly/2025-02-03-2.pdf", "monthly/2025-01-1.pdf", "monthly/2025-03-2.pdf"]
+    assert archive.read("weekly/2025-02-03-2.pdf").startswith(b"%PDF")
@@ -0,0 +1,39 @@
+import csv
+import gzip
+import io
+from datetime import date, datetime
+
+from sqlmodel import Session
+
+from app.exports import iter_csv
+from app.models import Asset, Entry, PlayEnum
+
+
+def seed(engine):
+    with Session(engine) as session:
+        for day in range(1, 6):
+            session.add(Entry(timestamp=datetime(2025, 3, day, 9), type="note", title=f"e{day}", raw_note="gke", play=PlayEnum.GKE, duration_min=day))
+            session.add(Asset(date=date(2025, 3, day), asset_type="deck", title=f"a{day}"))
+        session.commit()
+
+
+def test_iter_csv_streams_in_chunks_with_date_range(engine):
+    seed(engine)
+    chunks = list(iter_csv(engine, "entries", date(2025, 3, 2), date(2025, 3, 4), chunk_rows=2))
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "timestamp", "type", "title", "play", "duration_min", "intention_bucket"]
+    assert [r[3] for r in rows[1:]] == ["e2", "e3", "e4"]
+    assert rows[1][4] == "GKE"
+
+
+def test_csv_export_endpoint_gzip(client, engine):
+    seed(engine)
+    res = client.get("/api/export/assets/csv", params={"from": "2025-03-04"})
+    assert res.headers["content-type"].startswith("text/csv")
+    assert [r[3] for r in csv.reader(io.StringIO(res.text))][1:] == ["a4", "a5"]
+
+    res = client.get("/api/export/entries/csv", params={"gzip": "true"})
+    assert res.headers["content-type"] == "application/gzip"
+    rows = list(csv.reader(io.StringIO(gzip.decompress(res.content).decode())))
+    assert len(rows) == 6
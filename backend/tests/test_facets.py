@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.migrations import run_migrations
+from app.models import Entry, EntryOutcome, EntryTag, PlayEnum
+
+
+def build_engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def links(session):
+    tags = sorted((t.entry_id, t.tag) for t in session.exec(select(EntryTag)))
+    outcomes = sorted((o.entry_id, o.outcome) for o in session.exec(select(EntryOutcome)))
+    return tags, outcomes
+
+
+def test_link_tables_backfilled_and_maintained_by_triggers():
+    engine = build_engine()
+    with Session(engine) as session:
+        session.add(Entry(type="note", title="old", raw_note="n", tags=["SOW", "SOW", "demo"], outcomes=["SOW started"]))
+        session.commit()
+        with engine.begin() as conn:
+            run_migrations(conn)
+        assert links(session) == ([(1, "SOW"), (1, "demo")], [(1, "SOW started")])
+
+        session.add(Entry(type="note", title="new", raw_note="n", tags=["workshop"]))
+        session.commit()
+        entry = session.get(Entry, 1)
+        entry.tags = ["pod"]
+        session.add(entry)
+        session.commit()
+        session.delete(session.get(Entry, 2))
+        session.commit()
+        assert links(session) == ([(1, "pod")], [(1, "SOW started")])
+
+
+def test_entry_listing_filters_and_facets(client, engine):
+    with Session(engine) as session:
+        rows = [
+            (PlayEnum.GKE, ["SOW"], 1, datetime(2025, 7, 2)),
+            (PlayEnum.GKE, ["SOW", "demo"], 1, datetime(2025, 8, 15)),
+            (PlayEnum.VERTEX, ["SOW"], 2, datetime(2025, 9, 1)),
+            (PlayEnum.GKE, ["SOW"], 1, datetime(2025, 11, 1)),
+            (PlayEnum.GKE, ["demo"], 1, datetime(2025, 8, 1)),
+        ]
+        for play, tags, account, ts in rows:
+            session.add(Entry(type="note", title=ts.isoformat(), raw_note="n", play=play, tags=tags, account_id=account, timestamp=ts, intention_bucket="A"))
+        session.commit()
+
+    params = {"tag": "SOW", "account_id": 1, "from": "2025-07-01", "to": "2025-09-30"}
+    res = client.get("/api/entries", params=params).json()
+    assert [e["title"] for e in res["items"]] == ["2025-08-15T00:00:00", "2025-07-02T00:00:00"]
+    facets = res["facets"]
+    assert facets["tag"] == [{"value": "SOW", "count": 2}, {"value": "demo", "count": 2}]
+    assert facets["account_id"] == [{"value": 1, "count": 2}, {"value": 2, "count": 1}]
+    assert facets["play"] == [{"value": "GKE", "count": 2}]
+
+    res = client.get("/api/entries", params={"play": "Vertex", "facets": "false", "fields": "title"}).json()
+    assert res["items"] == [{"id": 3, "title": "2025-09-01T00:00:00"}] and "facets" not in res
+    assert client.get("/api/entries", params={"play": "Nope"}).status_code == 400
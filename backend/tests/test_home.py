@@ -0,0 +1,32 @@
+from datetime import date, datetime, timedelta
+
+from sqlmodel import Session
+
+from app.main import HOME_LIST_LIMIT
+from app.models import Account, Deal, Entry, FollowUp
+
+
+def test_home_aggregates_bounded_lists_and_invalidation(client, engine):
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=9)
+    with Session(engine) as session:
+        session.add(Account(name="A"))
+        for i in range(3):
+            session.add(Entry(type="note", title="t", raw_note="n", duration_min=10, account_id=1 if i else None, deal_id=None, timestamp=now))
+        session.add(Entry(type="note", title="old", raw_note="n", duration_min=99, timestamp=now - timedelta(days=1)))
+        for i in range(HOME_LIST_LIMIT + 5):
+            session.add(FollowUp(title=f"f{i}", due_date=today - timedelta(days=i), status="open"))
+        session.add(FollowUp(title="closed", due_date=today, status="done"))
+        session.add(Deal(account_id=1, name="ancient", play_type="GKE", stage="s", next_step_date=today - timedelta(days=400)))
+        session.add(Deal(account_id=1, name="soon", play_type="GKE", stage="s", next_step_date=today))
+        session.commit()
+
+    home = client.get("/api/home").json()
+    assert home["today"] == {"time_logged": 30, "entries": 3, "accounts_touched": 1, "deals_touched": 0, "followups_due": HOME_LIST_LIMIT + 5}
+    due = home["due_this_week"]["followups"]
+    assert len(due) == HOME_LIST_LIMIT and due[0]["title"] == f"f{HOME_LIST_LIMIT + 4}"
+    assert [d["name"] for d in home["due_this_week"]["deals"]] == ["soon"]
+    assert client.get("/api/home").json() == home
+
+    client.post("/api/entries", json={"title": "new", "raw_note": "call recap", "duration_min": 5})
+    assert client.get("/api/home").json()["today"]["entries"] == 4
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+
+from sqlmodel import Session, select
+
+from app.models import Entry, FollowUp, PlayEnum
+from app.rules import classify
+
+
+def test_bulk_ingest_ndjson_and_array(client, engine):
+    lines = [
+        json.dumps({"title": "a", "raw_note": "GKE workshop, follow up by 2025-02-03", "timestamp": "2025-01-30T10:00:00"}),
+        "{not json",
+        json.dumps({"title": "b"}),
+        json.dumps({"title": "c", "raw_note": "vertex demo", "type": "meeting"}),
+    ]
+    res = client.post("/api/entries/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}).json()
+    assert res["inserted"] == 2
+    first_ids = res["ids"]
+    assert res["ids"][1] is None and res["ids"][2] is None
+    assert [e["row"] for e in res["errors"]] == [1, 2]
+
+    res = client.post("/api/entries/bulk", json=[{"title": "d", "raw_note": "finops cost review"}]).json()
+    assert res["inserted"] == 1 and res["errors"] == []
+
+    with Session(engine) as session:
+        entries = {e.title: e for e in session.exec(select(Entry)).all()}
+        assert entries["a"].play == PlayEnum.GKE and entries["a"].tags == ["workshop"]
+        assert entries["c"].play == PlayEnum.VERTEX
+        assert (entries["a"].id, entries["c"].id) == (first_ids[0], first_ids[3])
+        followups = session.exec(select(FollowUp)).all()
+        assert [(f.linked_entry_id, f.due_date.isoformat()) for f in followups] == [(entries["a"].id, "2025-02-03")]
+
+
+def test_bulk_ingest_rejects_non_utf8_body(client, engine):
+    res = client.post("/api/entries/bulk", content='{"title": "caf\xe9", "raw_note": "x"}'.encode("latin-1"), headers={"Content-Type": "application/x-ndjson"})
+    assert res.status_code == 400 and "UTF-8" in res.json()["detail"]
+    with Session(engine) as session:
+        assert session.exec(select(Entry)).all() == []
+
+
+def test_bulk_rows_are_stored_like_orm_rows(client, engine):
+    note = "GKE workshop with the platform team, follow up by 2025-02-03"
+    derived = classify(note, "note", date(2025, 1, 30))
+    with Session(engine) as session:
+        session.add(Entry(timestamp=datetime(2025, 1, 30, 10), type="note", title="orm", raw_note=note, play=PlayEnum.GKE, tags=derived["tags"], outcomes=derived["outcomes"], stakeholders=[], followups=derived["followups"]))
+        session.commit()
+    client.post("/api/entries/bulk", json=[{"title": "bulk", "raw_note": note, "timestamp": "2025-01-30T10:00:00+00:00"}])
+
+    columns = "timestamp, play, tags, outcomes, stakeholders, followups"
+    with engine.connect() as conn:
+        stored = dict(conn.exec_driver_sql(f"SELECT title, json_array({columns}) FROM entries").all())
+    assert stored["bulk"] == stored["orm"]
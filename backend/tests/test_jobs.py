@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, select
+
+from app.database import create_engines, get_read_session, get_write_session
+from app.jobs import JobCancelled, JobContext, JobQueue
+from app.main import app, get_job_queue, job_queue
+from app.migrations import run_migrations
+from app.models import Job, WeeklySnapshot
+
+
+def build_queue(tmp_path, workers=2):
+    writer, reader = create_engines(tmp_path / "worklog.db")
+    SQLModel.metadata.create_all(writer)
+    with writer.begin() as conn:
+        run_migrations(conn)
+    return JobQueue(writer, reader, workers=workers)
+
+
+def wait_for(queue, job_id, statuses=("done", "failed", "cancelled")):
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stuck in {job.status}")
+
+
+def test_job_endpoints_run_report_and_export_jobs(tmp_path):
+    queue = build_queue(tmp_path)
+    queue.handlers.update(job_queue.handlers)
+
+    def read():
+        with Session(queue.read_engine) as session:
+            yield session
+
+    def write():
+        with Session(queue.engine) as session:
+            yield session
+
+    app.dependency_overrides.update({get_job_queue: lambda: queue, get_read_session: read, get_write_session: write})
+    try:
+        client = TestClient(app)
+        export = client.post("/api/jobs", json={"kind": "export", "params": {"kind": "weekly", "fmt": "md"}})
+        assert export.status_code == 202 and export.json()["status"] == "queued"
+        report = client.post("/api/jobs", json={"kind": "report", "params": {"kind": "weekly"}}).json()
+
+        wait_for(queue, export.json()["id"])
+        status = client.get(f"/api/jobs/{export.json()['id']}").json()
+        assert status["status"] == "done" and status["progress"] == 1.0
+        result = client.get(status["result_url"])
+        assert result.headers["content-type"].startswith("text/markdown") and result.text.startswith("# Weekly Update")
+
+        wait_for(queue, report["id"])
+        summary = client.get(f"/api/jobs/{report['id']}").json()["summary"]
+        with Session(queue.engine) as session:
+            assert session.get(WeeklySnapshot, summary["snapshot_id"]) is not None
+        assert client.get(f"/api/jobs/{report['id']}/result").status_code == 409
+
+        assert client.post("/api/jobs", json={"kind": "nope"}).status_code == 400
+        assert client.post("/api/jobs", json={"kind": "export", "params": {"kind": "weekly", "fmt": "docx"}}).status_code == 422
+        assert client.get("/api/jobs/9999").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+        queue.stop(wait=True)
+
+
+def test_cancellation_and_recovery(tmp_path):
+    queue = build_queue(tmp_path, workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    @queue.register("slow")
+    def slow(ctx, params):
+        started.set()
+        release.wait(10)
+        ctx.progress(0.5)
+        return {"summary": {"ok": True}}
+
+    running = queue.enqueue("slow", {})
+    assert started.wait(10)
+    waiting = queue.enqueue("slow", {})
+    assert queue.cancel(waiting.id).status == "cancelled"
+    queue.cancel(running.id)
+    release.set()
+    assert wait_for(queue, running.id).status == "cancelled"
+    queue.stop(wait=True)
+
+    # A job left "running" by a crashed process is picked up again on start.
+    with Session(queue.engine) as session:
+        session.add(Job(kind="slow", status="running", attempts=1))
+        session.commit()
+        orphan = session.exec(select(Job.id).where(Job.status == "running")).one()
+    assert queue.start() == 1
+    job = wait_for(queue, orphan)
+    assert (job.status, job.attempts, job.summary) == ("done", 2, {"ok": True})
+    queue.stop(wait=True)
+
+    # One that has been interrupted on every attempt is given up on rather than run again.
+    with Session(queue.engine) as session:
+        session.add(Job(kind="slow", status="running", attempts=queue.max_attempts))
+        session.commit()
+        doomed = session.exec(select(Job.id).where(Job.status == "running")).one()
+    assert queue.start() == 0
+    job = queue.get(doomed)
+    assert (job.status, job.attempts, job.error) == ("failed", 3, "Interrupted after 3 attempts")
+    assert job.finished_at is not None
+    queue.stop(wait=True)
+
+
+def test_scheduled_compaction_runs_on_interval_without_piling_up(tmp_path):
+    queue = build_queue(tmp_path)
+    queue.handlers.update(job_queue.handlers)
+    with queue.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO changes (table_name, row_id, op, changed_at) VALUES ('entries', 1, 'delete', '2000-01-01 00:00:00.000')")
+    queue.every(0.05, "compact")
+    queue.start()
+    try:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            with Session(queue.engine) as session:
+                jobs = session.exec(select(Job).where(Job.kind == "compact")).all()
+            if len(jobs) >= 2 and all(j.status == "done" for j in jobs):
+                break
+            time.sleep(0.05)
+    finally:
+        queue.stop(wait=True)
+    assert len(jobs) >= 2 and all(j.status == "done" for j in jobs)
+    assert jobs[0].summary["removed"] == 1 and jobs[1].summary["removed"] == 0
+    with Session(queue.engine) as session:
+        settled = len(session.exec(select(Job)).all())
+    time.sleep(0.2)
+    with Session(queue.engine) as session:
+        assert len(session.exec(select(Job)).all()) == settled
+
+
+class RecordingContext(JobContext):
+    def __init__(self, queue, job_id):
+        super().__init__(queue, job_id)
+        self.fractions = []
+
+    def progress(self, fraction):
+        self.fractions.append(fraction)
+        super().progress(fraction)
+
+
+def test_report_export_and_backfill_jobs_checkpoint_progress(tmp_path):
+    queue = build_queue(tmp_path)
+    with Session(queue.engine) as session:
+        job = Job(kind="backfill", status="running")
+        session.add(job)
+        session.commit()
+        job_id = job.id
+
+    for kind, params in (("report", {"kind": "weekly"}), ("export", {"kind": "monthly", "fmt": "md"})):
+        ctx = RecordingContext(queue, job_id)
+        job_queue.handlers[kind](ctx, params)
+        assert ctx.fractions == [0.5]
+
+    ctx = RecordingContext(queue, job_id)
+    job_queue.handlers["backfill"](ctx, {"kind": "monthly", "start": "2025-01-01", "end": "2025-04-30"})
+    assert [round(f, 2) for f in ctx.fractions] == [0.16, 0.32, 0.48, 0.64, 0.8]
+
+    # A cancel requested mid-run stops the backfill at its next per-period checkpoint.
+    with Session(queue.engine) as session:
+        session.get(Job, job_id).cancel_requested = True
+        session.commit()
+    ctx = RecordingContext(queue, job_id)
+    with pytest.raises(JobCancelled):
+        job_queue.handlers["backfill"](ctx, {"kind": "monthly", "start": "2025-01-01", "end": "2025-04-30"})
+    assert len(ctx.fractions) == 1
@@ -0,0 +1,36 @@
+import json
+import time
+
+from bench.micro import BASELINE, compare, corpus, measure, report_benchmarks
+
+
+def test_compare_flags_only_medians_past_threshold():
+    baseline = {"a": {"median_us": 10.0}, "b": {"median_us": 10.0}, "c": {"median_us": 10.0}}
+    results = {"a": {"median_us": 12.4}, "b": {"median_us": 13.0}, "c": {"median_us": 5.0}, "new": {"median_us": 99.0}}
+    assert compare(results, baseline, threshold=0.25) == [{"name": "b", "baseline_us": 10.0, "median_us": 13.0, "ratio": 1.3}]
+
+
+def test_measure_reports_per_call_medians_and_catches_a_slowdown():
+    results = measure({"fast": (lambda: time.sleep(0.001), 1), "slow": (lambda: time.sleep(0.004), 2)}, rounds=3)
+    assert set(results["fast"]) == {"median_us", "min_us", "rounds", "number"} and results["fast"]["rounds"] == 3
+    assert results["fast"]["min_us"] <= results["fast"]["median_us"]
+    # 4ms per call spread over 2 items is ~2000us per item, about double the 1ms benchmark.
+    assert compare({"fast": results["slow"]}, {"fast": results["fast"]}, threshold=0.25)
+
+
+def test_corpus_lengths_and_report_benchmarks_on_prebuilt_db(tmp_path):
+    notes = corpus()
+    assert max(map(len, notes["short"])) < min(map(len, notes["long"]))
+    assert notes == corpus()
+
+    results = report_benchmarks(sizes=(300,), rounds=1, cache_dir=tmp_path)
+    assert set(results) == {"reports.generate_weekly[300]", "reports.generate_monthly[300]"}
+    assert len(list(tmp_path.glob("worklog-300-*.db"))) == 1
+    report_benchmarks(sizes=(300,), rounds=1, cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_baseline_covers_every_benchmark():
+    names = set(json.loads(BASELINE.read_text())["results"])
+    assert {f"rules.classify[{length}]" for length in corpus()} <= names
+    assert {"reports.generate_weekly[100000]", "reports.generate_monthly[100000]"} <= names
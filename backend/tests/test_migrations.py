@@ -0,0 +1,51 @@
+from datetime import date, datetime
+
+from sqlalchemy import func
+from sqlalchemy.dialects import sqlite
+from sqlmodel import SQLModel, create_engine, select
+
+from app.migrations import MIGRATIONS, run_migrations, schema_version
+from app.models import Asset, Deal, Entry, FollowUp
+
+
+def _plan(conn, stmt) -> str:
+    compiled = stmt.compile(dialect=sqlite.dialect(paramstyle="named"))
+    return " | ".join(row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", compiled.params))
+
+
+def test_migrations_index_hot_date_range_queries_on_existing_db():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Simulate a database created before the indexes were declared on the models.
+        for (name,) in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'ix_%'").all():
+            conn.exec_driver_sql(f"DROP INDEX {name}")
+
+        assert run_migrations(conn) == len(MIGRATIONS)
+        assert schema_version(conn) == len(MIGRATIONS)
+        assert run_migrations(conn) == 0
+
+        start, end = date(2025, 1, 6), date(2025, 1, 12)
+        start_dt, end_dt = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.max.time())
+        queries = {
+            "entries": select(Entry).where(Entry.timestamp >= start_dt, Entry.timestamp <= end_dt),
+            "followups": select(FollowUp).where(FollowUp.due_date >= start, FollowUp.due_date <= end),
+            "assets": select(Asset).where(Asset.date >= start, Asset.date <= end),
+            "deals": select(Deal).where(Deal.updated_at >= start_dt, Deal.updated_at <= end_dt),
+            "home followups": select(FollowUp).where(FollowUp.status == "open", FollowUp.due_date <= end),
+            "home deals": select(Deal).where(Deal.next_step_date <= end),
+        }
+        for name, stmt in queries.items():
+            plan = _plan(conn, stmt)
+            assert "USING INDEX" in plan and "SCAN" not in plan, f"{name}: {plan}"
+        assert "ix_followups_status_due_date" in _plan(conn, queries["home followups"])
+
+
+def test_period_aggregates_use_covering_index():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        run_migrations(conn)
+        lo, hi = datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59)
+        stmt = select(Entry.play, Entry.type, func.count(), func.sum(Entry.duration_min)).where(Entry.timestamp >= lo, Entry.timestamp <= hi).group_by(Entry.play, Entry.type)
+        assert "COVERING INDEX ix_entries_period_metrics" in _plan(conn, stmt)
@@ -0,0 +1,49 @@
+from datetime import date, datetime
+
+from sqlmodel import Session
+
+from app.models import Account, Deal, WeeklySnapshot
+
+
+def test_accounts_and_deals_keyset_pages_with_projection(client, engine):
+    with Session(engine) as session:
+        for i in range(7):
+            session.add(Account(name=f"A{i}"))
+            session.add(Deal(account_id=1 + i % 2, name=f"D{i}", play_type="GKE", stage="Discovery", owners=["me"]))
+        session.commit()
+
+    names, after = [], None
+    while True:
+        page = client.get("/api/accounts", params={"limit": 3, "fields": "name", **({"after": after} if after else {})}).json()
+        assert all(set(item) == {"id", "name"} for item in page["items"])
+        names += [item["name"] for item in page["items"]]
+        after = page["next_after"]
+        if not after:
+            break
+    assert names == [f"A{i}" for i in range(7)]
+
+    deals = client.get("/api/deals", params={"account_id": 2, "fields": "name,owners"}).json()
+    assert [d["name"] for d in deals["items"]] == ["D1", "D3", "D5"] and deals["items"][0]["owners"] == ["me"]
+    assert deals["next_after"] is None
+
+    assert client.get("/api/deals", params={"fields": "name,secret"}).status_code == 400
+    assert client.get("/api/deals", params={"after": "not-a-cursor"}).status_code == 400
+
+
+def test_snapshot_listing_returns_headers_newest_first_and_detail(client, engine):
+    generated = datetime(2025, 5, 1, 12)
+    with Session(engine) as session:
+        for week in range(5):
+            # Identical generated_at values exercise the id tie-breaker in the cursor.
+            session.add(WeeklySnapshot(week_start=date(2025, 3, 3 + 7 * week), teams_text="t" * 1000, email_subject=f"W{week}", email_body="b", slide_bullets="s", metrics_json={"x": 1}, generated_at=generated if week < 4 else datetime(2025, 6, 1)))
+        session.commit()
+
+    first = client.get("/api/reports/weekly", params={"limit": 2}).json()
+    assert set(first["items"][0]) == {"id", "week_start", "email_subject", "generated_at"}
+    second = client.get("/api/reports/weekly", params={"limit": 10, "after": first["next_after"]}).json()
+    subjects = [item["email_subject"] for item in first["items"] + second["items"]]
+    assert subjects == ["W4", "W3", "W2", "W1", "W0"]
+
+    detail = client.get(f"/api/reports/weekly/{first['items'][0]['id']}").json()
+    assert detail["teams_text"] == "t" * 1000 and detail["metrics_json"] == {"x": 1}
+    assert client.get("/api/reports/monthly/999").status_code == 404
@@ -0,0 +1,87 @@
+import logging
+import re
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.main import profiler
+from app.models import Account, Entry
+from app.profiling import ProfilingMiddleware, RequestProfiler
+
+
+def seed(engine):
+    with Session(engine) as session:
+        session.add(Account(name="A"))
+        session.add_all(Entry(type="note", title=f"e{i}", raw_note="n", account_id=1) for i in range(5))
+        session.commit()
+
+
+def sample(text: str, name: str, **labels) -> float:
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    match = re.search(rf"^{name}{{{re.escape(wanted)}}} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_metrics_count_requests_and_queries_per_route(client, engine):
+    seed(engine)
+    before = client.get("/api/debug/metrics").text
+    for _ in range(3):
+        assert client.get("/api/accounts").status_code == 200
+    assert client.get("/api/entries", params={"account_id": 1}).status_code == 200
+    res = client.get("/api/debug/metrics")
+    after = res.text
+    assert res.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "etag" not in res.headers
+
+    route = {"method": "GET", "route": "/api/accounts"}
+    assert sample(after, "worklog_http_requests_total", **route, status=200) - sample(before, "worklog_http_requests_total", **route, status=200) == 3
+    assert sample(after, "worklog_http_request_duration_seconds_count", **route) - sample(before, "worklog_http_request_duration_seconds_count", **route) == 3
+    assert sample(after, "worklog_db_queries_per_request_sum", **route) - sample(before, "worklog_db_queries_per_request_sum", **route) >= 3
+    assert sample(after, "worklog_db_seconds_per_request_sum", **route) > 0
+    assert sample(after, "worklog_http_request_duration_seconds_bucket", **route, le="+Inf") == sample(after, "worklog_http_request_duration_seconds_count", **route)
+    assert sample(after, "worklog_db_queries_per_request_count", method="GET", route="/api/entries") >= 1
+
+
+def test_slow_requests_are_logged_with_query_plans(client, engine, monkeypatch, caplog):
+    seed(engine)
+    monkeypatch.setattr(profiler, "slow_seconds", 0.0)
+    monkeypatch.setattr(profiler, "explain_engine", engine)
+    with caplog.at_level(logging.WARNING, logger="app.profiling"):
+        assert client.get("/api/entries", params={"account_id": 1, "facets": "false"}).status_code == 200
+    assert "slow request GET /api/entries" in caplog.text
+
+    slow = client.get("/api/debug/slow").json()
+    entry = next(e for e in slow if e["path"] == "/api/entries")
+    assert entry["route"] == "/api/entries" and entry["status"] == 200 and entry["queries"] >= 1
+    assert entry["slowest"] and all(s["plan"] for s in entry["slowest"] if s["sql"].startswith("SELECT"))
+    assert any("entries" in line for s in entry["slowest"] for line in s["plan"])
+
+
+def test_profile_query_returns_collapsed_stacks():
+    target = FastAPI()
+    target.add_middleware(ProfilingMiddleware, profiler=RequestProfiler())
+
+    @target.get("/api/busy")
+    async def busy():
+        began = time.perf_counter()
+        while time.perf_counter() - began < 0.1:
+            pass
+        return {"ok": True}
+
+    @target.post("/api/busy")
+    def write():
+        return {"written": True}
+
+    client = TestClient(target)
+    assert client.get("/api/busy").json() == {"ok": True}
+    # Writes are never swapped for a profile, so their result is not lost.
+    assert client.post("/api/busy", params={"profile": "1"}).json() == {"written": True}
+
+    res = client.get("/api/busy", params={"profile": "1"})
+    assert res.status_code == 200 and res.headers["x-profile-status"] == "200"
+    assert int(res.headers["x-profile-samples"]) > 0
+    lines = res.text.splitlines()
+    assert all(re.match(r"^\S+(;\S+)* \d+$", line) for line in lines)
+    assert any("test_profiling.py:busy" in line for line in lines)
@@ -0,0 +1,60 @@
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app import reclassify
+from app.models import Entry, PlayEnum
+from app.reclassify import count_stale, reclassify_entries
+from app.rules import RULES_VERSION, TEXT_FLAGS
+from app.sync import changes_since
+from app.versions import data_version
+
+
+def test_reclassify_updates_only_stale_changed_rows(engine):
+    with Session(engine) as session:
+        session.add(Entry(type="meeting", title="a", raw_note="GKE workshop", play=PlayEnum.OTHER, tags=[], intention_bucket="D"))
+        session.add(Entry(type="meeting", title="b", raw_note="call recap", play=PlayEnum.OTHER, tags=[], outcomes=[], intention_bucket="A", rules_version="old"))
+        session.add(Entry(type="meeting", title="flags", raw_note="cost blocker", play=PlayEnum.OTHER, tags=[], outcomes=[], intention_bucket="A", rules_version="old"))
+        session.add(Entry(type="meeting", title="c", raw_note="GKE", play=PlayEnum.OTHER, intention_bucket="D", rules_version=RULES_VERSION))
+        session.add(Entry(type="deal", title="Deal moved", raw_note="Deal moved: a → b", intention_bucket="D"))
+        session.add(Entry(type="deal", title="captured deal", raw_note="GKE sizing for the deal", play=PlayEnum.OTHER, intention_bucket="D", rules_version="old"))
+        for i in range(5):
+            session.add(Entry(type="note", title=f"n{i}", raw_note="vertex model demo", intention_bucket="D"))
+        session.commit()
+        # Flags computed under an older TEXT_FLAGS; the ORM sets them on insert, so age them directly.
+        session.execute(update(Entry).where(Entry.title == "flags").values(text_flags=TEXT_FLAGS["cost"]))
+        session.commit()
+        assert count_stale(session) == 9
+
+        first = reclassify_entries(session, chunk_size=2, max_rows=3)
+        assert first["scanned"] == 3 and first["remaining"] == 6 and first["next_after"] == 3
+
+        rest = reclassify_entries(session, chunk_size=2, after=first["next_after"])
+        assert rest["scanned"] == 6 and rest["remaining"] == 0 and rest["next_after"] is None
+        assert first["updated"] + rest["updated"] == 8
+
+        entries = {e.title: e for e in session.exec(select(Entry)).all()}
+        assert entries["a"].play == PlayEnum.GKE and entries["a"].tags == ["workshop"]
+        # Unchanged rows are not rewritten; the watermark marks them checked.
+        assert entries["b"].rules_version == "old"
+        assert entries["flags"].text_flags == TEXT_FLAGS["cost"] | TEXT_FLAGS["blocker"]
+        assert entries["c"].play == PlayEnum.OTHER
+        assert entries["Deal moved"].rules_version is None
+        assert entries["captured deal"].play == PlayEnum.GKE and entries["captured deal"].rules_version == RULES_VERSION
+        assert reclassify_entries(session)["scanned"] == 0
+
+
+def test_unchanged_rows_are_not_rewritten(engine, monkeypatch):
+    with Session(engine) as session:
+        session.add_all([Entry(type="note", title=f"n{i}", raw_note="call recap", intention_bucket="A", rules_version="old") for i in range(4)])
+        session.commit()
+        cursor = changes_since(session, 0)["cursor"]
+        version = data_version("entries")
+
+        result = reclassify_entries(session, chunk_size=3)
+        assert (result["scanned"], result["updated"], result["remaining"]) == (4, 0, 0)
+        assert changes_since(session, cursor)["changes"] == {} and data_version("entries") == version
+        assert {e.rules_version for e in session.exec(select(Entry)).all()} == {"old"}
+
+        # A new rules version starts the watermark over.
+        monkeypatch.setattr(reclassify, "RULES_VERSION", "next")
+        assert count_stale(session) == 4
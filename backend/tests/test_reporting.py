@@ -1,34 +1,102 @@
-from datetime import date, datetime
+import random
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
 
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 
-from app.models import Account, Deal, Entry, FollowUp, PlayEnum, Routine
-from app.reporting import generate_monthly, generate_weekly
+from app.migrations import run_migrations
+from app.models import Account, Asset, Deal, Entry, FollowUp, PlayEnum, Routine
+from app.reporting import _collect_metrics, _entry_stats, generate_monthly, generate_weekly
+from app.rules import TEXT_FLAGS, count_unique, text_flags
 
 
-def build_session():
-    engine = create_engine("sqlite://")
-    SQLModel.metadata.create_all(engine)
-    return Session(engine)
+def test_weekly_and_monthly_generation_contains_expected_sections(session):
+    account = Account(name="Test", industry="Tech", segment="Ent")
+    session.add(account)
+    session.commit()
+    session.refresh(account)
+    deal = Deal(account_id=account.id, name="Deal 1", play_type="GCVE", stage="Discovery", next_step="Call", next_step_date=date.today())
+    session.add(deal)
+    session.add(Routine(routine_type="pipeline pod", frequency="weekly", default_day="Tue", last_completed_date=date.today(), is_active=True))
+    session.add(Entry(type="meeting", title="touchpoint", raw_note="pipeline pod talk track", play=PlayEnum.GCVE, account_id=account.id, deal_id=1, duration_min=30, intention_bucket="D", timestamp=datetime.utcnow()))
+    session.add(FollowUp(title="Send notes", due_date=date.today(), status="done", linked_entry_id=1, linked_deal_id=1))
+    session.commit()
 
+    weekly = generate_weekly(session)
+    monthly = generate_monthly(session)
+
+    assert "Weekly Update" in weekly["subject"]
+    assert "Highlights" in weekly["email"]
+    assert "Monthly Summary" in monthly["subject"]
+    assert "Top 5 highlights" in monthly["email"]
+
+
+def _reference_metrics(session, start, end):
+    # The original in-Python computation, kept to pin the SQL aggregates to the same output.
+    lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.max.time())
+    entries = session.exec(select(Entry).where(Entry.timestamp >= lo, Entry.timestamp <= hi)).all()
+    hours_by_play = defaultdict(float)
+    for e in entries:
+        hours_by_play[e.play.value] += e.duration_min / 60.0
+    followups = session.exec(select(FollowUp).where(FollowUp.due_date >= start, FollowUp.due_date <= end)).all()
+    assets = session.exec(select(Asset).where(Asset.date >= start, Asset.date <= end)).all()
+    deals = session.exec(select(Deal).where(Deal.updated_at >= lo, Deal.updated_at <= hi)).all()
+    routines = session.exec(select(Routine).where(Routine.is_active == True)).all()  # noqa: E712
+    completed = sum(1 for r in routines if r.last_completed_date and start <= r.last_completed_date <= end)
+    return {
+        "entry_counts_by_type": dict(Counter(e.type for e in entries)),
+        "hours_by_play": {k: round(v, 2) for k, v in hours_by_play.items()},
+        "cadence_completion_rate": round(completed / max(len(routines), 1), 2),
+        "accounts_touched": count_unique([e.account_id for e in entries]),
+        "deals_touched": count_unique([e.deal_id for e in entries]),
+        "assets_created": len(assets),
+        "followups_closed": sum(1 for f in followups if f.status == "done"),
+        "followups_created": len(followups),
+        "influenced_value": sum(d.est_value or 0 for d in deals),
+        "influenced_fm": sum(d.est_fm or 0 for d in deals),
+    }
 
-def test_weekly_and_monthly_generation_contains_expected_sections():
-    with build_session() as session:
-        account = Account(name="Test", industry="Tech", segment="Ent")
-        session.add(account)
-        session.commit()
-        session.refresh(account)
-        deal = Deal(account_id=account.id, name="Deal 1", play_type="GCVE", stage="Discovery", next_step="Call", next_step_date=date.today())
-        session.add(deal)
-        session.add(Routine(routine_type="pipeline pod", frequency="weekly", default_day="Tue", last_completed_date=date.today(), is_active=True))
-        session.add(Entry(type="meeting", title="touchpoint", raw_note="pipeline pod talk track", play=PlayEnum.GCVE, account_id=account.id, deal_id=1, duration_min=30, intention_bucket="D", timestamp=datetime.utcnow()))
-        session.add(FollowUp(title="Send notes", due_date=date.today(), status="done", linked_entry_id=1, linked_deal_id=1))
-        session.commit()
 
-        weekly = generate_weekly(session)
-        monthly = generate_monthly(session)
+def test_sql_metrics_match_reference_computation(session):
+    rng = random.Random(7)
+    base = date(2025, 3, 1)
+    for i in range(6):
+        session.add(Account(name=f"A{i}"))
+    for i in range(8):
+        day = base + timedelta(days=rng.randrange(40))
+        session.add(Deal(account_id=rng.randint(1, 6), name=f"D{i}", play_type="GKE", stage="Discovery", est_value=rng.choice([None, 1000.5, 250000]), est_fm=rng.choice([None, 10.25]), updated_at=datetime.combine(day, datetime.min.time())))
+    for i in range(300):
+        ts = datetime.combine(base + timedelta(days=rng.randrange(40)), datetime.min.time()) + timedelta(minutes=rng.randrange(1440))
+        session.add(Entry(type=rng.choice(["meeting", "note", "deal"]), title="t", raw_note="n", play=rng.choice(list(PlayEnum)), account_id=rng.choice([None, 1, 2, 3]), deal_id=rng.choice([None, 1, 5]), duration_min=rng.choice([5, 15, 30, 45, 50]), timestamp=ts))
+    for i in range(40):
+        session.add(FollowUp(title="f", due_date=base + timedelta(days=rng.randrange(40)), status=rng.choice(["open", "done"])))
+        session.add(Asset(asset_type="deck", title="a", date=base + timedelta(days=rng.randrange(40))))
+    for i in range(4):
+        session.add(Routine(routine_type="r", frequency="weekly", default_day="Tue", last_completed_date=rng.choice([None, base + timedelta(days=rng.randrange(40))]), is_active=i != 3))
+    session.commit()
+
+    for start, end in [(date(2025, 3, 3), date(2025, 3, 9)), (date(2025, 3, 1), date(2025, 3, 31)), (date(2024, 1, 1), date(2024, 1, 7))]:
+        stats = _entry_stats(session, start, end)
+        assert _collect_metrics(stats, session, start, end) == _reference_metrics(session, start, end)
+
+
+def test_monthly_proof_and_win_story_come_from_stored_flags():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # A row written before text_flags existed is backfilled by the migration.
+        conn.exec_driver_sql(
+            "INSERT INTO entries (timestamp, type, title, raw_note, play, tags, duration_min, stakeholders, outcomes, followups, intention_bucket, created_at) "
+            "VALUES ('2025-04-02 10:00:00.000000', 'note', 't', 'Deploys are FASTER now, TAL\u212a TRAC\u212a ready', 'OTHER', '[]', 15, '[]', '[]', '[]', 'A', '2025-04-02 10:00:00.000000')"
+        )
+        run_migrations(conn)
+    with Session(engine) as session:
+        backfilled = session.exec(select(Entry)).one()
+        assert backfilled.text_flags == text_flags(backfilled.raw_note) == TEXT_FLAGS["faster"] | TEXT_FLAGS["talk track"]
+        session.add(Entry(type="note", title="t", raw_note="Win story drafted; cost down", timestamp=datetime(2025, 4, 20, 9)))
+        session.add(Entry(type="note", title="t", raw_note="safer rollout", timestamp=datetime(2025, 5, 1, 9)))
+        session.commit()
 
-        assert "Weekly Update" in weekly["subject"]
-        assert "Highlights" in weekly["email"]
-        assert "Monthly Summary" in monthly["subject"]
-        assert "Top 5 highlights" in monthly["email"]
+        email = generate_monthly(session, date(2025, 4, 15))["email"]
+        assert "- Proof (faster)" in email and "- Proof (cost)" in email and "safer" not in email
+        assert "Win story status\n- drafted" in email
@@ -0,0 +1,57 @@
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from sqlmodel import select
+
+from app.models import DailyRollup, Entry, PlayEnum
+from app.rollups import rebuild_rollups, rollup_stats
+
+
+def _raw_stats(session, start, end):
+    lo, hi = datetime.combine(start, datetime.min.time()), datetime.combine(end, datetime.max.time())
+    entries = session.exec(select(Entry).where(Entry.timestamp >= lo, Entry.timestamp <= hi)).all()
+    counts, minutes = Counter(), Counter()
+    for e in entries:
+        counts[(e.play, e.type)] += 1
+        minutes[(e.play, e.type)] += e.duration_min
+    return {
+        "rows": sorted((play, entry_type, counts[(play, entry_type)], minutes[(play, entry_type)]) for play, entry_type in counts),
+        "accounts": len({e.account_id for e in entries if e.account_id is not None}),
+        "deals": len({e.deal_id for e in entries if e.deal_id is not None}),
+        "blockers": sum("blocker" in e.raw_note.lower() for e in entries),
+        "talk_tracks": sum("talk track" in e.raw_note.lower() for e in entries),
+    }
+
+
+def _snapshot(session):
+    return sorted((r.day, r.play, r.type, r.account_id, r.deal_id, r.entries, r.minutes, r.blockers, r.talk_tracks) for r in session.exec(select(DailyRollup)).all())
+
+
+def test_rollups_track_inserts_updates_and_deletes(session):
+    rng = random.Random(3)
+    base = date(2025, 5, 1)
+    notes = ["Blocker on sizing", "talk track review", "plain", "TALK TRACK and blocker"]
+    for _ in range(200):
+        ts = datetime.combine(base + timedelta(days=rng.randrange(45)), datetime.min.time()) + timedelta(minutes=rng.randrange(1440))
+        session.add(Entry(type=rng.choice(["meeting", "note"]), title="t", raw_note=rng.choice(notes), play=rng.choice(list(PlayEnum)), account_id=rng.choice([None, 1, 2]), deal_id=rng.choice([None, 3]), duration_min=rng.choice([15, 30]), timestamp=ts))
+    session.commit()
+
+    entries = session.exec(select(Entry)).all()
+    for e in rng.sample(entries, 40):
+        e.play = rng.choice(list(PlayEnum))
+        e.raw_note = rng.choice(notes)
+        e.timestamp += timedelta(days=rng.choice([-3, 0, 9]))
+        e.account_id = rng.choice([None, 2, 4])
+        session.add(e)
+    for e in rng.sample(entries, 30):
+        session.delete(e)
+    session.commit()
+
+    for start, end in [(date(2025, 5, 5), date(2025, 5, 11)), (date(2025, 5, 1), date(2025, 5, 31)), (date(2025, 4, 1), date(2025, 6, 30))]:
+        stats = rollup_stats(session, start, end)
+        assert {**stats, "rows": sorted(tuple(r) for r in stats["rows"])} == _raw_stats(session, start, end)
+
+    incremental = _snapshot(session)
+    rebuild_rollups(session.connection())
+    assert _snapshot(session) == incremental
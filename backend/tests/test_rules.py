@@ -1,4 +1,16 @@
-from app.rules import extract_followups, infer_intention_bucket, infer_outcomes, infer_play, infer_tags
+from datetime import date
+
+from app.rules import (
+    TEXT_FLAGS,
+    classify,
+    classify_many,
+    extract_followups,
+    infer_intention_bucket,
+    infer_outcomes,
+    infer_play,
+    infer_tags,
+    text_flags,
+)
 
 
 def test_tag_detection():
@@ -23,3 +35,33 @@ def test_outcomes_and_followups_detection():
     assert "asset created" in outcomes
     followups = extract_followups(note)
     assert len(followups) == 1
+
+
+def test_classify_matches_individual_rules():
+    notes = [
+        ("Ran pipeline pod for 7 deals, blocker flagged, follow up by Friday", "meeting"),
+        ("Delivered enablement talk track deck and objection handling", "meeting"),
+        ("Learning block: AI readiness checklist lab", "note"),
+        ("Co-sell touchpoint shared datasheet and one-pager", "meeting"),
+        ("GDC data cloud sizing estimate, waiting on 2025-03-14 SOW", "deal"),
+        ("Weekly sync with no keywords", "cadence"),
+        ("", "note"),
+    ]
+    base = date(2025, 3, 5)
+    for (note, entry_type), derived in zip(notes, classify_many(notes, base)):
+        assert derived == {
+            "play": infer_play(note),
+            "tags": infer_tags(note),
+            "outcomes": infer_outcomes(note),
+            "intention_bucket": infer_intention_bucket(note, entry_type),
+            "followups": extract_followups(note, base),
+        }
+        assert classify(note, entry_type, base) == derived
+
+
+def test_text_flags_fold_unicode_case():
+    assert text_flags("Blocker: cost review") == TEXT_FLAGS["blocker"] | TEXT_FLAGS["cost"]
+    assert text_flags("Talk Track drafted, FASTER and safer") == TEXT_FLAGS["talk track"] | TEXT_FLAGS["faster"] | TEXT_FLAGS["safer"]
+    # Unicode case folding: KELVIN SIGN lowers to "k", which SQLite's ASCII-only lower() would miss.
+    assert text_flags("TAL\u212a TRAC\u212a") == TEXT_FLAGS["talk track"]
+    assert text_flags("plain") == text_flags("") == text_flags(None) == 0
@@ -0,0 +1,61 @@
+from datetime import date, datetime
+
+from app import search
+from app.models import Account, Deal, Entry
+from app.search import fts_query, search_deals, search_entries
+
+
+def test_fts_query_quotes_terms_and_prefixes_last():
+    assert fts_query('co-sell "work') == '"co" "sell" "work"*'
+    assert fts_query("  ") == ""
+
+
+def test_search_ranks_paginates_and_tracks_writes(session):
+    account = Account(name="Acme")
+    session.add(account)
+    session.commit()
+    session.add(Deal(account_id=account.id, name="Acme Workshop Expansion", play_type="GKE", stage="Discovery"))
+    session.add(Entry(type="note", title="Workshop recap", raw_note="planned workshop agenda"))
+    for i in range(4):
+        session.add(Entry(type="note", title=f"note {i}", raw_note=f"mentioned the workshop once {i}"))
+    session.add(Entry(type="note", title="unrelated", raw_note="pipeline review"))
+    session.commit()
+
+    first, cursor = search_entries(session, "works", limit=3)
+    assert first[0]["title"] == "<mark>Workshop</mark> recap"
+    assert "<mark>workshop</mark>" in first[0]["snippet"]
+    rest, end = search_entries(session, "works", limit=3, cursor=cursor)
+    assert end is None
+    assert len({r["id"] for r in first + rest}) == 5
+
+    assert [d["name"] for d in search_deals(session, "acme work")] == ["<mark>Acme</mark> <mark>Workshop</mark> Expansion"]
+
+    recap = session.get(Entry, first[0]["id"])
+    recap.raw_note = "renamed"
+    recap.title = "renamed"
+    session.add(recap)
+    session.delete(session.get(Entry, rest[0]["id"]))
+    session.commit()
+    assert len(search_entries(session, "workshop", limit=10)[0]) == 3
+    assert search_entries(session, "renamed")[0][0]["id"] == recap.id
+
+
+def test_paging_moves_through_rank_windows_with_typed_dates(monkeypatch, session):
+    monkeypatch.setattr(search, "RANK_WINDOW", 3)
+    session.add(Account(name="Acme"))
+    session.add(Deal(account_id=1, name="Workshop deal", play_type="GKE", stage="Discovery", next_step_date=date(2026, 1, 5)))
+    session.add_all([Entry(type="note", title=f"note {i}", raw_note="workshop" if i % 3 else "workshop workshop") for i in range(8)])
+    session.commit()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = search_entries(session, "workshop", limit=2, cursor=cursor)
+        seen += page
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 4 and sorted(r["id"] for r in seen) == list(range(1, 9))
+    # Newest window first: ids 6-8, then 3-5, then 1-2.
+    assert [r["id"] > 5 for r in seen[:3]] == [True] * 3 and {r["id"] for r in seen[6:]} == {1, 2}
+    assert all(isinstance(r["timestamp"], datetime) for r in seen)
+    assert search_deals(session, "workshop")[0]["next_step_date"] == date(2026, 1, 5)
@@ -0,0 +1,81 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+import app.database as database
+from app.database import create_engines, get_write_session, init_db
+from app.main import app
+from app.migrations import MIGRATIONS, schema_version
+from app.models import Account, Entry
+
+BACKEND = Path(__file__).resolve().parents[1]
+# Wall-clock budgets for a cold process, about twice what they measure today.
+IMPORT_BUDGET_S = 2.0
+FIRST_RESPONSE_BUDGET_S = 3.0
+LAZY_MODULES = ["reportlab", "numpy", "concurrent.futures.process"]
+
+FIRST_RESPONSE = """
+import time
+began = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+with TestClient(app.main.app) as client:
+    assert client.get("/api/home").status_code == 200
+print(time.perf_counter() - began)
+"""
+
+
+def run(code: str, *args: str, env: dict | None = None) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args, "-c", code], cwd=BACKEND, env={**os.environ, **(env or {})}, capture_output=True, text=True, check=True)
+
+
+def test_init_db_skips_schema_work_when_fingerprint_unchanged(tmp_path, monkeypatch):
+    writer, _ = create_engines(tmp_path / "worklog.db")
+    assert init_db(writer) is True
+    assert init_db(writer) is False
+    with writer.connect() as conn:
+        assert schema_version(conn) == len(MIGRATIONS)
+
+    monkeypatch.setattr(database, "schema_fingerprint", lambda dialect: "changed")
+    assert init_db(writer) is True
+    assert init_db(writer) is False
+
+
+def test_seed_runs_in_one_transaction(tmp_path):
+    writer, _ = create_engines(tmp_path / "worklog.db")
+    init_db(writer)
+    commits = []
+    event.listen(writer, "commit", lambda conn: commits.append(1))
+
+    def override():
+        with Session(writer) as session:
+            yield session
+
+    app.dependency_overrides[get_write_session] = override
+    try:
+        client = TestClient(app)
+        assert client.post("/api/init").json() == {"status": "seeded"}
+        assert len(commits) == 1
+        assert client.post("/api/init").json() == {"status": "already seeded"}
+        with Session(writer) as session:
+            assert len(session.exec(select(Account)).all()) == 2
+            assert {e.deal_id for e in session.exec(select(Entry)).all()} == {1}
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_import_time_and_first_response_within_budget(tmp_path):
+    check = f"import sys, app.main; print([m for m in {LAZY_MODULES!r} if m in sys.modules])"
+    result = run(check, "-X", "importtime")
+    assert result.stdout.strip() == "[]", f"loaded at import: {result.stdout.strip()}"
+    cumulative_us = int(re.search(r"\|\s*(\d+)\s*\|\s*app\.main$", result.stderr, re.MULTILINE).group(1))
+    assert cumulative_us / 1e6 < IMPORT_BUDGET_S, f"import app.main took {cumulative_us / 1e6:.2f}s"
+
+    first_response = float(run(FIRST_RESPONSE, env={"WORKLOG_DB": str(tmp_path / "worklog.db")}).stdout)
+    assert first_response < FIRST_RESPONSE_BUDGET_S, f"first response after {first_response:.2f}s"
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import text
+
+from app.models import Deal, Entry
+from app.sync import ResyncRequired, changes_since, compact_changes, ensure_change_log
+
+
+def test_change_log_deltas_and_compaction(session):
+    # Rows that predate the log (here: the log emptied after the insert) are recorded when it is set up.
+    conn = session.connection()
+    conn.exec_driver_sql("INSERT INTO accounts (name, industry, segment, notes) VALUES ('Existing', '', '', '')")
+    conn.exec_driver_sql("DELETE FROM changes")
+    ensure_change_log(conn)
+    session.commit()
+
+    first = changes_since(session, 0)
+    assert [a["name"] for a in first["changes"]["accounts"]["upserted"]] == ["Existing"]
+
+    session.add(Deal(account_id=1, name="D", play_type="GKE", stage="Discovery"))
+    entries = [Entry(type="note", title=f"e{i}", raw_note="n") for i in range(3)]
+    session.add_all(entries)
+    session.commit()
+    after_insert = changes_since(session, first["cursor"], limit=2)
+    assert after_insert["has_more"] and sum(len(t["upserted"]) for t in after_insert["changes"].values()) == 2
+    cursor = changes_since(session, first["cursor"])["cursor"]
+
+    deal = session.get(Deal, 1)
+    deal.stage = "Won"
+    session.add(deal)
+    session.delete(session.get(Entry, entries[0].id))
+    entry = session.get(Entry, entries[1].id)
+    entry.title = "edited"
+    session.add(entry)
+    session.commit()
+
+    delta = changes_since(session, cursor)
+    assert delta["changes"]["deals"] == {"upserted": [delta["changes"]["deals"]["upserted"][0]], "deleted": []}
+    assert delta["changes"]["deals"]["upserted"][0]["stage"] == "Won"
+    assert delta["changes"]["entries"]["deleted"] == [1]
+    assert [e["title"] for e in delta["changes"]["entries"]["upserted"]] == ["edited"]
+    assert changes_since(session, delta["cursor"]) == {"changes": {}, "cursor": delta["cursor"], "has_more": False}
+
+    result = compact_changes(session.connection(), retention_days=-1)
+    session.commit()
+    assert result["removed"] == 1
+    with pytest.raises(ResyncRequired):
+        changes_since(session, cursor)
+    assert 1 not in [e["id"] for e in changes_since(session, 0)["changes"]["entries"]["upserted"]]
+    assert changes_since(session, delta["cursor"])["changes"] == {}
+
+
+def test_rules_version_stamp_is_not_a_change(session):
+    session.add_all([Entry(type="note", title=f"e{i}", raw_note="n") for i in range(3)])
+    session.commit()
+    cursor = changes_since(session, 0)["cursor"]
+
+    session.execute(text("UPDATE entries SET rules_version = 'stamped'"))
+    session.commit()
+    assert changes_since(session, cursor) == {"changes": {}, "cursor": cursor, "has_more": False}
+
+    session.execute(text("UPDATE entries SET rules_version = 'again', title = 'edited' WHERE id = 1"))
+    session.commit()
+    assert [e["title"] for e in changes_since(session, cursor)["changes"]["entries"]["upserted"]] == ["edited"]
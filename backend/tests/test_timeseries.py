@@ -0,0 +1,64 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.models import Entry, FollowUp, PlayEnum, Routine
+from app.reporting import _collect_metrics, _entry_stats
+from app.timeseries import metric_timeseries, period_starts
+
+
+def test_weekly_series_match_per_period_report_metrics(session):
+    rng = random.Random(7)
+    start = date(2025, 1, 6)
+    for _ in range(400):
+        day = start + timedelta(days=rng.randrange(70))
+        session.add(
+            Entry(
+                type=rng.choice(["note", "meeting", "call"]),
+                title="t",
+                raw_note="n",
+                play=rng.choice(list(PlayEnum)),
+                duration_min=rng.randrange(5, 90),
+                account_id=rng.choice([None, 1, 2, 3, 4]),
+                deal_id=rng.choice([None, 1, 2]),
+                timestamp=datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(1440)),
+            )
+        )
+    for i in range(30):
+        session.add(FollowUp(title=f"f{i}", due_date=start + timedelta(days=rng.randrange(70)), status=rng.choice(["open", "done"])))
+    session.add(Routine(routine_type="weekly", frequency="weekly", default_day="Mon", last_completed_date=start + timedelta(days=15)))
+    session.add(Routine(routine_type="monthly", frequency="monthly", default_day="Mon", last_completed_date=start + timedelta(days=40)))
+    session.commit()
+
+    result = metric_timeseries(session, "week", start, start + timedelta(days=69), ["play"])
+    assert len(result["periods"]) == 10
+    by_play = {s["key"]["play"]: s for s in result["series"]}
+    totals = result["totals"]
+    for i, period in enumerate(result["periods"]):
+        week = date.fromisoformat(period)
+        stats = _entry_stats(session, week, week + timedelta(days=6))
+        metrics = _collect_metrics(stats, session, week, week + timedelta(days=6))
+        assert {play: s["hours"][i] for play, s in by_play.items() if s["hours"][i]} == metrics["hours_by_play"]
+        assert totals["entries"][i] == sum(metrics["entry_counts_by_type"].values())
+        assert totals["accounts_touched"][i] == metrics["accounts_touched"]
+        assert (totals["followups_created"][i], totals["followups_closed"][i]) == (metrics["followups_created"], metrics["followups_closed"])
+        assert totals["followup_closure_rate"][i] == round(metrics["followups_closed"] / max(metrics["followups_created"], 1), 2)
+        assert totals["cadence_completion_rate"][i] == metrics["cadence_completion_rate"]
+
+    by_pair = metric_timeseries(session, "month", start, start + timedelta(days=69), ["play", "type"])
+    assert by_pair["periods"] == ["2025-01-01", "2025-02-01", "2025-03-01"]
+    assert sum(sum(s["entries"]) for s in by_pair["series"]) == 400
+    assert all(set(s["key"]) == {"play", "type"} for s in by_pair["series"])
+
+
+def test_period_starts_and_endpoint_validation(client):
+    assert [str(s) for s in period_starts("week", date(2025, 1, 8), date(2025, 1, 20))] == ["2025-01-06", "2025-01-13", "2025-01-20"]
+    with pytest.raises(ValueError):
+        period_starts("day", date(2000, 1, 1), date(2025, 1, 1))
+
+    empty = client.get("/api/metrics/timeseries", params={"from": "2025-01-01", "to": "2025-03-31", "granularity": "month"}).json()
+    assert empty["totals"]["entries"] == [0, 0, 0] and empty["series"] == []
+    assert client.get("/api/metrics/timeseries", params={"dims": "play,colour"}).status_code == 400
+    assert client.get("/api/metrics/timeseries", params={"from": "2025-02-01", "to": "2025-01-01"}).status_code == 400
+    assert client.get("/api/metrics/timeseries", params={"granularity": "hour"}).status_code == 422
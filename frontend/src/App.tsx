@@ -7,6 +7,18 @@ const playChips = ['GCVE', 'GDC', 'GKE', 'Vertex', 'FinOps', 'AI Readiness', 'Ot
 type Account = { id: number; name: string }
 type Deal = { id: number; account_id: number; name: string; stage: string }
 
+// List endpoints return {items, next_after} pages; follow the cursor so dropdowns are never cut off.
+async function fetchAll<T>(path: string): Promise<T[]> {
+  const items: T[] = []
+  let after: string | null = null
+  do {
+    const page: { items: T[]; next_after: string | null } = await fetch(`${API}/${path}?limit=1000${after ? `&after=${encodeURIComponent(after)}` : ''}`).then(r => r.json())
+    items.push(...page.items)
+    after = page.next_after
+  } while (after)
+  return items
+}
+
 export function App() {
   const [tab, setTab] = useState<'Home'|'Deals'|'Search'|'Reports'|'Settings'>('Home')
   const [accounts, setAccounts] = useState<Account[]>([])
@@ -31,7 +43,7 @@ export function App() {
 
   async function init() {
     await fetch(`${API}/init`, { method: 'POST' })
-    const [a, d] = await Promise.all([fetch(`${API}/accounts`).then(r => r.json()), fetch(`${API}/deals`).then(r => r.json())])
+    const [a, d] = await Promise.all([fetchAll<Account>('accounts'), fetchAll<Deal>('deals')])
     setAccounts(a); setDeals(d)
   }
 